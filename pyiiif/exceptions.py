@@ -3,3 +3,11 @@ class ParameterError(Exception):
     Raised when a IIIF Image API Parameter is incorrect
     """
     pass
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of making a request to a host which has been failing,
+    until its circuit breaker lets a trial request through again
+    """
+    pass
@@ -0,0 +1,192 @@
+"""
+Incremental harvesting through the IIIF Change Discovery API
+
+See `The IIIF Change Discovery API <https://iiif.io/api/discovery/1.0/>`_
+"""
+
+import json
+import os
+from datetime import datetime, timezone
+
+from ..transport import BATCH, fetch_priority
+from .utils import get_record
+
+
+def _link(value):
+    """
+    Returns the URI of a link, which may be given as a string or an object
+    """
+    if isinstance(value, dict):
+        return value.get("id") or value.get("@id")
+    return value
+
+
+def _activity_key(activity):
+    """
+    Returns what identifies an activity among those with the same
+    ``endTime`` - its id, or failing that what it did to what
+    """
+    if activity.get("id"):
+        return activity["id"]
+    return json.dumps([activity.get("type"), _link(activity.get("object")),
+                       _link(activity.get("target"))])
+
+
+def _parse_time(value):
+    """
+    Parses an xsd:dateTime, as used for ``endTime``, into an aware datetime
+    """
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+class ChangeDiscoveryConsumer:
+    """
+    Keeps a store in step with an activity stream
+
+    Each :meth:`run` reads the stream's pages backwards from the last one
+    until it reaches activities it has already processed, then applies the
+    new ones oldest first: the objects of Create and Update activities are
+    fetched and put in the store, those of Delete activities are deleted
+    from it, and Move activities do both. Only the most recent activity for
+    each object is applied. The time of the last activity applied, and
+    which activities at that time have been applied, are kept in the state
+    file, so the next run picks up where this one stopped - even if it
+    stopped between activities that happened at the same time.
+    Everything is fetched at :data:`pyiiif.transport.BATCH` priority.
+    """
+    def __init__(self, stream, store, state=None, request_timeout=10,
+                 transport=None):
+        """
+        :param str stream: The URI of the stream's OrderedCollection
+        :param store: Where to put records, e.g. a
+            :class:`pyiiif.pres_api.harvest.DirectoryStore`. Anything with
+            ``put(uri, record)`` and ``delete(uri)`` will do.
+        :param str state: The path of the state file, or None to not keep
+            one
+        :param int request_timeout: How long to wait for a response for the
+            server before giving up on a request
+        :param Transport transport: The transport to make requests with,
+            defaults to :func:`pyiiif.transport.get_default_transport`
+        """
+        self.stream = stream
+        self.store = store
+        self.state_path = state
+        self.request_timeout = request_timeout
+        self.transport = transport
+        self.last_processed = None
+        # The activities applied whose endTime is last_processed
+        self.processed_at_last = set()
+        if state and os.path.exists(state):
+            with open(state) as f:
+                saved = json.load(f)
+            if saved.get("last_processed"):
+                self.last_processed = _parse_time(saved["last_processed"])
+                self.processed_at_last = set(saved.get("processed_at_last", ()))
+
+    def _get(self, uri):
+        with fetch_priority(BATCH):
+            return get_record(uri, request_timeout=self.request_timeout,
+                              transport=self.transport)
+
+    def save_state(self):
+        """
+        Write the time of the last activity applied, and which activities
+        at that time have been applied, to the state file
+        """
+        if not self.state_path:
+            return
+        last = self.last_processed.isoformat() if self.last_processed else None
+        tmp = self.state_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"last_processed": last,
+                       "processed_at_last": sorted(self.processed_at_last)}, f)
+        os.replace(tmp, self.state_path)
+
+    def new_activities(self):
+        """
+        Read the activities which have happened since the last one applied
+
+        :rtype: list
+        :returns: The activities, oldest first, with only the most recent
+            one for each object
+        """
+        newest_first = []
+        # Activities are applied oldest first, so those applied at the last
+        # time come before the rest of that time, and once they've all been
+        # seen everything older has been applied
+        unseen = set(self.processed_at_last)
+        page_uri = _link(self._get(self.stream).get("last"))
+        while page_uri:
+            page = self._get(page_uri)
+            for activity in reversed(page.get("orderedItems") or []):
+                if self.last_processed is not None:
+                    end = _parse_time(activity["endTime"])
+                    if end < self.last_processed:
+                        page_uri = None
+                        break
+                    key = _activity_key(activity)
+                    if end == self.last_processed and key in self.processed_at_last:
+                        unseen.discard(key)
+                        if not unseen:
+                            page_uri = None
+                            break
+                        continue
+                newest_first.append(activity)
+            else:
+                page_uri = _link(page.get("prev"))
+        seen = set()
+        out = []
+        for activity in newest_first:
+            uri = _link(activity.get("object"))
+            if uri in seen:
+                continue
+            seen.add(uri)
+            out.append(activity)
+        out.reverse()
+        return out
+
+    def apply(self, activity):
+        """
+        Apply a single activity to the store
+
+        :param dict activity: The activity
+        :rtype: str
+        :returns: The type of the activity
+        """
+        kind = activity.get("type")
+        uri = _link(activity.get("object"))
+        if kind in ("Create", "Update"):
+            self.store.put(uri, self._get(uri))
+        elif kind == "Delete":
+            self.store.delete(uri)
+        elif kind == "Move":
+            target = _link(activity.get("target"))
+            self.store.delete(uri)
+            self.store.put(target, self._get(target))
+        return kind
+
+    def run(self):
+        """
+        Apply everything that has happened since the last run
+
+        :rtype: dict
+        :returns: How many activities of each type were applied
+        """
+        counts = {}
+        try:
+            for activity in self.new_activities():
+                kind = self.apply(activity)
+                counts[kind] = counts.get(kind, 0) + 1
+                end = _parse_time(activity["endTime"])
+                if end != self.last_processed:
+                    self.last_processed = end
+                    self.processed_at_last = set()
+                self.processed_at_last.add(_activity_key(activity))
+        finally:
+            self.save_state()
+        return counts
@@ -0,0 +1,295 @@
+"""
+Harvesting whole IIIF collection trees to local storage
+"""
+
+import hashlib
+import json
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from ..transport import BATCH, StaticResponse, Transport, fetch_priority
+from .utils import get_record
+
+
+class DirectoryStore:
+    """
+    Stores records as JSON files in a directory
+
+    Files are named after a hash of the URI they were fetched from and
+    spread over subdirectories named after the first two characters of
+    that hash, so no single directory grows too large.
+    """
+    def __init__(self, path):
+        """
+        :param str path: The directory to store records in. It is created
+            if it doesn't exist.
+        """
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def _path(self, uri):
+        digest = hashlib.sha1(uri.encode("utf-8")).hexdigest()
+        return os.path.join(self.path, digest[:2], digest + ".json")
+
+    def __contains__(self, uri):
+        return os.path.exists(self._path(uri))
+
+    def put(self, uri, record):
+        """
+        Store a record
+
+        :param str uri: The URI the record was fetched from
+        :param dict record: The record
+        """
+        path = self._path(uri)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(record, f)
+
+    def get(self, uri):
+        """
+        :param str uri: The URI the record was fetched from
+        :rtype: dict
+        :returns: The record, or None if it hasn't been stored
+        """
+        try:
+            with open(self._path(uri)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def delete(self, uri):
+        """
+        Remove a record, if it has been stored
+
+        :param str uri: The URI the record was fetched from
+        """
+        try:
+            os.remove(self._path(uri))
+        except FileNotFoundError:
+            pass
+
+
+class StoreTransport(Transport):
+    """
+    A transport which answers from a store of records, e.g. a
+    :class:`pyiiif.pres_api.packed_store.PackedStore`, so
+    :func:`pyiiif.pres_api.utils.get_record` and everything built on it can
+    read harvested records rather than fetch them
+
+    Requests for URIs which haven't been stored go to ``transport``, or are
+    answered with a 404 if there isn't one.
+    """
+    def __init__(self, store, transport=None):
+        """
+        :param store: The store, with ``get_bytes(uri)`` or ``get(uri)``
+        :param Transport transport: The transport to fall back to, or None
+            to not make any requests
+        """
+        self.store = store
+        self.transport = transport
+
+    def get(self, uri, timeout=None, stream=False):
+        if hasattr(self.store, "get_bytes"):
+            view = self.store.get_bytes(uri)
+            content = None
+            if view is not None:
+                with view:
+                    content = bytes(view)
+        else:
+            record = self.store.get(uri)
+            content = None if record is None else json.dumps(record).encode("utf-8")
+        if content is not None:
+            return StaticResponse(uri, 200, content)
+        if self.transport is None:
+            return StaticResponse(uri, 404)
+        return self.transport.get(uri, timeout=timeout, stream=stream)
+
+
+def _child_uris(rec):
+    """
+    Lists the URIs of the records a collection refers to
+
+    :param dict rec: The record
+    :rtype: list
+    """
+    out = []
+    if rec.get("@type") != "sc:Collection":
+        return out
+    for key in ("members", "collections", "manifests"):
+        for child in rec.get(key) or []:
+            uri = child if isinstance(child, str) else child.get("@id")
+            if uri:
+                out.append(uri)
+    return out
+
+
+class Harvester:
+    """
+    Walks a collection tree breadth first and stores every record in it
+
+    Collections are followed through their ``members``, ``collections``
+    and ``manifests``. Up to ``concurrency`` records are fetched at once.
+    Every ``checkpoint_every`` records the URIs queued, harvested and
+    failed since the last checkpoint are appended to the checkpoint file,
+    one JSON object per line, and a harvester started with an existing
+    checkpoint file replays it to carry on from there rather than starting
+    over. Once the file holds more than twice as many URIs as are still to
+    be fetched it is rewritten with just those, so checkpointing costs the
+    same per record however large the harvest. Records already in the store
+    are not fetched again. Records are fetched at
+    :data:`pyiiif.transport.BATCH` priority.
+    """
+    # How many URIs the checkpoint file may hold before it's worth rewriting,
+    # however few are still to be fetched
+    compact_min = 1000
+
+    def __init__(self, start, store, checkpoint=None, concurrency=8,
+                 checkpoint_every=100, request_timeout=10, transport=None):
+        """
+        :param list start: The URIs to start harvesting from
+        :param store: Where to put records, e.g. a :class:`DirectoryStore`.
+            Anything with ``put(uri, record)`` and ``__contains__(uri)``
+            will do.
+        :param str checkpoint: The path of the checkpoint file, or None to
+            not keep one
+        :param int concurrency: How many records to fetch at once
+        :param int checkpoint_every: How many records to harvest between
+            checkpoints
+        :param int request_timeout: How long to wait for a response for the
+            server before giving up on a record
+        :param Transport transport: The transport to make requests with,
+            defaults to :func:`pyiiif.transport.get_default_transport`
+        """
+        if isinstance(start, str):
+            start = [start]
+        self.store = store
+        self.checkpoint_path = checkpoint
+        self.concurrency = concurrency
+        self.checkpoint_every = checkpoint_every
+        self.request_timeout = request_timeout
+        self.transport = transport
+        self.harvested = 0
+        self.failed = {}
+        # Changes not yet written to the checkpoint file, and how many URIs
+        # the file holds
+        self._log = []
+        self._logged = 0
+        if checkpoint and os.path.exists(checkpoint):
+            self.frontier = deque(self._replay(checkpoint))
+        else:
+            self.frontier = deque(start)
+            self._log.append({"queued": list(self.frontier)})
+        # Everything queued by this harvester, to not queue anything twice
+        self._queued = set(self.frontier)
+
+    def _replay(self, path):
+        """
+        Read a checkpoint file back
+
+        :rtype: list
+        :returns: The URIs still to be fetched
+        """
+        pending = {}
+        with open(path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A write cut short
+                    break
+                for uri in entry.get("queued", entry.get("frontier", ())):
+                    pending[uri] = None
+                for uri in entry.get("done", ()):
+                    pending.pop(uri, None)
+                self.harvested += len(entry.get("done", ()))
+                self.harvested = entry.get("harvested", self.harvested)
+                for uri in entry.get("failed", {}):
+                    pending.pop(uri, None)
+                self.failed.update(entry.get("failed", {}))
+                self._logged += sum(len(entry.get(key, ()))
+                                    for key in ("queued", "frontier", "done", "failed"))
+        return list(pending)
+
+    def checkpoint(self, in_flight=()):
+        """
+        Write the harvester's progress to its checkpoint file
+
+        :param list in_flight: URIs which are being fetched but haven't
+            been stored yet
+        """
+        if not self.checkpoint_path:
+            return
+        self._logged += sum(len(value) for entry in self._log
+                            for value in entry.values())
+        pending = list(in_flight) + list(self.frontier)
+        if self._logged > 2 * (len(pending) + len(self.failed)) + self.compact_min:
+            state = [{"queued": pending}, {"failed": self.failed},
+                     {"harvested": self.harvested}]
+            tmp = self.checkpoint_path + ".tmp"
+            with open(tmp, "w") as f:
+                f.writelines(json.dumps(entry) + "\n" for entry in state)
+            os.replace(tmp, self.checkpoint_path)
+            self._logged = len(pending) + len(self.failed)
+        else:
+            with open(self.checkpoint_path, "a") as f:
+                f.writelines(json.dumps(entry) + "\n" for entry in self._log)
+        self._log = []
+
+    def _fetch(self, uri):
+        with fetch_priority(BATCH):
+            return get_record(uri, request_timeout=self.request_timeout,
+                              transport=self.transport)
+
+    def _enqueue(self, rec):
+        queued = []
+        for uri in _child_uris(rec):
+            if uri not in self._queued and uri not in self.store:
+                self._queued.add(uri)
+                self.frontier.append(uri)
+                queued.append(uri)
+        if queued:
+            self._log.append({"queued": queued})
+
+    def run(self, max_records=None):
+        """
+        Harvest until there is nothing left to fetch
+
+        :param int max_records: Stop after storing this many records, e.g.
+            to harvest in installments
+        :rtype: int
+        :returns: How many records this call stored
+        """
+        stored = 0
+        since_checkpoint = 0
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            while True:
+                while self.frontier and len(running) < self.concurrency and \
+                        (max_records is None or
+                         stored + len(running) < max_records):
+                    uri = self.frontier.popleft()
+                    running[pool.submit(self._fetch, uri)] = uri
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    uri = running.pop(future)
+                    try:
+                        rec = future.result()
+                    except Exception as e:
+                        self.failed[uri] = str(e)
+                        self._log.append({"failed": {uri: str(e)}})
+                        continue
+                    self.store.put(uri, rec)
+                    self._log.append({"done": [uri]})
+                    self._enqueue(rec)
+                    self.harvested += 1
+                    stored += 1
+                    since_checkpoint += 1
+                if since_checkpoint >= self.checkpoint_every:
+                    self.checkpoint(running.values())
+                    since_checkpoint = 0
+        self.checkpoint()
+        return stored
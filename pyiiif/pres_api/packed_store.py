@@ -0,0 +1,200 @@
+"""
+Storing harvested IIIF records in a single append-only file
+"""
+
+import json
+import mmap
+import os
+import struct
+from threading import Lock
+
+from .twodotone.records import Record, load_preserving, ttc
+
+
+# The header of each entry in a PackedStore: the lengths of its URI and body
+_ENTRY = struct.Struct(">IQ")
+# The body length marking an entry as a deletion
+_DELETED = 2 ** 64 - 1
+
+
+class PackedStore:
+    """
+    Stores records as JSON in a single append-only file
+
+    Each entry is a header holding the lengths of the URI and the record,
+    then the URI, then the record's JSON. Storing a record again appends a
+    new entry, and deleting one appends an entry with no record, so entries
+    are never rewritten until :meth:`compact` is called. Opening a store
+    reads the headers, skipping over the records, to work out where the
+    latest copy of each record is. A write cut short at the end of the file
+    is dropped when the store is next opened.
+
+    The file is memory-mapped, so :meth:`get_bytes` can hand out a record's
+    JSON without copying or parsing it, and :meth:`get_record` only builds
+    the record it's asked for.
+    """
+    def __init__(self, path):
+        """
+        :param str path: The file to store records in. It is created if it
+            doesn't exist.
+        """
+        self.path = path
+        self._index = {}
+        self._map = None
+        self._lock = Lock()
+        with open(path, "ab"):
+            pass
+        self._remap()
+        self._scan()
+
+    def _remap(self):
+        size = os.path.getsize(self.path)
+        if size == 0:
+            self._map = None
+            return
+        with open(self.path, "rb") as f:
+            # Views into the previous map keep it open until they're released
+            self._map = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+
+    def _scan(self):
+        data = self._map
+        size = len(data) if data is not None else 0
+        pos = 0
+        while pos + _ENTRY.size <= size:
+            uri_length, length = _ENTRY.unpack_from(data, pos)
+            start = pos + _ENTRY.size + uri_length
+            end = start + (0 if length == _DELETED else length)
+            if end > size:
+                break
+            uri = data[pos + _ENTRY.size:start].decode("utf-8")
+            if length == _DELETED:
+                self._index.pop(uri, None)
+            else:
+                self._index[uri] = (start, length)
+            pos = end
+        if pos < size:
+            with open(self.path, "r+b") as f:
+                f.truncate(pos)
+            self._remap()
+
+    def _append(self, uri, body):
+        encoded = uri.encode("utf-8")
+        length = _DELETED if body is None else len(body)
+        with self._lock:
+            with open(self.path, "ab") as f:
+                start = f.tell() + _ENTRY.size + len(encoded)
+                f.write(_ENTRY.pack(len(encoded), length) + encoded + (body or b""))
+            if body is None:
+                self._index.pop(uri, None)
+            else:
+                self._index[uri] = (start, length)
+
+    def __contains__(self, uri):
+        return uri in self._index
+
+    def __len__(self):
+        return len(self._index)
+
+    def __iter__(self):
+        return iter(list(self._index))
+
+    def put(self, uri, record):
+        """
+        Store a record
+
+        :param str uri: The URI the record was fetched from
+        :param record: The record, as a dict, a :class:`Record`, or its JSON
+            as a str or bytes
+        """
+        if isinstance(record, Record):
+            record = record.to_json()
+        elif isinstance(record, dict):
+            record = json.dumps(record)
+        if isinstance(record, str):
+            record = record.encode("utf-8")
+        self._append(uri, record)
+
+    def get_bytes(self, uri):
+        """
+        :param str uri: The URI the record was fetched from
+        :rtype: memoryview
+        :returns: The record's JSON, straight from the mapped file, or None
+            if it hasn't been stored. Release the view when done with it,
+            e.g. with a ``with`` block.
+        """
+        entry = self._index.get(uri)
+        if entry is None:
+            return None
+        start, length = entry
+        data = self._map
+        if data is None or start + length > len(data):
+            with self._lock:
+                self._remap()
+            data = self._map
+        return memoryview(data)[start:start + length]
+
+    def get(self, uri):
+        """
+        :param str uri: The URI the record was fetched from
+        :rtype: dict
+        :returns: The record, or None if it hasn't been stored
+        """
+        view = self.get_bytes(uri)
+        if view is None:
+            return None
+        with view:
+            return json.loads(bytes(view))
+
+    def get_record(self, uri, cls=None):
+        """
+        Build a stored record
+
+        The record is loaded with
+        :func:`pyiiif.pres_api.twodotone.records.load_preserving`, so nothing
+        is validated or requested and nothing in it is lost.
+
+        :param str uri: The URI the record was fetched from
+        :param type cls: The record's class, e.g.
+            :class:`pyiiif.pres_api.twodotone.records.Manifest`. Defaults to
+            the class for the record's ``@type``.
+        :rtype: :class:`pyiiif.pres_api.twodotone.records.Record`
+        :returns: The record, or None if it hasn't been stored
+        """
+        data = self.get(uri)
+        if data is None:
+            return None
+        if cls is None:
+            cls = ttc.get(data.get("@type"))
+            if cls is None:
+                raise ValueError("{} has no record class for @type {}".format(
+                    uri, data.get("@type")
+                ))
+        return load_preserving(cls, data)
+
+    def delete(self, uri):
+        """
+        Remove a record, if it has been stored
+
+        :param str uri: The URI the record was fetched from
+        """
+        if uri in self._index:
+            self._append(uri, None)
+
+    def compact(self):
+        """
+        Rewrite the file with only the latest copy of each stored record
+        """
+        with self._lock:
+            # Records appended since the file was last mapped aren't in the map yet
+            self._remap()
+            tmp = self.path + ".tmp"
+            index = {}
+            with open(tmp, "wb") as f:
+                for uri, (start, length) in self._index.items():
+                    encoded = uri.encode("utf-8")
+                    f.write(_ENTRY.pack(len(encoded), length) + encoded)
+                    index[uri] = (f.tell(), length)
+                    f.write(self._map[start:start + length])
+            os.replace(tmp, self.path)
+            self._index = index
+            self._remap()
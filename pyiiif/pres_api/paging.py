@@ -0,0 +1,257 @@
+"""
+Writing and reading IIIF paged collections
+
+See `Paging <https://iiif.io/api/presentation/2.1/#paging>`_ in the IIIF
+Presentation API
+"""
+
+import contextvars
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+
+from .twodotone.records import INTERNAL_ATTRIBUTES
+from .utils import get_record
+
+# The keys collection entries are listed under
+MEMBER_KEYS = ("members", "collections", "manifests")
+
+
+def _reference(member):
+    """
+    Returns the short form a collection lists an entry in
+
+    :param member: A :class:`Manifest` or :class:`Collection`, or a dict
+        which is used as is
+    :rtype: dict
+    """
+    if isinstance(member, dict):
+        return member
+    out = {"@id": member.id, "@type": member.type}
+    label = getattr(member, "_label", None)
+    if label:
+        out["label"] = label
+    # Properties the record's class doesn't model, e.g. from a collection
+    # loaded with load_preserving, go along with it as they would in to_dict
+    for key, value in (member.__dict__.get("_extra") or {}).items():
+        out.setdefault(key, value)
+    return out
+
+
+def _header(collection):
+    """
+    Serializes a collection's own properties, leaving out its entries
+
+    :param Collection collection: The collection
+    :rtype: dict
+    """
+    out = {"@context": collection.context, "@id": collection.id,
+           "@type": collection.type}
+    for n_property, value in vars(collection).items():
+        name = n_property.lstrip("_")
+        if name in ("id", "type", "context") or name in MEMBER_KEYS or \
+                n_property in INTERNAL_ATTRIBUTES:
+            continue
+        if isinstance(value, list):
+            out[name] = [x.to_dict() for x in value]
+        elif isinstance(value, (str, int, dict)):
+            out[name] = value
+    for key, value in (collection.__dict__.get("_extra") or {}).items():
+        if key not in MEMBER_KEYS:
+            out.setdefault(key, value)
+    return out
+
+
+def _entries(collection):
+    """
+    Yields a collection's entries, without copying its lists
+
+    :rtype: iterator
+    :returns: ``(key, member)`` tuples
+    """
+    if getattr(collection, "_members", None):
+        for member in collection._members:
+            yield "members", member
+        return
+    for key in ("collections", "manifests"):
+        for member in getattr(collection, "_" + key, None) or []:
+            yield key, member
+
+
+def _key_for(member):
+    """
+    Picks the key a member passed on its own is listed under
+    """
+    kind = member.get("@type") if isinstance(member, dict) else member.type
+    return "collections" if kind == "sc:Collection" else "manifests"
+
+
+def iter_collection_pages(collection, page_size=1000, page_uri="{id}?page={n}",
+                          members=None, total=None):
+    """
+    Split a collection into the documents of a paged collection
+
+    The first document is the top level collection, with the collection's
+    own properties, ``total``, ``first`` and ``last``. Each document after
+    it is a page of at most ``page_size`` entries, with ``within``,
+    ``startIndex`` and ``next`` and ``prev`` links. Entries are listed in
+    the short form of id, type and label, and only one page of them is held
+    at a time, so this works through collections of any size in flat
+    memory.
+
+    :param Collection collection: The collection to page
+    :param int page_size: How many entries to put on each page
+    :param str page_uri: A template for the URIs of the pages, formatted
+        with the collection's ``id`` and the page number ``n`` (from 1)
+    :param members: The entries to page through, instead of the
+        collection's own - any iterable of :class:`Manifest` and
+        :class:`Collection` instances or of dicts in short form, so a
+        collection too big to build can be generated as it's written
+    :param int total: How many entries there are. Only needed when
+        ``members`` can't tell its length.
+    :rtype: iterator
+    :returns: ``(uri, document)`` tuples, top level collection first
+    """
+    if page_size < 1:
+        raise ValueError("page_size must be at least 1")
+    if members is None:
+        if getattr(collection, "_members", None):
+            total = len(collection._members)
+        else:
+            total = sum(len(getattr(collection, "_" + key, None) or [])
+                        for key in ("collections", "manifests"))
+        entries = _entries(collection)
+    else:
+        if total is None:
+            total = len(members)
+        entries = ((_key_for(member), member) for member in members)
+    pages = max(1, -(-total // page_size))
+
+    def uri(n):
+        return page_uri.format(id=collection.id, n=n)
+
+    top = _header(collection)
+    top["total"] = total
+    top["first"] = uri(1)
+    top["last"] = uri(pages)
+    yield collection.id, top
+    for n in range(1, pages + 1):
+        page = {"@context": collection.context, "@id": uri(n),
+                "@type": "sc:Collection", "within": collection.id,
+                "startIndex": (n - 1) * page_size}
+        if n > 1:
+            page["prev"] = uri(n - 1)
+        if n < pages:
+            page["next"] = uri(n + 1)
+        for key, member in islice(entries, page_size):
+            page.setdefault(key, []).append(_reference(member))
+        yield page["@id"], page
+
+
+def write_paged_collection(collection, directory, page_size=1000,
+                           page_uri="{id}?page={n}", members=None, total=None):
+    """
+    Write a collection out as a paged collection, one file per document
+
+    The top level collection is written to ``index.json`` and page ``n`` to
+    ``n.json``. Each document is written as soon as it has been built - see
+    :func:`iter_collection_pages` for the parameters.
+
+    :param str directory: The directory to write to. It is created if it
+        doesn't exist.
+    :rtype: int
+    :returns: How many pages were written
+    """
+    os.makedirs(directory, exist_ok=True)
+    pages = iter_collection_pages(collection, page_size=page_size,
+                                  page_uri=page_uri, members=members,
+                                  total=total)
+    written = -1
+    for written, (_, doc) in enumerate(pages):
+        name = "{}.json".format(written) if written else "index.json"
+        with open(os.path.join(directory, name), "w") as f:
+            json.dump(doc, f)
+    return written
+
+
+def _link(value):
+    """
+    Returns the URI of a link, which may be given as a string or an object
+    """
+    if isinstance(value, dict):
+        return value.get("@id")
+    return value
+
+
+def _listed(rec):
+    """
+    Lists the entries of a collection document
+    """
+    out = []
+    for key in MEMBER_KEYS:
+        out.extend(rec.get(key) or [])
+    return out
+
+
+def iter_collection_members(rec, request_timeout=10, transport=None,
+                            prefetch=True, resolve=False):
+    """
+    Iterate over every entry of a collection, following its pages
+
+    Entries listed in the collection itself come first, then those on each
+    page from ``first`` along the ``next`` links. Pages are fetched one at a
+    time as the iteration reaches them, and while the entries of one page
+    are being consumed the next one is already being fetched, so walking a
+    collection of millions of entries never holds more than two pages and
+    rarely waits on the network.
+
+    :param dict/str rec: The collection, or the URL at which it can be found
+    :param int request_timeout: How long to wait for a response for the
+        server before giving up on a page
+    :param Transport transport: The transport to make requests with,
+        defaults to :func:`pyiiif.transport.get_default_transport`
+    :param bool prefetch: Whether or not to fetch the next page in the
+        background
+    :param bool resolve: If True, fetch and yield the record of each entry
+        rather than the entry as listed
+    :rtype: iterator
+    :returns: The entries, as listed, or their records
+    """
+    def fetch(uri):
+        return get_record(uri, request_timeout=request_timeout,
+                          transport=transport)
+
+    if isinstance(rec, str):
+        rec = fetch(rec)
+    executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+
+    def request(uri):
+        # Returns something to call for the page once it's needed
+        if executor is None:
+            return partial(fetch, uri)
+        # Fetched at the caller's priority
+        return executor.submit(contextvars.copy_context().run, fetch,
+                               uri).result
+
+    seen = set()
+    try:
+        page, uri = rec, _link(rec.get("first"))
+        pending = request(uri) if uri else None
+        while True:
+            if pending is not None:
+                seen.add(uri)
+            for entry in _listed(page):
+                if resolve:
+                    entry = fetch(entry if isinstance(entry, str)
+                                  else entry["@id"])
+                yield entry
+            if pending is None:
+                break
+            page = pending()
+            uri = _link(page.get("next"))
+            pending = request(uri) if uri and uri not in seen else None
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False)
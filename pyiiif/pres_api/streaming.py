@@ -0,0 +1,312 @@
+"""
+Incremental scanning of large IIIF Presentation documents
+
+:class:`JSONScanner` walks a JSON document as it arrives, a chunk of bytes at
+a time, so a caller can pick out the few values it needs and stop reading as
+soon as it has them. Values the caller isn't interested in are skipped over
+without being decoded.
+"""
+
+import json
+import re
+
+
+_QUOTE = ord('"')
+_BACKSLASH = ord('\\')
+_LBRACE = ord('{')
+_RBRACE = ord('}')
+_LBRACKET = ord('[')
+_RBRACKET = ord(']')
+_COLON = ord(':')
+_COMMA = ord(',')
+
+_NON_WHITESPACE = re.compile(rb'[^ \t\n\r]')
+_STRUCTURE = re.compile(rb'["\[\]{}]')
+# Everything up to the next bracket, including whole strings - a string
+# which doesn't end in the buffer stops the match at its opening quote
+_PLAIN = re.compile(rb'[^"\[\]{}]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"\[\]{}]*)*', re.DOTALL)
+_SCALAR_END = re.compile(rb'[ \t\n\r,\]}]')
+
+
+class JSONScanner:
+    """
+    A pull scanner over a JSON document delivered as chunks of bytes
+
+    Objects and arrays are walked with :meth:`iter_object` and
+    :meth:`iter_array`. While positioned at a value, the caller may decode
+    it with :meth:`read_value`, descend into it with another ``iter_*``
+    call, or leave it alone, in which case it is skipped. Only the bytes of
+    the value being decoded (or the chunk being scanned) are held in memory.
+    """
+    def __init__(self, chunks):
+        """
+        :param chunks: An iterable of bytes, e.g. ``response.iter_content()``
+        """
+        self._chunks = iter(chunks)
+        self._buf = bytearray()
+        self._pos = 0
+        # The offset in the document of self._buf[0]
+        self._base = 0
+        # The offset in the document of the value being read, if any
+        self._keep = None
+
+    def _fill(self):
+        """
+        Reads another chunk into the buffer, dropping what's been consumed
+
+        :rtype: bool
+        :returns: False if the document has been read completely
+        """
+        for chunk in self._chunks:
+            if not chunk:
+                continue
+            drop = self._pos
+            if self._keep is not None:
+                drop = min(drop, self._keep - self._base)
+            if drop:
+                del self._buf[:drop]
+                self._base += drop
+                self._pos -= drop
+            self._buf += chunk
+            return True
+        return False
+
+    def tell(self):
+        """
+        Return the offset in the document of the next unread byte
+
+        :rtype: int
+        """
+        return self._base + self._pos
+
+    def peek(self):
+        """
+        Skip whitespace and return the next byte without consuming it
+
+        :rtype: int
+        :returns: The byte, or None at the end of the document
+        """
+        while True:
+            m = _NON_WHITESPACE.search(self._buf, self._pos)
+            if m:
+                self._pos = m.start()
+                return self._buf[self._pos]
+            self._pos = len(self._buf)
+            if not self._fill():
+                return None
+
+    def _expect(self, byte):
+        if self.peek() != byte:
+            raise ValueError(
+                "expected {!r} at offset {}".format(chr(byte), self.tell())
+            )
+        self._pos += 1
+
+    def _skip_string(self):
+        self._pos += 1
+        while True:
+            buf = self._buf
+            end = buf.find(b'"', self._pos)
+            if end == -1:
+                end = len(buf)
+            # A quote preceded by an odd number of backslashes is escaped
+            start = end
+            while start > self._pos and buf[start-1] == _BACKSLASH:
+                start -= 1
+            if end == len(buf):
+                # Keep a trailing run of backslashes, it may escape a quote
+                # at the start of the next chunk
+                self._pos = start
+                if not self._fill():
+                    raise ValueError("unterminated string in JSON document")
+                continue
+            self._pos = end + 1
+            if (end - start) % 2 == 0:
+                return
+
+    def _skip_container(self):
+        depth = 0
+        while True:
+            self._pos = _PLAIN.match(self._buf, self._pos).end()
+            m = _STRUCTURE.search(self._buf, self._pos)
+            if m is None:
+                self._pos = len(self._buf)
+                if not self._fill():
+                    raise ValueError("unexpected end of JSON document")
+                continue
+            c = self._buf[m.start()]
+            self._pos = m.start()
+            if c == _QUOTE:
+                self._skip_string()
+                continue
+            self._pos += 1
+            if c in (_LBRACE, _LBRACKET):
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return
+
+    def _skip_scalar(self):
+        while True:
+            m = _SCALAR_END.search(self._buf, self._pos)
+            if m:
+                self._pos = m.start()
+                return
+            self._pos = len(self._buf)
+            if not self._fill():
+                return
+
+    def skip_value(self):
+        """
+        Move past the value at the current position without decoding it
+        """
+        c = self.peek()
+        if c is None:
+            raise ValueError("unexpected end of JSON document")
+        elif c == _QUOTE:
+            self._skip_string()
+        elif c in (_LBRACE, _LBRACKET):
+            self._skip_container()
+        else:
+            self._skip_scalar()
+
+    def read_raw(self):
+        """
+        Move past the value at the current position and return its bytes
+
+        :rtype: bytes
+        """
+        self.peek()
+        start = self.tell()
+        self._keep = start
+        try:
+            self.skip_value()
+            return bytes(self._buf[start-self._base:self._pos])
+        finally:
+            self._keep = None
+
+    def read_value(self):
+        """
+        Decode the value at the current position and move past it
+        """
+        return json.loads(self.read_raw().decode("utf-8"))
+
+    def iter_object(self):
+        """
+        Walk the object at the current position
+
+        Yields each key with the scanner positioned at its value. Values
+        the caller doesn't consume before asking for the next key are
+        skipped.
+        """
+        self._expect(_LBRACE)
+        if self.peek() == _RBRACE:
+            self._pos += 1
+            return
+        while True:
+            key = self.read_value()
+            self._expect(_COLON)
+            self.peek()
+            start = self.tell()
+            yield key
+            if self.tell() == start:
+                self.skip_value()
+            c = self.peek()
+            self._pos += 1
+            if c == _RBRACE:
+                return
+            elif c != _COMMA:
+                raise ValueError(
+                    "expected ',' or '}}' at offset {}".format(self.tell()-1)
+                )
+
+    def iter_array(self):
+        """
+        Walk the array at the current position
+
+        Yields the index of each item with the scanner positioned at it.
+        Items the caller doesn't consume are skipped.
+        """
+        self._expect(_LBRACKET)
+        if self.peek() == _RBRACKET:
+            self._pos += 1
+            return
+        i = 0
+        while True:
+            self.peek()
+            start = self.tell()
+            yield i
+            if self.tell() == start:
+                self.skip_value()
+            c = self.peek()
+            self._pos += 1
+            if c == _RBRACKET:
+                return
+            elif c != _COMMA:
+                raise ValueError(
+                    "expected ',' or ']' at offset {}".format(self.tell()-1)
+                )
+            i += 1
+
+
+def _first_item(scanner, descend):
+    """
+    Yields from ``descend(scanner)`` for the first item of the array at the
+    current position, or the item itself if it is only a reference
+    """
+    for i in scanner.iter_array():
+        if i == 0:
+            if scanner.peek() == _LBRACE:
+                yield from descend(scanner)
+            else:
+                yield "reference", scanner.read_value()
+
+
+def _canvas_sources(scanner):
+    for key in scanner.iter_object():
+        if key == "thumbnail":
+            yield "thumbnail", scanner.read_value()
+        elif key == "images":
+            for i in scanner.iter_array():
+                if i == 0:
+                    yield "image", scanner.read_value()
+
+
+def _sequence_sources(scanner):
+    for key in scanner.iter_object():
+        if key == "thumbnail":
+            yield "thumbnail", scanner.read_value()
+        elif key == "canvases":
+            yield from _first_item(scanner, _canvas_sources)
+
+
+def iter_thumbnail_sources(chunks):
+    """
+    Find the values a thumbnail could be made from in a Presentation record
+
+    Walks the document in order and yields ``(kind, value)`` pairs, where
+    kind is one of:
+
+    * "thumbnail" - the thumbnail of the record, its first sequence or that
+      sequence's first canvas
+    * "image" - the first image annotation of the first canvas
+    * "reference" - the first member, manifest or sub-collection of a
+      collection, or a first sequence or canvas which is only referenced
+      rather than embedded
+
+    Stop iterating as soon as a usable value turns up and the rest of the
+    document is never read.
+
+    :param chunks: An iterable of bytes holding the document
+    """
+    scanner = JSONScanner(chunks)
+    for key in scanner.iter_object():
+        if key == "thumbnail":
+            yield "thumbnail", scanner.read_value()
+        elif key == "sequences":
+            yield from _first_item(scanner, _sequence_sources)
+        elif key in ("members", "manifests", "collections"):
+            for i in scanner.iter_array():
+                if i == 0:
+                    yield "reference", scanner.read_value()
@@ -0,0 +1,234 @@
+"""Building whole twodotone IIIF Manifests from tabular data in one pass
+
+The classes in :mod:`pyiiif.pres_api.twodotone.records` validate every
+property as it is set, and an :class:`ImageResource` requests its image's
+info.json when it is created. That is what you want when building a record
+by hand, but not when turning a spreadsheet of a few hundred thousand
+images, whose identifiers and dimensions are already known to be good, into
+a manifest. The functions here take rows of ``(identifier, width, height,
+label)`` and build the manifest column by column, without any per object
+validation or network requests.
+"""
+
+import csv
+import json
+import string
+
+from pyiiif.constants import valid_contexts
+from pyiiif.utils import escape_identifier, gc_paused
+from .records import Annotation, Canvas, ImageResource, Manifest, \
+    Sequence, ServerProfile, Service
+
+LEVEL2_PROFILE = "https://iiif.io/api/image/2/level2.json"
+
+# Percent-encodes ASCII the way escape_identifier does, but in one
+# str.translate call rather than a Python loop over the bytes
+_SAFE = string.ascii_letters + string.digits + "_.-~"
+_ESCAPES = str.maketrans({chr(c): "%{:02X}".format(c)
+                          for c in range(128) if chr(c) not in _SAFE})
+
+
+def rows_from_csv(f, header=None):
+    """
+    Read rows of ``identifier, width, height[, label]`` from a CSV file
+
+    :param f: An open file, or anything else :func:`csv.reader` accepts
+    :param bool header: Whether or not the first row is a header. By default
+        it is taken to be one if its width isn't a number.
+    :rtype: iterator
+    """
+    reader = csv.reader(f)
+    for n, row in enumerate(reader):
+        if n == 0 and (header or (header is None and not row[1].strip().isdigit())):
+            continue
+        yield row
+
+
+def rows_from_columns(identifiers, widths, heights, labels=None):
+    """
+    Turn parallel columns into rows
+
+    :param list identifiers: The image identifiers
+    :param list widths: The image widths
+    :param list heights: The image heights
+    :param list labels: The canvas labels, if any
+    :rtype: iterator
+    """
+    if labels is None:
+        return zip(identifiers, widths, heights)
+    return zip(identifiers, widths, heights, labels)
+
+
+def _columns(rows):
+    """
+    Split rows into the columns the builders work from
+
+    :rtype: tuple
+    :returns: The identifiers, widths, heights and labels - the labels are
+        None for rows without one
+    """
+    rows = [tuple(row) for row in rows]
+    identifiers = [row[0] for row in rows]
+    widths = [int(row[1]) for row in rows]
+    heights = [int(row[2]) for row in rows]
+    labels = [row[3] if len(row) > 3 else None for row in rows]
+    return identifiers, widths, heights, labels
+
+
+def _uris(uri, image_base, identifiers, canvas_uri, annotation_uri):
+    """
+    Work out every URI the manifest will need, a column at a time
+    """
+    bases = [image_base + "/" + (i.translate(_ESCAPES) if i.isascii()
+                                 else escape_identifier(i))
+             for i in identifiers]
+    images = [b + "/full/full/0/default.jpg" for b in bases]
+    numbers = [str(n) for n in range(1, len(bases) + 1)]
+    # Split the templates around {n} once, rather than formatting each URI
+    head, _, tail = canvas_uri.format(manifest=uri, n="{n}").partition("{n}")
+    canvases = [head + n + tail for n in numbers]
+    head, _, tail = annotation_uri.format(manifest=uri, n="{n}").partition("{n}")
+    annotations = [head + n + tail for n in numbers]
+    return bases, images, canvases, annotations
+
+
+def build_manifest_dict(uri, rows, image_base, label=None,
+                        mimetype="image/jpeg",
+                        sequence_uri="{manifest}/sequence/normal",
+                        canvas_uri="{manifest}/canvas/{n}",
+                        annotation_uri="{manifest}/annotation/{n}"):
+    """
+    Build a manifest with one canvas per row, as a dict
+
+    The dict is the same as :func:`build_manifest` would return the
+    :meth:`to_dict` of, but no record objects are made along the way. The
+    service profile is one dict shared by every image.
+
+    :param str uri: The URI of the manifest
+    :param rows: ``(identifier, width, height[, label])`` rows, e.g. from
+        :func:`rows_from_csv` or :func:`rows_from_columns`
+    :param str image_base: The scheme, server and prefix of the IIIF Image
+        API server serving the images, e.g. ``https://example.org/iiif``
+    :param str label: The label of the manifest
+    :param str mimetype: The format of the images
+    :param str sequence_uri: A template for the URI of the sequence,
+        formatted with the ``manifest`` URI
+    :param str canvas_uri: A template for the URIs of the canvases,
+        formatted with the ``manifest`` URI and the canvas number ``n``
+        (from 1)
+    :param str annotation_uri: A template for the URIs of the canvases'
+        image annotations, like ``canvas_uri``
+    :rtype: dict
+    """
+    identifiers, widths, heights, labels = _columns(rows)
+    bases, images, canvas_ids, annotation_ids = _uris(
+        uri, image_base, identifiers, canvas_uri, annotation_uri
+    )
+    profile = [LEVEL2_PROFILE, ServerProfile().to_dict()]
+    image_context = valid_contexts["image"]
+    canvases = []
+    with gc_paused():
+        for base, image, canvas_id, annotation_id, width, height, \
+                canvas_label in zip(bases, images, canvas_ids, annotation_ids,
+                                    widths, heights, labels):
+            canvas = {"@id": canvas_id, "@type": "sc:Canvas"}
+            if canvas_label is not None:
+                canvas["label"] = canvas_label
+            canvas["height"] = height
+            canvas["width"] = width
+            canvas["images"] = [{
+                "@id": annotation_id, "@type": "oa:Annotation",
+                "motivation": "sc:Painting",
+                "resource": {
+                    "@id": image, "@type": "dctypes:Image",
+                    "format": mimetype, "height": height,
+                    "service": {"@id": base, "@context": image_context,
+                                "profile": profile},
+                    "width": width
+                },
+                "on": canvas_id
+            }]
+            canvases.append(canvas)
+    out = {"@id": uri, "@type": "sc:Manifest",
+           "@context": valid_contexts["presentation"]}
+    if label is not None:
+        out["label"] = label
+    out["sequences"] = [{"@id": sequence_uri.format(manifest=uri),
+                         "@type": "sc:Sequence", "canvases": canvases}]
+    return out
+
+
+def build_manifest_json(uri, rows, image_base, **kwargs):
+    """
+    Build a manifest with one canvas per row, as JSON
+
+    See :func:`build_manifest_dict` for the parameters.
+
+    :rtype: str
+    """
+    return json.dumps(build_manifest_dict(uri, rows, image_base, **kwargs))
+
+
+def _bare(cls, attributes):
+    """
+    Make a record without running any of its validation
+
+    :param dict attributes: The record's attributes, as its setters would
+        have stored them
+    """
+    rec = cls.__new__(cls)
+    rec.__dict__ = attributes
+    return rec
+
+
+def build_manifest(uri, rows, image_base, label=None, mimetype="image/jpeg",
+                   sequence_uri="{manifest}/sequence/normal",
+                   canvas_uri="{manifest}/canvas/{n}",
+                   annotation_uri="{manifest}/annotation/{n}"):
+    """
+    Build a :class:`Manifest` with one canvas per row
+
+    The records are made without validating any of their properties or
+    checking that their URIs resolve, so only use this on data you trust.
+    See :func:`build_manifest_dict` for the parameters.
+
+    :rtype: :class:`Manifest`
+    """
+    identifiers, widths, heights, labels = _columns(rows)
+    bases, images, canvas_ids, annotation_ids = _uris(
+        uri, image_base, identifiers, canvas_uri, annotation_uri
+    )
+    profile = ServerProfile()
+    image_context = valid_contexts["image"]
+    canvases = []
+    with gc_paused():
+        for base, image, canvas_id, annotation_id, width, height, \
+                canvas_label in zip(bases, images, canvas_ids, annotation_ids,
+                                    widths, heights, labels):
+            service = _bare(Service, {"_id": base, "_context": image_context,
+                                      "profile": profile})
+            resource = _bare(ImageResource, {
+                "_id": image, "_type": "dctypes:Image", "_format": mimetype,
+                "_height": height, "_width": width, "_service": service
+            })
+            annotation = _bare(Annotation, {
+                "_id": annotation_id, "_type": "oa:Annotation",
+                "_motivation": "sc:Painting", "on": canvas_id,
+                "_resource": resource
+            })
+            canvas = {"_id": canvas_id, "_type": "sc:Canvas"}
+            if canvas_label is not None:
+                canvas["_label"] = canvas_label
+            canvas["_height"] = height
+            canvas["_width"] = width
+            canvas["_images"] = [annotation]
+            canvases.append(_bare(Canvas, canvas))
+    sequence = _bare(Sequence, {"_id": sequence_uri.format(manifest=uri),
+                                "_type": "sc:Sequence",
+                                "_canvases": canvases})
+    manifest = {"_context": valid_contexts["presentation"],
+                "_type": "sc:Manifest", "_id": uri}
+    if label is not None:
+        manifest["_label"] = label
+    manifest["_sequences"] = [sequence]
+    return _bare(Manifest, manifest)
@@ -0,0 +1,190 @@
+"""Random access to the canvases of large twodotone IIIF Manifest files
+
+A viewer paging through a manifest of tens of thousands of canvases only
+needs a few of them at a time. :func:`write_canvas_index` scans a manifest's
+JSON once, with :class:`pyiiif.pres_api.streaming.JSONScanner`, and writes a
+sidecar index of where each canvas of its first sequence starts and ends in
+the file, without decoding any of them. A :class:`CanvasFile` then reads
+just the bytes of the canvases asked for, and decodes only those.
+
+The index is a header - a magic string, the size and modification time (in
+nanoseconds) of the manifest file it was made from and how many canvases
+there are - followed by the start and end offset of each canvas, all as
+big-endian unsigned 64 bit integers, so the offsets of canvases ``i`` to
+``j`` can be read without reading the rest. An index whose manifest's size
+or modification time no longer match is refused.
+"""
+
+import mmap
+import os
+import struct
+
+from pyiiif.pres_api.streaming import JSONScanner
+from .records import Canvas, load_preserving
+
+MAGIC = b"PYIIIFC2"
+_HEADER = struct.Struct(">8sQQQ")
+_OFFSETS = struct.Struct(">QQ")
+
+# How much of the manifest to read at a time while indexing it
+CHUNK_SIZE = 1024 * 1024
+
+
+def default_index_path(path):
+    """
+    :param str path: The path of a manifest file
+    :rtype: str
+    :returns: Where its index goes unless told otherwise
+    """
+    return path + ".canvases"
+
+
+def _chunks(f, chunk_size):
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _canvas_offsets(scanner, sequence):
+    """
+    Yields the start and end offsets of the canvases of a manifest's
+    sequence, skipping over everything else
+    """
+    for key in scanner.iter_object():
+        if key != "sequences":
+            continue
+        for i in scanner.iter_array():
+            if i != sequence or scanner.peek() != ord("{"):
+                continue
+            for sequence_key in scanner.iter_object():
+                if sequence_key != "canvases":
+                    continue
+                for _ in scanner.iter_array():
+                    scanner.peek()
+                    start = scanner.tell()
+                    scanner.skip_value()
+                    yield start, scanner.tell()
+
+
+def write_canvas_index(path, index_path=None, sequence=0,
+                       chunk_size=CHUNK_SIZE):
+    """
+    Index where each canvas of a manifest file is
+
+    :param str path: The path of the manifest's JSON
+    :param str index_path: Where to write the index, defaults to
+        :func:`default_index_path`
+    :param int sequence: Which of the manifest's sequences to index
+    :param int chunk_size: How many bytes of the manifest to read at a time
+    :rtype: int
+    :returns: How many canvases were indexed
+    """
+    index_path = index_path or default_index_path(path)
+    tmp = index_path + ".tmp"
+    count = 0
+    with open(path, "rb") as f, open(tmp, "wb") as out:
+        out.write(_HEADER.pack(MAGIC, 0, 0, 0))
+        pack = _OFFSETS.pack
+        scanner = JSONScanner(_chunks(f, chunk_size))
+        for start, end in _canvas_offsets(scanner, sequence):
+            out.write(pack(start, end))
+            count += 1
+        out.seek(0)
+        stat = os.fstat(f.fileno())
+        out.write(_HEADER.pack(MAGIC, stat.st_size, stat.st_mtime_ns, count))
+    os.replace(tmp, index_path)
+    return count
+
+
+class CanvasFile:
+    """
+    Reads ranges of canvases from a manifest file through its index
+
+    Both files are memory-mapped, so the pages holding the canvases asked
+    for are all that's read from disk. Use it as a context manager, or call
+    :meth:`close`, to unmap them.
+    """
+    def __init__(self, path, index_path=None):
+        """
+        :param str path: The path of the manifest's JSON
+        :param str index_path: The path of its index, from
+            :func:`write_canvas_index`, defaults to
+            :func:`default_index_path`
+        """
+        self.path = path
+        self.index_path = index_path or default_index_path(path)
+        with open(self.index_path, "rb") as f:
+            header = f.read(_HEADER.size)
+        if header[:len(MAGIC)] != MAGIC or len(header) < _HEADER.size:
+            raise ValueError("{} isn't a canvas index".format(self.index_path))
+        _, size, mtime_ns, self._count = _HEADER.unpack(header)
+        stat = os.stat(path)
+        if (size, mtime_ns) != (stat.st_size, stat.st_mtime_ns):
+            raise ValueError("{} has changed since {} was written".format(
+                path, self.index_path
+            ))
+        self._data = self._map(path) if size else b""
+        self._index = self._map(self.index_path)
+
+    @staticmethod
+    def _map(path):
+        with open(path, "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self):
+        return self._count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """
+        Unmap the files
+        """
+        for data in (self._data, self._index):
+            if isinstance(data, mmap.mmap):
+                data.close()
+
+    def offsets(self, start, stop):
+        """
+        :param int start: The index of the first canvas
+        :param int stop: The index after the last canvas
+        :rtype: list
+        :returns: ``(start, end)`` byte offsets of the canvases in the
+            manifest file
+        """
+        start, stop, _ = slice(start, stop).indices(self._count)
+        stop = max(start, stop)
+        first = _HEADER.size + start * _OFFSETS.size
+        return list(_OFFSETS.iter_unpack(
+            self._index[first:first + (stop - start) * _OFFSETS.size]
+        ))
+
+    def raw(self, start, stop):
+        """
+        :param int start: The index of the first canvas
+        :param int stop: The index after the last canvas
+        :rtype: list
+        :returns: The JSON of each canvas, as bytes
+        """
+        return [self._data[a:b] for a, b in self.offsets(start, stop)]
+
+    def canvases(self, start, stop):
+        """
+        Build a range of canvases
+
+        They're loaded with
+        :func:`pyiiif.pres_api.twodotone.records.load_preserving`, so
+        nothing is validated or requested and nothing in them is lost.
+
+        :param int start: The index of the first canvas
+        :param int stop: The index after the last canvas
+        :rtype: list
+        :returns: The :class:`Canvas` records
+        """
+        return [load_preserving(Canvas, raw) for raw in self.raw(start, stop)]
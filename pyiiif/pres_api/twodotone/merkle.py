@@ -0,0 +1,144 @@
+"""Comparing twodotone IIIF collection trees by their content hashes
+
+A summary of a tree is a tree of nodes, one per collection, manifest and
+canvas, each holding the record's ``@id``, ``@type``, the content hash of the
+record itself (``own``, see :meth:`Record.content_hash`) and a ``hash`` over
+that and the hashes of its children. Two replicas of a tree can be compared
+by exchanging summaries: wherever two nodes' hashes match, nothing below them
+differs, so :func:`diff` only descends into the subtrees that do.
+
+Summaries are plain dicts and lists, so they can be sent as JSON. For very
+large trees, summarize to a limited ``depth`` first and then summarize only
+the subtrees :func:`diff` reports as differing.
+"""
+
+from hashlib import sha256
+from itertools import chain
+
+from .records import Canvas, Record, canonical_json, content_hash
+
+# The keys collections list their entries under
+COLLECTION_KEYS = ("members", "collections", "manifests")
+
+
+def _records_by_dict(root):
+    """
+    Map the dicts of a record and of the records in it to the records, so
+    their cached content hashes can be used
+
+    Canvases' own records aren't needed, so they aren't walked into.
+
+    :rtype: dict
+    """
+    out = {}
+    stack = [root]
+    while stack:
+        rec = stack.pop()
+        out[id(rec.to_dict())] = rec
+        if not isinstance(rec, Canvas):
+            stack.extend(rec._child_records())
+    return out
+
+
+def _children(data):
+    """
+    List the entries of a collection or the canvases of a manifest
+    """
+    kind = data.get("@type")
+    if kind == "sc:Collection":
+        return list(chain.from_iterable(data.get(key) or []
+                                        for key in COLLECTION_KEYS))
+    if kind == "sc:Manifest":
+        return list(chain.from_iterable(sequence.get("canvases") or []
+                                        for sequence in data.get("sequences") or []))
+    return []
+
+
+def summarize(root, resolve=None, depth=None):
+    """
+    Summarize a collection tree
+
+    :param root: The top of the tree - a :class:`Collection`,
+        :class:`Manifest` or :class:`Canvas`, or the dict of one
+    :param resolve: A callable taking the URI of a collection's entry and
+        returning the whole record, as a record or a dict, or None if it
+        can't be had. Without one, collections' entries are summarized as
+        they are listed, which is enough to see which were added, removed
+        or relabeled but not which changed. E.g. the ``get`` of a
+        :class:`pyiiif.pres_api.harvest.DirectoryStore`.
+    :param int depth: How many levels below the root to include. The whole
+        tree is still hashed, but nodes on the last level have their
+        ``children`` left out (set to None).
+    :rtype: dict
+    """
+    records = _records_by_dict(root) if isinstance(root, Record) else {}
+
+    def own_hash(data):
+        rec = records.get(id(data))
+        return rec.content_hash() if rec is not None else content_hash(data)
+
+    def node(doc, level):
+        if isinstance(doc, Record):
+            records.update(_records_by_dict(doc))
+            doc = doc.to_dict()
+        elif isinstance(doc, str):
+            doc = {"@id": doc}
+        own = own_hash(doc)
+        out = {"@id": doc.get("@id"), "@type": doc.get("@type"), "own": own}
+        children = []
+        for child in _children(doc):
+            if resolve is not None and doc.get("@type") == "sc:Collection":
+                uri = child if isinstance(child, str) else child.get("@id")
+                child = resolve(uri) or child
+            children.append(node(child, level + 1))
+        combined = canonical_json([own, [child["hash"] for child in children]])
+        out["hash"] = sha256(combined.encode("utf-8")).hexdigest()
+        out["children"] = children if depth is None or level < depth else None
+        return out
+
+    return node(root, 0)
+
+
+def diff(old, new):
+    """
+    Find which records differ between two summaries
+
+    Added and removed subtrees are reported by their top record only. A
+    record is reported as changed if it differs itself, so a manifest is
+    reported whenever any of its canvases changed, along with the canvases,
+    but a collection is only reported if its own listing changed. Where a
+    summary was cut short by ``depth``, a node whose subtree differs is
+    reported as changed whether or not it differs itself, to be summarized
+    further.
+
+    :param dict old: The summary of one replica, e.g. the serving node's
+    :param dict new: The summary of the other, e.g. the build node's
+    :rtype: list
+    :returns: ``(change, @id, @type)`` tuples, where change is "added",
+        "removed" or "changed", in the order the records come in ``new``
+    """
+    out = []
+
+    def walk(a, b):
+        if a["hash"] == b["hash"]:
+            return
+        if a["own"] != b["own"] or a["children"] is None or \
+                b["children"] is None:
+            out.append(("changed", b["@id"], b["@type"]))
+        if a["children"] is None or b["children"] is None:
+            return
+        before = {child["@id"]: child for child in a["children"]}
+        after = set()
+        for child in b["children"]:
+            after.add(child["@id"])
+            match = before.get(child["@id"])
+            if match is None:
+                out.append(("added", child["@id"], child["@type"]))
+            else:
+                walk(match, child)
+        for child in a["children"]:
+            if child["@id"] not in after:
+                out.append(("removed", child["@id"], child["@type"]))
+
+    walk(old, new)
+    return out
@@ -0,0 +1,224 @@
+"""Diffing twodotone IIIF Manifests and patching them in place
+
+A patch is a plain dict, so it can be sent as JSON::
+
+    {"@id": "<the manifest>",
+     "set": {"<key>": <value>, ...}, "unset": ["<key>", ...],
+     "sequences": {
+         "<a sequence>": {
+             "set": {...}, "unset": [...],
+             "removed": ["<canvas>", ...],
+             "added": [[<index>, {<canvas>}], ...],
+             "moved": [["<canvas>", <index>], ...],
+             "changed": {"<canvas>": {"set": {...}, "unset": [...]}, ...}
+         }
+     }}
+
+Every key but ``@id`` is left out when there's nothing under it. Indexes
+are positions in the sequence once the patch has been applied. A manifest
+whose sequences were added, removed or reordered has its whole
+``sequences`` set instead.
+"""
+
+import copy
+from bisect import bisect_left
+
+from .records import Canvas, load_preserving
+
+
+def _diff_fields(out, old, new, skip=()):
+    """
+    Add the differences between two records' dicts to a patch
+
+    :param dict out: The patch, or the part of one, to add them to
+    :param tuple skip: Keys to leave to the caller
+    """
+    changed = {key: value for key, value in new.items()
+               if key not in skip and (key not in old or old[key] != value)}
+    removed = [key for key in old if key not in skip and key not in new]
+    if changed:
+        out["set"] = changed
+    if removed:
+        out["unset"] = removed
+
+
+def _differ(old, new):
+    """
+    Whether or not two records have different content, going by their
+    cached content hashes
+    """
+    return old is not new and old.content_hash() != new.content_hash()
+
+
+def _stable(positions):
+    """
+    Find a longest increasing run (not necessarily contiguous) of positions
+
+    :param list positions: Where each canvas was, in the order they are now
+    :rtype: set
+    :returns: The indexes into ``positions`` of the run
+    """
+    tails = []      # the position ending the best run of each length
+    tail_at = []    # and the index it's at
+    previous = [None] * len(positions)
+    for i, position in enumerate(positions):
+        length = bisect_left(tails, position)
+        if length:
+            previous[i] = tail_at[length - 1]
+        if length == len(tails):
+            tails.append(position)
+            tail_at.append(i)
+        else:
+            tails[length] = position
+            tail_at[length] = i
+    out = set()
+    i = tail_at[-1] if tail_at else None
+    while i is not None:
+        out.add(i)
+        i = previous[i]
+    return out
+
+
+def _same_canvas(before, after):
+    """
+    Whether or not a canvas is where it was and unchanged - the same record,
+    as it is in a clone which hasn't touched it, or one with the same id and
+    content hash
+    """
+    return before is after or (before.id == after.id and not _differ(before, after))
+
+
+def _diff_sequence(old, new):
+    """
+    Diff two versions of a sequence
+
+    Canvases which stay in the same order relative to each other are left
+    in place, and only the fewest needed to get the new order are moved.
+    The unchanged canvases at the start and end of the sequence are passed
+    over with one identity or cached hash comparison each, so only those
+    between the first and last change are indexed and diffed. Finding them
+    still takes a look at each canvas up to the first change and back from
+    the end to the last: records don't log their changes, so there's no
+    way to go straight to the changed ones.
+
+    :rtype: dict
+    """
+    out = {}
+    _diff_fields(out, old.to_dict(), new.to_dict(), skip=("canvases",))
+    old_canvases = getattr(old, "_canvases", None) or []
+    new_canvases = getattr(new, "_canvases", None) or []
+    shortest = min(len(old_canvases), len(new_canvases))
+    first = 0
+    while first < shortest and _same_canvas(old_canvases[first], new_canvases[first]):
+        first += 1
+    last = 0
+    while last < shortest - first and \
+            _same_canvas(old_canvases[-1 - last], new_canvases[-1 - last]):
+        last += 1
+    old_canvases = old_canvases[first:len(old_canvases) - last]
+    new_canvases = new_canvases[first:len(new_canvases) - last]
+    old_at = {canvas.id: i for i, canvas in enumerate(old_canvases)}
+    new_at = {canvas.id: i for i, canvas in enumerate(new_canvases, first)}
+    removed = [canvas.id for canvas in old_canvases if canvas.id not in new_at]
+    added = [[i, canvas.to_dict()] for i, canvas in enumerate(new_canvases, first)
+             if canvas.id not in old_at]
+    kept = [canvas.id for canvas in new_canvases if canvas.id in old_at]
+    moved = []
+    if kept != [canvas.id for canvas in old_canvases if canvas.id in new_at]:
+        stable = _stable([old_at[an_id] for an_id in kept])
+        moved = [[an_id, new_at[an_id]] for i, an_id in enumerate(kept)
+                 if i not in stable]
+    changed = {}
+    for an_id in kept:
+        before, after = old_canvases[old_at[an_id]], new_canvases[new_at[an_id] - first]
+        if _differ(before, after):
+            fields = {}
+            _diff_fields(fields, before.to_dict(), after.to_dict())
+            changed[an_id] = fields
+    for key, value in (("removed", removed), ("added", added),
+                       ("moved", moved), ("changed", changed)):
+        if value:
+            out[key] = value
+    return out
+
+
+def diff(old, new):
+    """
+    Work out the patch which turns one version of a manifest into another
+
+    Records whose content hashes match (see :meth:`Record.content_hash`) are
+    skipped without being compared, and hashes are cached on the records,
+    so diffing a manifest against a lightly edited version of itself mostly
+    costs one comparison per canvas. The patch shares values with ``new``'s
+    dicts: dump it to JSON or copy it before changing it.
+
+    :param Manifest old: The manifest as it was
+    :param Manifest new: The manifest as it is now
+    :rtype: dict
+    :returns: The patch - see the module documentation
+    """
+    patch = {"@id": new.id}
+    if not _differ(old, new):
+        return patch
+    old_sequences = getattr(old, "_sequences", None) or []
+    new_sequences = getattr(new, "_sequences", None) or []
+    same = [s.id for s in old_sequences] == [s.id for s in new_sequences]
+    _diff_fields(patch, old.to_dict(), new.to_dict(),
+                 skip=("sequences",) if same else ())
+    if same:
+        sequences = {after.id: _diff_sequence(before, after)
+                     for before, after in zip(old_sequences, new_sequences)
+                     if _differ(before, after)}
+        if sequences:
+            patch["sequences"] = sequences
+    return patch
+
+
+def apply(patch, manifest):
+    """
+    Apply a patch to a manifest, in place
+
+    Canvases are found, removed and reinserted through the sequences' id
+    indexes. Added canvases, and values set on records, are taken the way
+    :func:`pyiiif.pres_api.twodotone.records.load_preserving` takes them,
+    so nothing in them is lost.
+
+    :param dict patch: The patch, from :func:`diff`
+    :param Manifest manifest: The manifest to change
+    :rtype: :class:`Manifest`
+    :returns: The manifest
+    """
+    if patch.get("@id") != manifest.id:
+        raise ValueError("The patch is for {}, not {}".format(patch.get("@id"),
+                                                              manifest.id))
+    manifest.update_properties(copy.deepcopy(patch.get("set", {})),
+                               patch.get("unset", ()))
+    sequences = {s.id: s for s in (manifest.sequences
+                                   if hasattr(manifest, "_sequences") else [])}
+    for sequence_id, changes in patch.get("sequences", {}).items():
+        sequence = sequences.get(sequence_id)
+        if sequence is None:
+            raise ValueError("{} has no sequence {}".format(manifest.id,
+                                                            sequence_id))
+        sequence.update_properties(copy.deepcopy(changes.get("set", {})),
+                                   changes.get("unset", ()))
+        for an_id in changes.get("removed", ()):
+            sequence.del_canvas(an_id)
+        moving = {an_id: sequence.get_canvas(an_id)
+                  for an_id, _ in changes.get("moved", ())}
+        for an_id in moving:
+            sequence.del_canvas(an_id)
+        # What's left is in its new order, so inserting the rest from the
+        # front puts each at its index
+        inserts = [(i, load_preserving(Canvas, copy.deepcopy(canvas)))
+                   for i, canvas in changes.get("added", ())]
+        inserts.extend((i, moving[an_id])
+                       for an_id, i in changes.get("moved", ()))
+        inserts.sort(key=lambda x: x[0])
+        for i, canvas in inserts:
+            sequence.insert_canvas(i, canvas)
+        for an_id, fields in changes.get("changed", {}).items():
+            sequence.get_canvas(an_id).update_properties(
+                copy.deepcopy(fields.get("set", {})), fields.get("unset", ())
+            )
+    return manifest
@@ -1,22 +1,431 @@
 """Classes for building twodotone IIIF Presentation records:
 """
 
-from os.path import join
+from array import array
+from collections.abc import MutableSequence, Sequence as _Sequence
+from copy import copy
+from hashlib import sha256
 import json
-import requests
-from urllib.parse import urlparse, ParseResult
-
-from pyiiif.utils import escape_identifier, convert_context_url_into_lookup
-from pyiiif.constants import valid_contexts, valid_viewingDirections, valid_viewingHints, valid_types
+import tempfile
+import uuid
+from weakref import ref
+from urllib.parse import urlparse
+
+from pyiiif.utils import gc_paused
+from pyiiif.constants import valid_contexts, valid_viewingDirections, valid_viewingHints, \
+    valid_types
 from pyiiif.image_api.twodotone import ImageApiUrl
+from pyiiif.exceptions import CircuitOpenError
+from pyiiif.transport import get_default_transport
 
 
 # TODO define Annotation, ImageContent and OtherContent class methods
 
+# How long setters wait for each attempt at checking that a url resolves, in seconds
+URL_CHECK_TIMEOUT = 5
+
+# Attributes records keep for their own bookkeeping, which aren't IIIF properties
+INTERNAL_ATTRIBUTES = ("_dict_cache", "_json_cache", "_parents", "_id_index", "_extra",
+                       "_pristine", "_hash_cache", "_shared", "_owners", "_clones", "_owner")
+
+
+def _encode(out, children):
+    """encodes a record's dictionary as JSON, splicing in the cached JSON of its child records
+
+    Produces the same string as json.dumps(out). Child records only ever appear as property values
+    or in list property values, so only those are looked at; everything else is left to json.dumps.
+
+    :param dict out: the dictionary of the record
+    :param dict children: maps the id() of the dictionary of each child record to the record
+    :rtype str
+    """
+    if not children:
+        return json.dumps(out)
+    parts = []
+    for key, value in out.items():
+        if isinstance(value, dict) and id(value) in children:
+            encoded = children[id(value)].to_json()
+        elif isinstance(value, list):
+            encoded = "[" + ", ".join(children[id(x)].to_json()
+                                      if isinstance(x, dict) and id(x) in children
+                                      else json.dumps(x) for x in value) + "]"
+        else:
+            encoded = json.dumps(value)
+        parts.append(json.dumps(key) + ": " + encoded)
+    return "{" + ", ".join(parts) + "}"
+
+
+_CANONICAL = json.JSONEncoder(sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def canonical_json(value):
+    """encodes a value as canonical JSON: keys sorted, no needless whitespace and no escaped unicode
+
+    Equal values always encode to the same string, whatever order their keys were set in.
+
+    :rtype str
+    """
+    return _CANONICAL.encode(value)
+
+
+def _digest(value):
+    """returns the SHA-256 hex digest of the canonical JSON of a value
+
+    :rtype str
+    """
+    return sha256(canonical_json(value).encode("utf-8")).hexdigest()
+
+
+def content_hash(value):
+    """returns the content hash of a record given as a dictionary
+
+    The same as :meth:`Record.content_hash` of the record the dictionary is the
+    :meth:`Record.to_dict` of, but nothing is cached.
+
+    :param dict value: the record
+    :rtype str
+    """
+    with gc_paused():
+        return _digest(_hashable(value, {}))
+
+
+def _hashable(value, children):
+    """a function to replace each record nested in a value with a reference to its hash
+
+    Only dictionaries whose @type is a record type count as records, so a value hashes the same
+    whether its parts are record instances (whose hashes are cached) or plain dictionaries.
+
+    :param value: the dictionary of a record, or a value in it
+    :param dict children: maps the id() of the dictionary of each child record to the record
+    """
+    if isinstance(value, dict):
+        return {key: _hashable_part(x, children) for key, x in value.items()}
+    return value
+
+
+def _hashable_part(value, children):
+    """a function to prepare a value inside a record's dictionary for hashing - see
+    :func:`_hashable`
+    """
+    if isinstance(value, dict):
+        if "@id" in value and value.get("@type") in ttc:
+            child = children.get(id(value))
+            if child is not None:
+                return {"@hash": child._content_hash()}
+            return {"@hash": _digest(_hashable(value, {}))}
+        return _hashable(value, children)
+    if isinstance(value, list):
+        return [_hashable_part(x, children) for x in value]
+    return value
+
+
+class RecordListView(_Sequence):
+    """a read-only view of a list property of a record
+
+    Getters for list properties return one of these rather than a copy of the list, so reading a
+    property is cheap however long the list is. It behaves like a list for reading and compares
+    equal to a list with the same items, but it can't be changed. Use the add, extend and insert
+    methods of the record instead, e.g. :meth:`Sequence.add_canvas`.
+    """
+    __slots__ = ("_items", "_owner")
+
+    def __init__(self, items, owner=None):
+        """initializes a view of a list
+
+        :param list items: the list to view, or None for an empty view
+        :param Record owner: the record the list belongs to, if it may hold records shared with
+         clones (see :meth:`Record.clone`), which are then copied for the owner as they are got
+        """
+        self._items = items if items is not None else []
+        self._owner = owner
+
+    def __getitem__(self, index):
+        if self._owner is None:
+            return self._items[index]
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self._items)))]
+        return self._owner._own_item(self._items, index)
+
+    def __iter__(self):
+        if self._owner is None:
+            return iter(self._items)
+        return (self._owner._own_item(self._items, i) for i in range(len(self._items)))
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, item):
+        return item in self._items
+
+    def __eq__(self, other):
+        if isinstance(other, RecordListView):
+            other = other._items
+        return isinstance(other, list) and self._items == other
+
+    def __repr__(self):
+        return repr(self._items)
+
+    __hash__ = None
+
+
+class _IdIndex:
+    """an index of the positions of the items of a list property by their ids
+
+    Inserting or removing an item moves every item after it, so rather than renumbering them the
+    index keeps a log of these moves and applies the ones logged since an entry was made when it is
+    looked up. Once the log grows longer than the square root of the length of the list the index is
+    rebuilt. Appending takes the same time however long the list is, but a lookup replays up to the
+    square root of its length of moves, and rebuilding after that many inserts or removals costs the
+    length of the list, so lookups, inserts and removals each take time in proportion to the square
+    root of the length of the list, averaged over many of them. Lookups with no inserts or removals
+    since the last rebuild take the same time however long the list is. Keeping every position exact
+    instead would make lookups constant time, but each insert or removal would then renumber the
+    items after it, which costs the length of the list every time.
+
+    When items share an id, the first of them is the one found, as with list.index.
+    """
+    __slots__ = ("items", "positions", "moves", "duplicates")
+
+    def __init__(self, items):
+        self.items = items
+        self.rebuild()
+
+    def rebuild(self):
+        """a method to index the list from scratch
+        """
+        self.positions = {}
+        self.moves = []
+        self.duplicates = False
+        self._note(0, self.items)
+
+    def _note(self, start, new_items):
+        positions = self.positions
+        epoch = len(self.moves)
+        for pos, item in enumerate(new_items, start):
+            an_id = getattr(item, "_id", None)
+            if an_id in positions:
+                self.duplicates = True
+                # Like list.index, the first item with an id is the one found
+                if self.position(an_id) < pos:
+                    continue
+            positions[an_id] = (pos, epoch)
+
+    def _move(self, start, delta):
+        self.moves.append((start, delta))
+        if len(self.moves) > max(32, len(self.items) ** 0.5):
+            self.rebuild()
+            return True
+        return False
+
+    def added(self, start, new_items):
+        """a method to index items which have just been put in the list at position start
+        """
+        if start < len(self.items) - len(new_items):
+            if self._move(start, len(new_items)):
+                return
+        self._note(start, new_items)
+
+    def removed(self, pos, item):
+        """a method to forget an item which has just been removed from position pos of the list
+        """
+        if self.duplicates:
+            self.rebuild()
+            return
+        self.positions.pop(getattr(item, "_id", None), None)
+        self._move(pos + 1, -1)
+
+    def position(self, an_id):
+        """a method to find the position of the item with the given id
+
+        :param str an_id: the id to look up
+        :rtype int
+        :returns the position, or None if no item has that id
+        """
+        entry = self.positions.get(an_id)
+        if entry is None:
+            return None
+        pos, epoch = entry
+        for start, delta in self.moves[epoch:]:
+            if pos >= start:
+                pos += delta
+        return pos
+
+
+class CanvasSpool(MutableSequence):
+    """a list of canvases kept on disk, for building sequences too large to hold in memory
+
+    Canvases put in a spool are written to a file as JSON, and only where each one is in the file
+    and its id are kept in memory. Set a spool as the canvases of a sequence
+    (``sequence.canvases = CanvasSpool()``) and the sequence's add, extend, insert, get and delete
+    methods work on it as they would on a list, then write the manifest out with
+    :meth:`Record.write_json`, which copies the canvases' JSON from the file rather than building
+    them. :meth:`Record.to_dict` and :meth:`Record.to_json` still work, but build every canvas's
+    dictionary at once.
+
+    Getting a canvas builds it from its JSON with :func:`load_preserving`, so it is a copy: to
+    change a stored canvas, delete it and insert the changed one through the sequence. Replaced and
+    deleted canvases stay in the file until the spool is closed.
+    """
+    def __init__(self, path=None):
+        """initializes an empty spool
+
+        :param str path: the file to write canvases to, or None for a temporary file which is
+         deleted when the spool is closed
+        """
+        self.path = path
+        self._file = open(path, "w+b") if path else tempfile.TemporaryFile()
+        self._end = 0
+        self._offsets = array("Q")
+        self._lengths = array("Q")
+        self._ids = []
+        # Positions by id, thrown away by anything but appending and rebuilt when next needed
+        self._positions = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """a method to close the spool's file
+        """
+        self._file.close()
+
+    def _write(self, canvas):
+        """a method to write a canvas, or its dictionary, to the end of the file
+
+        :rtype tuple
+        :returns the offset and length of its JSON, and its id
+        """
+        if isinstance(canvas, Canvas):
+            data, an_id = canvas.to_json(), canvas.id
+        elif isinstance(canvas, dict) and canvas.get("@type") == "sc:Canvas":
+            data, an_id = json.dumps(canvas), canvas.get("@id")
+        else:
+            raise ValueError("a CanvasSpool can only hold canvases and their dictionaries, "
+                             "not {}".format(type(canvas).__name__))
+        data = data.encode("utf-8")
+        offset = self._end
+        self._file.seek(offset)
+        self._file.write(data)
+        self._end += len(data)
+        return offset, len(data), an_id
+
+    def _read(self, index):
+        self._file.seek(self._offsets[index])
+        return self._file.read(self._lengths[index])
+
+    def _insert_many(self, index, canvases):
+        written = [self._write(canvas) for canvas in canvases]
+        appending = index == len(self._ids)
+        self._offsets[index:index] = array("Q", [x[0] for x in written])
+        self._lengths[index:index] = array("Q", [x[1] for x in written])
+        self._ids[index:index] = [x[2] for x in written]
+        if appending and self._positions is not None:
+            for pos, (_, _, an_id) in enumerate(written, index):
+                self._positions.setdefault(an_id, pos)
+        else:
+            self._positions = None
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("CanvasSpool index out of range")
+        return load_preserving(Canvas, self._read(index))
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError("a CanvasSpool can't be assigned to with an extended slice")
+            del self[start:stop]
+            self._insert_many(start, list(value))
+            return
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("CanvasSpool assignment index out of range")
+        self._offsets[index], self._lengths[index], self._ids[index] = self._write(value)
+        self._positions = None
+
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            indexes = range(*index.indices(len(self)))
+            if not indexes:
+                return
+            if indexes.step != 1:
+                for i in sorted(indexes, reverse=True):
+                    del self[i]
+                return
+            index = slice(indexes.start, indexes.stop)
+        elif index < 0:
+            index += len(self)
+        del self._offsets[index]
+        del self._lengths[index]
+        del self._ids[index]
+        self._positions = None
+
+    def insert(self, index, value):
+        """a method to insert a canvas, or its dictionary, before position index
+        """
+        index = min(max(0, index + len(self) if index < 0 else index), len(self))
+        self._insert_many(index, [value])
+
+    def extend(self, values):
+        """a method to append every canvas, or canvas dictionary, in values
+        """
+        self._insert_many(len(self), list(values))
+
+    def __contains__(self, item):
+        an_id = item.get("@id") if isinstance(item, dict) else getattr(item, "_id", None)
+        return self.position(an_id) is not None
+
+    def iter_raw(self):
+        """a method to iterate over the JSON of the canvases, in order, as bytes
+        """
+        for index in range(len(self)):
+            yield self._read(index)
+
+    # A spool is its own index of positions by id, standing in for the _IdIndex of a list property
+
+    @property
+    def items(self):
+        return self
+
+    def position(self, an_id):
+        """a method to find the position of the canvas with the given id
+
+        :param str an_id: the id to look up
+        :rtype int
+        :returns the position, or None if no canvas has that id
+        """
+        if self._positions is None:
+            self._positions = {}
+            for pos, item_id in enumerate(self._ids):
+                self._positions.setdefault(item_id, pos)
+        return self._positions.get(an_id)
+
+    def added(self, start, new_items):
+        pass
+
+    def removed(self, pos, item):
+        pass
+
+    def rebuild(self):
+        self._positions = None
+
+
 class Record:
     """
     A generic record class for IIIF Presentation records. This should not be called
-    in any client code. Instead classes thatinherit record like Collection, 
+    in any client code. Instead classes thatinherit record like Collection,
     Manifest and Sequence and Canvas should be called
 
     :rtype :class:`Record`
@@ -25,18 +434,68 @@ class Record:
 
     def __init__(self, *args, **kwargs):
         """initializes an instance of the class Record
-        
+
         Since this is a generic record class this method does not do anything
         """
-        pass 
+        pass
+
+    def __setattr__(self, name, value):
+        """sets an attribute, marking the instance and every record containing it as changed
+
+        Records cache their dictionary and JSON forms (see :meth:`to_dict` and :meth:`to_json`), so
+        setting any property throws away the caches of this instance and of the records it has been
+        serialized as part of.
+        """
+        object.__setattr__(self, name, value)
+        if name not in INTERNAL_ATTRIBUTES:
+            self._mark_dirty()
+
+    def _mark_dirty(self):
+        """a method to throw away the cached dictionary and JSON forms of the instance and of its
+        ancestors
+
+        A record whose forms aren't cached can't be part of a cached parent, so this stops there.
+        """
+        state = self.__dict__
+        if state.get("_dict_cache") is None and state.get("_json_cache") is None and \
+                state.get("_hash_cache") is None:
+            return
+        state["_dict_cache"] = None
+        state["_json_cache"] = None
+        state["_hash_cache"] = None
+        for parent in list(state.get("_parents") or ()):
+            parent = parent()
+            if parent is not None:
+                parent._mark_dirty()
+        for clone in state.pop("_clones", None) or ():
+            clone = clone()
+            if clone is not None:
+                clone._mark_dirty()
+
+    def _child_records(self):
+        """a method to list the records that are property values of the instance
+
+        :rtype list
+        """
+        out = []
+        for n_property, value in vars(self).items():
+            if n_property in INTERNAL_ATTRIBUTES:
+                continue
+            if isinstance(value, Record):
+                out.append(value)
+            elif isinstance(value, list):
+                out.extend(x for x in value if isinstance(x, Record))
+        return out
 
     def __repr__(self):
-        """a method to return a representation string of the object identifying it for debugging purposes
+        """a method to return a representation string of the object identifying it for debugging
+        purposes
 
-        An instance name is defined as the class name and (if available) the identifying URL for that instance 
+        An instance name is defined as the class name and (if available) the identifying URL for
+        that instance
 
         :rtype str
-        :returns a string representing the name of the instance class 
+        :returns a string representing the name of the instance class
         """
         out = self.__name__
         if getattr(self, 'id', None):
@@ -44,63 +503,207 @@ class Record:
         return out
 
     def __str__(self):
-        """returns the object and all its property values as a dictionary that has been converted to a string
+        """returns the object and all its property values as a dictionary that has been converted to
+        a string
 
         :rtype str
-        :returns a dictionary converted to a string with all properties names of the instance converted to IIIF keys
+        :returns a dictionary converted to a string with all properties names of the instance
+         converted to IIIF keys
         """
-        return json.dumps(self.to_dict())
+        return self.to_json()
 
     def _iterate_some_list(self, attribute_name):
-        """a method to return a list of objects in an instance's property
+        """a method to return a read-only view of the list in an instance's property
 
-        TODO: convert this to return just a list of string identifiers. Is this valuable extra abstraction?
-
-        It first checks if the property being requested exists on the instance and if it does not raises a useful explanation in ValueError exception.
-        If the property does exist, creates an empty list and iterates through the property adding the items to the new list.
+        It first checks if the property being requested exists on the instance and if it does not
+        raises a useful explanation in ValueError exception. If the property does exist, returns a
+        :class:`RecordListView` of it. Nothing is copied, so this takes the same time however long
+        the list is.
 
         :param str attribute_name: the name of the property that the programmer wants to retrieve
 
-        :rtype list
-        :returns a list of objects
+        :rtype :class:`RecordListView`
+        :returns a read-only view of the list of objects
         """
         if hasattr(self, attribute_name):
-            out = []
-            for n_thing in getattr(self, attribute_name):
-                out.append(n_thing)
-            return out
+            pending = self.__dict__.get("_shared")
+            return RecordListView(getattr(self, attribute_name),
+                                  self if pending and attribute_name in pending else None)
         else:
             raise ValueError("this instance does not have the attribute {}".format(attribute_name))
 
+    def _check_list_items(self, x, list_item_class, start=0):
+        """a method to check that every item in x is an instance of the required class(es)
+
+        Raises ValueError exceptions if any item is not.
+
+        :param list x: the items to check
+        :param str list_item_class: a class, or a list of classes any of which an item may be an
+         instance of
+        :param int start: the position in the list property the first item of x is going to be at,
+         for error messages
+        """
+        for tally, n_col in enumerate(x, start):
+            if isinstance(list_item_class, list):
+                if not any([isinstance(n_col, i) for i in list_item_class]):
+                    raise ValueError("item {} in inputted list is not a valid type for "
+                                     "that list.".format(str(tally)))
+            else:
+                if not isinstance(n_col, list_item_class):
+                    raise ValueError("item {} in inputted list is not an instance of {}".format(
+                        str(tally), list_item_class))
+
     def _set_a_list_property(self, x, property_name, list_item_class):
         """a method to attempt to set a list value on a particular instance property
 
-        Attempts to set the value of x onto the property defined with property_name. But, first
-        it validates whether the value of x is a list and it validates whether all items in x are
-        instances of the required class(es) for the property property_name. 
+        Attempts to set the value of x onto the property defined with property_name. But, first it
+        validates whether the value of x is a list and it validates whether all items in x are
+        instances of the required class(es) for the property property_name. The instance keeps its
+        own copy of the list, so changing x afterwards doesn't change the instance.
 
         Raises ValueError exceptions if any validation checks fail.
 
         :param str x: the list to set to the property
         :param str property_name: the name of the property to define
-        :param str list_item_class: in situations where the items in a list can be more than one 
-         class instances a list and in the eventuality that contained items can only be one class 
+        :param str list_item_class: in situations where the items in a list can be more than one
+         class instances a list and in the eventuality that contained items can only be one class
          instance a single class name
         """
+        if isinstance(x, CanvasSpool) and list_item_class is Canvas:
+            # Spools stay on disk rather than being copied into a list
+            setattr(self, property_name, x)
+            self.__dict__.get("_id_index", {}).pop(property_name, None)
+            return
+        if isinstance(x, RecordListView):
+            x = x._items
         assert isinstance(x, list)
-        for tally, n_col in enumerate(x):
-            if isinstance(list_item_class, list):
-                if not any([isinstance(n_col, i) for i in list_item_class]):
-                    raise ValueError("item {} in inputted list is not a valid type for that list.".format(str(tally)))
-            else:
-                if not isinstance(n_col, list_item_class):
-                    raise ValueError("item {} in inputted list is not an instance of {}".format(str(tally), list_item_class))
-        setattr(self, property_name, x)
+        self._check_list_items(x, list_item_class)
+        setattr(self, property_name, list(x))
+        self.__dict__.get("_id_index", {}).pop(property_name, None)
+
+    def _add_to_a_list_property(self, x, property_name, list_item_class, index=None):
+        """a method to add items to a list property, validating only the items being added
+
+        Appending one item takes the same time however long the list already is, so building up a
+        list an item at a time is linear rather than quadratic. Inserting one elsewhere moves the
+        items after it.
+
+        Raises ValueError exceptions if any of the new items is not an instance of the required
+        class(es).
+
+        :param list x: the items to add
+        :param str property_name: the name of the property to add to
+        :param str list_item_class: see :meth:`_set_a_list_property`
+        :param int index: the position to insert the items at, or None to append them
+        """
+        x = list(x)
+        current = getattr(self, property_name, None)
+        if current is None:
+            current = []
+        if index is not None:
+            # Work out where negative or out of range positions actually insert
+            index = min(max(0, index + len(current) if index < 0 else index), len(current))
+        start = len(current) if index is None else index
+        if isinstance(current, CanvasSpool):
+            # A spool takes canvases' dictionaries as well, so they needn't be made into records
+            list_item_class = [list_item_class, dict]
+        self._check_list_items(x, list_item_class, start)
+        if index is None:
+            index = len(current)
+        current[index:index] = x
+        setattr(self, property_name, current)
+        id_index = self._existing_id_index(property_name)
+        if id_index is not None:
+            id_index.added(index, x)
+
+    def _existing_id_index(self, property_name):
+        """a method to return the :class:`_IdIndex` of a list property if there is one and it is for
+        the current list
+        """
+        items = getattr(self, property_name, None)
+        if isinstance(items, CanvasSpool):
+            return items
+        index = self.__dict__.get("_id_index", {}).get(property_name)
+        if index is not None and index.items is items:
+            return index
+        return None
+
+    def _id_index_for(self, property_name):
+        """a method to return the :class:`_IdIndex` of a list property, making it if necessary
+
+        :param str property_name: the name of the list property
+        """
+        index = self._existing_id_index(property_name)
+        if index is None:
+            items = getattr(self, property_name, None)
+            if items is None:
+                items = []
+            index = self.__dict__.setdefault("_id_index", {})[property_name] = _IdIndex(items)
+        return index
+
+    def _position_in_a_list_property(self, an_id, property_name):
+        """a method to find the position of the item with a particular id in a list property
+
+        Lookups go through an index of the list by id rather than searching it, so take at worst
+        time in proportion to the square root of the length of the list - see :class:`_IdIndex`.
+
+        :param str an_id: the id of the item
+        :param str property_name: the name of the list property
+        :rtype int
+        :returns the position of the item, or None if there isn't one with that id
+        """
+        index = self._id_index_for(property_name)
+        pos = index.position(an_id)
+        if isinstance(index, CanvasSpool):
+            return pos
+        if pos is not None and (pos >= len(index.items) or
+                                getattr(index.items[pos], "_id", None) != an_id):
+            # The list was changed behind the index's back
+            index.rebuild()
+            pos = index.position(an_id)
+        return pos
+
+    def _find_in_a_list_property(self, an_id, property_name):
+        """a method to find the item with a particular id in a list property
+
+        :param str an_id: the id of the item
+        :param str property_name: the name of the list property
+        :returns the item, or None if there isn't one with that id
+        """
+        pos = self._position_in_a_list_property(an_id, property_name)
+        if pos is not None:
+            return self._own_item(getattr(self, property_name), pos)
+
+    def _remove_from_a_list_property(self, x, property_name):
+        """a method to remove an item from a list property
+
+        :param x: the item to remove, or its id
+        :param str property_name: the name of the list property
+        :returns the item removed, or None if it wasn't in the list
+        """
+        an_id = x if isinstance(x, str) else getattr(x, "_id", None)
+        pos = self._position_in_a_list_property(an_id, property_name)
+        items = getattr(self, property_name, None)
+        if isinstance(items, CanvasSpool):
+            # Canvases got from a spool are copies, so go by the id alone
+            x = an_id
+        if pos is not None and not isinstance(x, str) and items[pos] is not x:
+            pos = None
+        if pos is None and not isinstance(x, str) and items and x in items:
+            # x isn't the item indexed under its id, e.g. it shares its id with another
+            pos = items.index(x)
+        if pos is None:
+            return None
+        removed = items.pop(pos)
+        self._id_index_for(property_name).removed(pos, removed)
+        self._mark_dirty()
+        return removed
 
     def _get_simple_property(self, property_name):
         """a method to set a simple property value on an instance
         """
         if hasattr(self, property_name):
+            self._own(property_name)
             return getattr(self, property_name)
 
     def _set_simple_property(self, x, property_name):
@@ -115,18 +718,20 @@ class Record:
             setattr(self, property_name, x)
 
     def _set_numeric_property(self, x, property_name):
-        """sets a numeric property value on an instance 
+        """sets a numeric property value on an instance
+
+        Checks if the value of x is indeed an integer. If x is not an integer, raises a
+        ValueError exception
 
-        Checks if the value of x is indeed an integer. If x is not an integer, raises a ValueError exception
-        
         :param str x: the value to set
         :param str property_name: the name of the property to set the value on
         """
         if isinstance(x, int):
             setattr(self, property_name, x)
         else:
-            raise ValueError("{} is being set on {} which has to have a numeric value but it is {}".format(x, property_name, type(x).__name__))
-        
+            raise ValueError("{} is being set on {} which has to have a numeric value "
+                             "but it is {}".format(x, property_name, type(x).__name__))
+
     def _delete_a_property(self, property_name):
         if hasattr(self, "property_name"):
             self._manifests = None
@@ -136,9 +741,9 @@ class Record:
     def _check_if_url_valid(self, url):
         """a method to check if an input url is well-formed or not
 
-        Validates a URL string for properly formatted url according to RFC 1738. 
+        Validates a URL string for properly formatted url according to RFC 1738.
 
-        taken from https://stackoverflow.com/questions/7160737/python-how-to-validate-a-url-in-python-malformed-or-not/7160778
+        taken from https://stackoverflow.com/a/7160778
 
         :param str url: a string representing a live web resource.
 
@@ -148,42 +753,94 @@ class Record:
         try:
             result = urlparse(url)
             return result.scheme and result.netloc and result.path
-        except:
+        except Exception:
             return False
 
     def _check_if_url_is_alive(self, url):
         """a method to check if url is alive
 
-        Validates if a url is to a resolvable web resource. HTTP 404 counts as resolvable web resource.
+        Validates if a url is to a resolvable web resource. HTTP 404 counts as resolvable web
+        resource.
 
         taken from  https://stackoverflow.com/questions/16778435/python-check-if-website-exists
 
+        The request goes through the default transport, so it may be retried; each attempt waits
+        at most URL_CHECK_TIMEOUT seconds. A url whose host's circuit breaker is open isn't
+        requested, and counts as not resolvable.
+
         :param str url: a string representing a live web resource
 
         :rtype bool
         :return a boolean that asseses whether or not the url given is resolvable
         """
-        response = requests.get(url, "HEAD")
         if not self._check_if_url_valid(url):
             return False
+        try:
+            response = get_default_transport().get(url, timeout=URL_CHECK_TIMEOUT)
+        except CircuitOpenError:
+            return False
         if (response.status_code == 404) or (response.status_code < 400):
             return True
         else:
             return False
 
     def set_metadata(self, a_list):
+        """a method to set the value of the metadata property
+
+        The instance keeps its own copy of the list, and fields which belong to another record are
+        copied, so changing a field of the instance marks only the instance as changed.
+
+        :param list a_list: a list of objects all of type MetadataField
+        """
+        if isinstance(a_list, RecordListView):
+            a_list = a_list._items
         for n_item in a_list:
             if not isinstance(n_item, MetadataField):
                 raise ValueError("metadata property can ony contain instances of MetadataField")
-        self._metadata = a_list
+        self._metadata = list(a_list)
+        self._adopt_metadata()
 
     def get_metadata(self):
-        return self._metadata
+        """a method to return the value of the metadata property
+
+        :rtype :class:`RecordListView`
+        :returns a read-only view of the MetadataField instances, or None if there are none. Use
+         :meth:`add_metadata` to add one.
+        """
+        fields = getattr(self, "_metadata", None)
+        return RecordListView(fields) if isinstance(fields, list) else fields
 
     def del_metadata(self):
         if hasattr(self, "_metadata"):
             self._metadata = None
 
+    def add_metadata(self, x):
+        """a method to append a field to the metadata property
+
+        :param MetadataField x: the field to add
+        """
+        if not isinstance(x, MetadataField):
+            raise ValueError("metadata property can ony contain instances of MetadataField")
+        fields = getattr(self, "_metadata", None)
+        self._metadata = (list(fields) if isinstance(fields, list) else []) + [x]
+        self._adopt_metadata()
+
+    def _adopt_metadata(self):
+        """a method to make the instance the owner of its metadata fields, so changing one of them
+        marks it as changed
+
+        Fields owned by another record are replaced with copies.
+        """
+        fields = self.__dict__.get("_metadata")
+        if not isinstance(fields, list):
+            return
+        for pos, field in enumerate(fields):
+            owner = field.__dict__.get("_owner")
+            owner = owner() if owner is not None else None
+            if owner is not None and owner is not self:
+                field = fields[pos] = copy(field)
+            field.__dict__["_owner"] = ref(self)
+
     def get_type(self):
         """returns the type property value for an instance
         """
@@ -192,8 +849,8 @@ class Record:
     def set_type(self, x):
         """sets the type property value of an instance
 
-        Checks if the value of x is in the list of valid IIIF types as defined in constants.valid_types.
-        If it is not in that list will raise a ValueError exception.
+        Checks if the value of x is in the list of valid IIIF types as defined in
+        constants.valid_types. If it is not in that list will raise a ValueError exception.
 
         :param str x: the value to set
         """
@@ -215,7 +872,7 @@ class Record:
     def set_id(self, x):
         """sets the value of the id property of an instance
 
-        Checks if the value of x is valid and it is alive. 
+        Checks if the value of x is valid and it is alive.
         If it is neither one or the other will raise a ValueError exception
 
         :param str x: a string representing a valid URL. 404 counts as valid
@@ -239,10 +896,10 @@ class Record:
     def set_context(self, x):
         """defines the value of the context property of an instance
 
-        Context is a very specific IIIF protocol. The value is one of two IIIF urls.
-        So, ths method checks if the value of x is a valid key in the dictionary constants.valid_contexts
-        If it is not it raises a ValueError exception; if it is it sets the value of context to the value of the 
-        selected key in constants.valid_contexts
+        Context is a very specific IIIF protocol. The value is one of two IIIF urls. So, ths method
+        checks if the value of x is a valid key in the dictionary constants.valid_contexts If it is
+        not it raises a ValueError exception; if it is it sets the value of context to the value of
+        the selected key in constants.valid_contexts
 
         :param str x: a string that is either 'image' or 'presentation'
         """
@@ -251,7 +908,7 @@ class Record:
             if context:
                 self._context = context
             else:
-                raise ValueError("{} is not a valid context option for IIIF. It must be one of {}".\
+                raise ValueError("{} is not a valid context option for IIIF. It must be one of {}".
                                  format(x, ', '.join(valid_contexts.keys())))
         else:
             raise ValueError("there is already a context set on this instance")
@@ -344,7 +1001,7 @@ class Record:
     def set_description(self, x):
         """sets the value of the description property
 
-        This is the value of the description of a IIIF record and should adequately describe what 
+        This is the value of the description of a IIIF record and should adequately describe what
         the intellectual object is, why it is signficant to a scholar.
 
         :rtype str x: a very long string potentially
@@ -367,8 +1024,8 @@ class Record:
         """validate this record
 
         :rtype: tuple
-        :returns a two part tuple: the first part is the Boolean value expressing whether or not the record is valid IIIF
-        and the second part is the errors discovered in the IIIF record.
+        :returns a two part tuple: the first part is the Boolean value expressing whether or not the
+         record is valid IIIF and the second part is the errors discovered in the IIIF record.
         """
         errors = []
 
@@ -380,9 +1037,12 @@ class Record:
             errors.append("A IIIF record must have a valid type attribute")
         else:
             pass
-        if (getattr(self, "viewingDirection", None)) and (getattr(self, "viewingDirection", None) not in valid_viewingDirections):
-            errors.append("If viewingDirection is present on a IIIF record it must be valid direction")
-        if (getattr(self, "viewingHint", None)) and (getattr(self, "viewingHint", None) not in valid_viewingHints):
+        if (getattr(self, "viewingDirection", None)) and \
+                (getattr(self, "viewingDirection", None) not in valid_viewingDirections):
+            errors.append(
+                "If viewingDirection is present on a IIIF record it must be valid direction")
+        if (getattr(self, "viewingHint", None)) and \
+                (getattr(self, "viewingHint", None) not in valid_viewingHints):
             errors.append("If viewingHint is present on a IIIF record it must be valid hint")
         if errors:
             return (False, errors)
@@ -390,6 +1050,267 @@ class Record:
             return (True, errors)
 
     def to_dict(self):
+        """converts an instance to a dictionary
+
+        The dictionary is cached until a property of the instance or of one of the records in it is
+        set, so converting an unchanged record again is free, and after a change only the changed
+        records are converted again - unchanged ones are spliced in from their caches. That means
+        the dictionary is shared with the cache: copy it (e.g. with copy.deepcopy) before changing
+        it.
+
+        :rtype dict
+        :returns A dictionary data structure with key names conforming to IIIF specification
+         containing all defined properties
+        """
+        cached = self.__dict__.get("_dict_cache")
+        if cached is None:
+            self.__dict__.pop("_pristine", None)
+            cached = self._to_dict()
+            # Properties the class doesn't model, kept from the JSON the instance was loaded from
+            for key, value in (self.__dict__.get("_extra") or {}).items():
+                cached.setdefault(key, value)
+            for child in self._child_records():
+                # Weak references, so a child doesn't keep records it has been removed from alive
+                parents = child.__dict__.get("_parents")
+                if parents is None:
+                    child.__dict__["_parents"] = [ref(self)]
+                elif not any(parent() is self for parent in parents):
+                    parents.append(ref(self))
+            self.__dict__["_dict_cache"] = cached
+        return cached
+
+    def to_json(self):
+        """converts an instance to a JSON string
+
+        Like :meth:`to_dict`, the string is cached until the instance changes, and the cached JSON
+        of unchanged child records is spliced in rather than encoded again.
+
+        :rtype str
+        """
+        cached = self.__dict__.get("_json_cache")
+        if cached is None and self.__dict__.get("_pristine"):
+            # Still the dictionary it was loaded from, which has no child JSON worth splicing in
+            cached = json.dumps(self.to_dict())
+            self.__dict__["_json_cache"] = cached
+        elif cached is None:
+            out = self.to_dict()
+            children = {id(child.to_dict()): child for child in self._child_records()}
+            cached = _encode(out, children)
+            self.__dict__["_json_cache"] = cached
+        return cached
+
+    def write_json(self, f):
+        """writes the instance to a file as JSON, streaming the canvases of any :class:`CanvasSpool`
+        in it
+
+        Writes the same JSON as :meth:`to_json`, but the JSON of spooled canvases is copied from
+        their spool's file as it is written, so they are never built or held in memory - only the
+        rest of the record is.
+
+        :param f: a file open for writing bytes
+        """
+        spooled = []
+        stack = [self]
+        while stack:
+            rec = stack.pop()
+            spooled.extend((rec, name, value) for name, value in vars(rec).items()
+                           if isinstance(value, CanvasSpool))
+            if not isinstance(rec, Canvas):
+                stack.extend(rec._child_records())
+        if not spooled:
+            f.write(self.to_json().encode("utf-8"))
+            return
+        # Encode the rest with a marker in place of each spool's canvases, then write the canvases
+        # in its place
+        markers = {}
+        for rec, name, spool in spooled:
+            marker = _SpoolMarker("pyiiif-spool-" + uuid.uuid4().hex)
+            markers[json.dumps(marker.to_dict())] = spool
+            rec._mark_dirty()
+            rec.__dict__[name] = [marker]
+        try:
+            text = self.to_json()
+        finally:
+            for rec, name, spool in spooled:
+                rec.__dict__[name] = spool
+                rec._mark_dirty()
+        pos = 0
+        for start, encoded in sorted((text.index(encoded), encoded) for encoded in markers):
+            f.write(text[pos:start].encode("utf-8"))
+            for n, raw in enumerate(markers[encoded].iter_raw()):
+                if n:
+                    f.write(b", ")
+                f.write(raw)
+            pos = start + len(encoded)
+        f.write(text[pos:].encode("utf-8"))
+
+    def clone(self):
+        """a method to copy an instance, sharing the records in it with the copy until either
+        changes them
+
+        Only the instance itself is copied: the copy gets its own lists, but the records in them,
+        and in its other properties, are shared with the instance. A shared record is copied in the
+        same way the first time it is got from the instance or the copy through one of their
+        properties (or get_ methods), and the one doing the getting keeps the copy. So making many
+        manifests from a template, each with its own canvases, doesn't copy the template's canvases,
+        services and so on at all, and changing one canvas of a clone copies only that canvas and
+        the records on the way to it.
+
+        Records got from the instance before it was cloned are still shared: get them again to
+        change them in only one of the two.
+
+        :rtype :class:`Record`
+        """
+        state = dict(self.__dict__)
+        for name in ("_parents", "_id_index", "_shared", "_owners", "_clones"):
+            state.pop(name, None)
+        shared = set()
+        for name, value in state.items():
+            if name in INTERNAL_ATTRIBUTES:
+                continue
+            if name == "_metadata" and isinstance(value, list):
+                state[name] = [copy(x) for x in value]
+                for field in state[name]:
+                    field.__dict__.pop("_owner", None)
+            elif isinstance(value, CanvasSpool):
+                raise ValueError(
+                    "{} keeps its canvases in a CanvasSpool, which can't be shared".format(self))
+            elif isinstance(value, list):
+                state[name] = list(value)
+                for item in value:
+                    if isinstance(item, Record):
+                        item.__dict__["_owners"] = item.__dict__.get("_owners", 1) + 1
+                        shared.add(name)
+            elif isinstance(value, Record):
+                value.__dict__["_owners"] = value.__dict__.get("_owners", 1) + 1
+                shared.add(name)
+        if "_extra" in state:
+            state["_extra"] = dict(state["_extra"])
+        new = self.__class__.__new__(self.__class__)
+        new.__dict__.update(state)
+        new._adopt_metadata()
+        if shared:
+            new.__dict__["_shared"] = shared
+            self.__dict__.setdefault("_shared", set()).update(shared)
+        if state.get("_dict_cache") is not None:
+            # The copy's caches are the instance's, and the records they were made from only know
+            # the instance as their parent, so the copy's are thrown away whenever the instance's
+            # are
+            self.__dict__.setdefault("_clones", []).append(ref(new))
+        return new
+
+    def _own(self, attribute_name):
+        """a method to replace a record in a property with a copy, if it's shared with a clone
+
+        Only the first call for each property of a clone or cloned instance does anything. The
+        records in list properties are copied one at a time as they are got, by :meth:`_own_item`.
+        """
+        pending = self.__dict__.get("_shared")
+        if not pending or attribute_name not in pending:
+            return
+        value = self.__dict__.get(attribute_name)
+        if isinstance(value, list):
+            return
+        pending.discard(attribute_name)
+        if isinstance(value, Record) and value.__dict__.get("_owners", 1) > 1:
+            self.__dict__[attribute_name] = value._copy_for(self)
+
+    def _own_item(self, items, index):
+        """a method to get an item of one of the instance's list properties, copying it first if
+        it's shared with a clone
+        """
+        item = items[index]
+        if isinstance(item, Record) and item.__dict__.get("_owners", 1) > 1:
+            item = items[index] = item._copy_for(self)
+        return item
+
+    def _copy_for(self, parent):
+        """a method to make a copy of a shared instance for one of the records sharing it
+
+        :rtype :class:`Record`
+        """
+        new = self.clone()
+        self.__dict__["_owners"] -= 1
+        if self.__dict__.get("_dict_cache") is not None:
+            new.__dict__["_parents"] = [ref(parent)]
+        return new
+
+    def update_properties(self, values, removed=()):
+        """a method to set and remove properties given by their IIIF keys, with values as decoded
+        from JSON
+
+        Values are taken the way :func:`load_preserving` takes them: nothing is validated, records
+        are made from dictionaries of the right @type, and properties the class doesn't model are
+        kept as they are.
+
+        :param dict values: maps the IIIF key of each property to set to its value,
+         e.g. {"label": "p. 1"}
+        :param list removed: the IIIF keys of the properties to remove
+        """
+        children = []
+        for key in removed:
+            _unload_property(self, key)
+        for key, value in values.items():
+            _unload_property(self, key)
+            children.extend(_load_property(self, key, value))
+        for child in children:
+            child.__dict__["_parents"] = [ref(self)]
+        self._mark_dirty()
+
+    def canonical_json(self):
+        """converts an instance to canonical JSON
+
+        Unlike :meth:`to_json`, two records with the same properties always give the same string,
+        however they were built. See :func:`canonical_json`.
+
+        :rtype str
+        """
+        return canonical_json(self.to_dict())
+
+    def content_hash(self):
+        """returns a hash of the content of the instance
+
+        The hash is the SHA-256 digest of the canonical JSON of the instance's dictionary with each
+        record in it replaced by a reference to that record's own hash, so it changes whenever
+        anything in the instance does. Hashes are cached along with the dictionary: after a change
+        only the records on the path to it are hashed again, and the rest are reused.
+
+        :rtype str
+        :returns a 64 character hex string
+        """
+        cached = self.__dict__.get("_hash_cache")
+        if cached is None:
+            with gc_paused():
+                cached = self._content_hash()
+        return cached
+
+    def _content_hash(self):
+        """works out :meth:`content_hash`, with the garbage collector already paused
+        """
+        cached = self.__dict__.get("_hash_cache")
+        if cached is None:
+            out = self.to_dict()
+            children = {id(child.to_dict()): child for child in self._child_records()}
+            cached = _digest(_hashable(out, children))
+            self.__dict__["_hash_cache"] = cached
+        return cached
+
+    def etag(self):
+        """returns a strong HTTP entity tag for the instance
+
+        Serve it in the ETag header, and answer a request whose If-None-Match header holds the same
+        value with 304 Not Modified.
+
+        :rtype str
+        :returns the :meth:`content_hash`, quoted
+        """
+        return '"{}"'.format(self.content_hash())
+
+    def _to_dict(self):
+        """converts an instance to a dictionary, without caching it
+
+        Subclasses with their own layout override this rather than :meth:`to_dict`.
+        """
         out = {}
         out["@id"] = self.id
         out["@type"] = self.type
@@ -397,7 +1318,7 @@ class Record:
             out["@context"] = self.context
         properties = vars(self)
         for n_property in properties:
-            if n_property in ["_id", "_type", "_context"]:
+            if n_property in ["_id", "_type", "_context"] or n_property in INTERNAL_ATTRIBUTES:
                 pass
             else:
                 value = getattr(self, n_property, None)
@@ -406,6 +1327,8 @@ class Record:
                         out[n_property] = [x.to_dict() for x in getattr(self, n_property, None)]
                     else:
                         out[n_property[1:]] = [x.to_dict() for x in getattr(self, n_property, None)]
+                elif isinstance(value, CanvasSpool):
+                    out[n_property[1:]] = [json.loads(raw) for raw in value.iter_raw()]
                 if isinstance(value, str) or isinstance(value, int):
                     out[n_property[1:]] = getattr(self, n_property, None)
         return out
@@ -417,6 +1340,19 @@ class Record:
     viewingDirection = property(get_viewingDirection, set_viewingDirection, del_viewingDirection)
     label = property(get_label, set_label, del_label)
     description = property(get_description, set_description, del_description)
+    metadata = property(get_metadata, set_metadata, del_metadata)
+
+
+class _SpoolMarker(Record):
+    """a stand-in for the canvases of a :class:`CanvasSpool` while the record around them is encoded
+    by :meth:`Record.write_json`
+    """
+    def __init__(self, token):
+        self.__dict__["token"] = token
+
+    def _to_dict(self):
+        return {"@id": self.token}
+
 
 class ServerProfile(object):
     """a class for building IIIF Collection ServerProfile information on an Service instance
@@ -428,9 +1364,10 @@ class ServerProfile(object):
     def __init__(self):
         """initializes an instance of the class
 
-        Right now it is hard-coded to set supports, qualities and formats with generic IIIF 2.0 compliant values
+        Right now it is hard-coded to set supports, qualities and formats with generic IIIF 2.0
+        compliant values
 
-        TODO: allow dynamic loading of this information 
+        TODO: allow dynamic loading of this information
 
         :rtype :class:`ServerProfile`
         """
@@ -440,18 +1377,18 @@ class ServerProfile(object):
                          "rotationAboveArbitrary",
                          "regionSquare",
                          "sizeAboveFull"
-                        ]
+                         ]
         self.qualities = ["default", "gray", "bitonal"]
         self.format = ["jpg", "png", "gif", "webp"]
 
     def to_dict(self):
-        """a method to transform the instance into a dictionary 
+        """a method to transform the instance into a dictionary
         """
         out = {}
         out["supports"] = self.supports
         out["qualities"] = self.qualities
-        out["format"] = self.format       
-        return out        
+        out["format"] = self.format
+        return out
 
 
 class Service(Record):
@@ -475,8 +1412,8 @@ class Service(Record):
         self.context = "image"
         self.profile = ServerProfile()
 
-    def to_dict(self):
-        """a method to transform the instance into a dictionary 
+    def _to_dict(self):
+        """a method to transform the instance into a dictionary
         """
         out = {}
         out["@id"] = self.id
@@ -485,8 +1422,9 @@ class Service(Record):
                           self.profile.to_dict()]
         return out
 
+
 class ImageResource(Record):
-    """a class to represent a IIIF Presentation ImageResource 
+    """a class to represent a IIIF Presentation ImageResource
 
     Use this in your annotations that require it and swap them in and out of
     annotations as you see fit.
@@ -496,29 +1434,30 @@ class ImageResource(Record):
     def __init__(self, scheme, server_host, prefix, identifier, mimetype):
         """instantiate a new instance
 
-        :param str scheme: the protocol over which the web request should go: 
+        :param str scheme: the protocol over which the web request should go:
          usually either http or https
-        :param str server_host: the host on which your iiif image server runs. 
+        :param str server_host: the host on which your iiif image server runs.
          Frequently called the domain name
-        :param str prefix: an extra path variable, typicaly an alias on your url 
+        :param str prefix: an extra path variable, typicaly an alias on your url
          that your host needs to be able to forward the request to your image api service
-        :param str identifier: the id of the image that you are requesting. 
+        :param str identifier: the id of the image that you are requesting.
          Ex. 'apf/2/apf2-00001.tif' or 'super-secret-identified-image'
-        :param str mimetype: the mimetype of the image you are serving 
+        :param str mimetype: the mimetype of the image you are serving
 
         :rtype :class:`ImageResource`
         """
         url = ImageApiUrl(scheme, server_host, prefix, identifier)
-        #url = ParseResult(scheme="https", netloc=server_host,
-        #                  path=join("/", escape_identifier(identifier)), params="", query="", fragment="")
+        # url = ParseResult(scheme="https", netloc=server_host,
+        #                   path=join("/", escape_identifier(identifier)), params="",
+        #                   query="", fragment="")
         try:
-            r = requests.get(url.to_info_url(), "HEAD")
+            r = get_default_transport().get(url.to_info_url(), timeout=URL_CHECK_TIMEOUT)
             data = r.json()
             data["@context"]
             data["@id"]
-        except:
+        except Exception:
             raise ValueError("{} is not a IIIF Image API url".format(url.to_info_url()))
-        self.id = url.to_image_url() 
+        self.id = url.to_image_url()
         self.type = "dctypes:Image"
         self.format = mimetype
         self.service = Service(url.to_base_url())
@@ -536,9 +1475,9 @@ class ImageResource(Record):
     def set_format(self, x):
         """sets the format property of the instance
 
-        See http://www.ietf.org/rfc/rfc2045.txt and http://www.ietf.org/rfc/rfc2046.txt 
+        See http://www.ietf.org/rfc/rfc2045.txt and http://www.ietf.org/rfc/rfc2046.txt
         for more information about mimetypes
-       
+
         TODO: write proper mimetype validation if this is not too hairy of a problem to solve!
 
         :param str x: the mimetype of source image conforming to RFC 2045 and RFC 2046
@@ -563,9 +1502,9 @@ class ImageResource(Record):
     def set_height(self, x):
         """sets the height property of the instance
 
-        See http://www.ietf.org/rfc/rfc2045.txt and http://www.ietf.org/rfc/rfc2046.txt 
+        See http://www.ietf.org/rfc/rfc2045.txt and http://www.ietf.org/rfc/rfc2046.txt
         for more inheightion about mimetypes
-       
+
         TODO: write proper mimetype validation if this is not too hairy of a problem to solve!
 
         :param str x: the mimetype of source image conforming to RFC 2045 and RFC 2046
@@ -582,6 +1521,7 @@ class ImageResource(Record):
 
         """
         if getattr(self, "_service", None):
+            self._own("_service")
             return self._service
 
     def set_service(self, x):
@@ -607,9 +1547,9 @@ class ImageResource(Record):
     def set_width(self, x):
         """sets the width property of the instance
 
-        See http://www.ietf.org/rfc/rfc2045.txt and http://www.ietf.org/rfc/rfc2046.txt 
+        See http://www.ietf.org/rfc/rfc2045.txt and http://www.ietf.org/rfc/rfc2046.txt
         for more inwidthion about mimetypes
-       
+
         TODO: write proper mimetype validation if this is not too hairy of a problem to solve!
 
         :param str x: the mimetype of source image conforming to RFC 2045 and RFC 2046
@@ -621,37 +1561,47 @@ class ImageResource(Record):
         """
         self._delete_a_property("_width")
 
-    def to_dict(self):
+    def _to_dict(self):
         """converts an instance to a dictionary
 
         :rtype dict
-        :returns A dictionary data structure with key names conforming to IIIF specification 
+        :returns A dictionary data structure with key names conforming to IIIF specification
          containing all defined properties
         """
         out = {}
         out["@id"] = self.id
         out["@type"] = self.type
         out["format"] = self.format
-        out["height"] = self._height
-        out["service"] =  self.service.to_dict()
-        out["width"] =  self._width
+        if getattr(self, "_height", None) is not None:
+            out["height"] = self._height
+        if self.service is not None:
+            out["service"] = self.service.to_dict()
+        if getattr(self, "_width", None) is not None:
+            out["width"] = self._width
         return out
 
     @classmethod
-    def load(cls, json_data):
+    def load(cls, json_data, preserve=False):
         """a method to  instantiate an instance from a JSON string
 
-        :param string json_data: a string of valid JSON data containing information about a IIIF Resource
+        :param string json_data: a string of valid JSON data containing information about a IIIF
+         Resource
+
+        :param bool preserve: keep the JSON of everything the class doesn't model and of unchanged
+         records as it is - see :func:`load_preserving`
 
         :rtype :class:`ImageResource`
         """
+        if preserve:
+            return load_preserving(cls, json_data)
         try:
             data = json.loads(json_data)
         except json.decoder.JSONDecodeError:
             raise ValueError("invalid JSON was passed to ImageResource.load()")
         identifier = data.get("@id")
         image_url = ImageApiUrl.from_image_url(identifier)
-        i = cls(image_url.scheme, image_url.server, image_url.prefix, image_url.identifier, data.get("format"))
+        i = cls(image_url.scheme, image_url.server, image_url.prefix, image_url.identifier,
+                data.get("format"))
         i.format = data.get("format")
         i.type = data.get("@type")
         i.service = data.get("service")
@@ -660,6 +1610,7 @@ class ImageResource(Record):
     service = property(get_service, set_service, del_service)
     format = property(get_format, set_format, del_format)
 
+
 class Collection(Record):
     """a class for building IIIF Collection records
     """
@@ -706,6 +1657,63 @@ class Collection(Record):
         if hasattr(self, "_collections"):
             self._collections = None
 
+    def add_collection(self, x):
+        """a method to append a collection to the collections property
+
+        Only x is validated, so this takes the same time however many collections there already are.
+
+        :param Collection x: the collection to add
+        """
+        self._add_to_a_list_property([x], "_collections", Collection)
+
+    def extend_collections(self, x):
+        """a method to append every item of x to the collections property
+
+        :param list x: Collection instances
+        """
+        self._add_to_a_list_property(x, "_collections", Collection)
+
+    def insert_collection(self, index, x):
+        """a method to insert a collection into the collections property before position index
+
+        :param int index: the position to insert x at
+        :param Collection x: the collection to insert
+        """
+        self._add_to_a_list_property([x], "_collections", Collection, index=index)
+
+    def get_collection(self, an_id):
+        """a method to find the collection with a particular id in the collections property
+
+        Lookups go through an index of collections by id rather than searching them, so take at
+        worst time in proportion to the square root of how many collections there are - see
+        :class:`_IdIndex`.
+
+        :param str an_id: the id of the collection
+        :rtype :class:`Collection`
+        :returns the collection, or None if there isn't one with that id
+        """
+        return self._find_in_a_list_property(an_id, "_collections")
+
+    def has_collection(self, an_id):
+        """a method to check whether there is a collection with a particular id in the collections
+        property
+
+        :param str an_id: the id of the collection
+        :rtype bool
+        """
+        return self._position_in_a_list_property(an_id, "_collections") is not None
+
+    def del_collection(self, x):
+        """a method to delete a collection from the collections property
+
+        takes a collection object or its id, checks if it exists in the collections property
+        and if it does deletes it from the list.
+
+        :param Collection x: the collection to delete, or its id
+        :returns the collection deleted, or None if there wasn't one
+        """
+        return self._remove_from_a_list_property(x, "_collections")
+
     def get_manifests(self):
         """gets the manifests that have been added to the instance
 
@@ -723,9 +1731,66 @@ class Collection(Record):
 
     def del_manifests(self):
         """sets the manifests property to None if it has been set already
-        """   
+        """
         self._delete_a_property("_manifests")
 
+    def add_manifest(self, x):
+        """a method to append a manifest to the manifests property
+
+        Only x is validated, so this takes the same time however many manifests there already are.
+
+        :param Manifest x: the manifest to add
+        """
+        self._add_to_a_list_property([x], "_manifests", Manifest)
+
+    def extend_manifests(self, x):
+        """a method to append every item of x to the manifests property
+
+        :param list x: Manifest instances
+        """
+        self._add_to_a_list_property(x, "_manifests", Manifest)
+
+    def insert_manifest(self, index, x):
+        """a method to insert a manifest into the manifests property before position index
+
+        :param int index: the position to insert x at
+        :param Manifest x: the manifest to insert
+        """
+        self._add_to_a_list_property([x], "_manifests", Manifest, index=index)
+
+    def get_manifest(self, an_id):
+        """a method to find the manifest with a particular id in the manifests property
+
+        Lookups go through an index of manifests by id rather than searching them, so take at worst
+        time in proportion to the square root of how many manifests there are - see
+        :class:`_IdIndex`.
+
+        :param str an_id: the id of the manifest
+        :rtype :class:`Manifest`
+        :returns the manifest, or None if there isn't one with that id
+        """
+        return self._find_in_a_list_property(an_id, "_manifests")
+
+    def has_manifest(self, an_id):
+        """a method to check whether there is a manifest with a particular id in the manifests
+        property
+
+        :param str an_id: the id of the manifest
+        :rtype bool
+        """
+        return self._position_in_a_list_property(an_id, "_manifests") is not None
+
+    def del_manifest(self, x):
+        """a method to delete a manifest from the manifests property
+
+        takes a manifest object or its id, checks if it exists in the manifests property
+        and if it does deletes it from the list.
+
+        :param Manifest x: the manifest to delete, or its id
+        :returns the manifest deleted, or None if there wasn't one
+        """
+        return self._remove_from_a_list_property(x, "_manifests")
+
     def get_members(self):
         return self._iterate_some_list('_members')
 
@@ -744,12 +1809,72 @@ class Collection(Record):
         else:
             raise ValueError("members hasn't been set on this instance")
 
+    def add_member(self, x):
+        """a method to append a member to the members property
+
+        Only x is validated, so this takes the same time however many members there already are.
+
+        :param Manifest or Collection x: the member to add
+        """
+        self._add_to_a_list_property([x], "_members", [Manifest, Collection])
+
+    def extend_members(self, x):
+        """a method to append every item of x to the members property
+
+        :param list x: Manifest or Collection instances
+        """
+        self._add_to_a_list_property(x, "_members", [Manifest, Collection])
+
+    def insert_member(self, index, x):
+        """a method to insert a member into the members property before position index
+
+        :param int index: the position to insert x at
+        :param Manifest or Collection x: the member to insert
+        """
+        self._add_to_a_list_property([x], "_members", [Manifest, Collection], index=index)
+
+    def get_member(self, an_id):
+        """a method to find the member with a particular id in the members property
+
+        Lookups go through an index of members by id rather than searching them, so take at worst
+        time in proportion to the square root of how many members there are - see :class:`_IdIndex`.
+
+        :param str an_id: the id of the member
+        :rtype :class:`Record`
+        :returns the member, or None if there isn't one with that id
+        """
+        return self._find_in_a_list_property(an_id, "_members")
+
+    def has_member(self, an_id):
+        """a method to check whether there is a member with a particular id in the members property
+
+        :param str an_id: the id of the member
+        :rtype bool
+        """
+        return self._position_in_a_list_property(an_id, "_members") is not None
+
+    def del_member(self, x):
+        """a method to delete a member from the members property
+
+        takes a member object or its id, checks if it exists in the members property
+        and if it does deletes it from the list.
+
+        :param Manifest or Collection x: the member to delete, or its id
+        :returns the member deleted, or None if there wasn't one
+        """
+        return self._remove_from_a_list_property(x, "_members")
+
     @classmethod
-    def load(cls, json_data):
+    def load(cls, json_data, preserve=False):
         """a class method to instantiate an instance of Collection class from a json string
 
+        :param bool preserve: keep the JSON of everything the class doesn't model and of unchanged
+         records as it is - see :func:`load_preserving`
+
         :rtype :class:`Collection`
         """
+        if preserve:
+            return load_preserving(cls, json_data)
         try:
             data = json.dumps(json_data)
         except json.decoder.JSONDecodeError:
@@ -769,7 +1894,7 @@ class Collection(Record):
             for a_field in data.get("metadata"):
                 new_field = MetadataField(a_field.get("label"), a_field.get("value"))
                 mdata_list.append(new_field)
-            new_collection.metadata = mdata_list 
+            new_collection.metadata = mdata_list
         if data.get("members"):
             members_list = []
             for member in data.get("members"):
@@ -815,7 +1940,7 @@ class Collection(Record):
 class Manifest(Record):
     """a class for building IIIF Manifest records
     """
-    __name__ = "Manifest"    
+    __name__ = "Manifest"
 
     def __init__(self, uri):
         """"initializes a Manifest with type sc:Manifest and id of uri given at init
@@ -839,9 +1964,9 @@ class Manifest(Record):
         return self._iterate_some_list("_sequences")
 
     def set_sequences(self, x):
-        """a method to set the value of the sequences property. 
-        
-        Every instance in the list must be of type Sequence. If any item is not of type Sequence 
+        """a method to set the value of the sequences property.
+
+        Every instance in the list must be of type Sequence. If any item is not of type Sequence
         will raise a ValueError exception
         """
         self._set_a_list_property(x, "_sequences", Sequence)
@@ -852,6 +1977,30 @@ class Manifest(Record):
         """
         self._delete_a_property("_sequences")
 
+    def add_sequence(self, x):
+        """a method to append a sequence to the sequences property
+
+        Only x is validated, so this takes the same time however many sequences there already are.
+
+        :param Sequence x: the sequence to add
+        """
+        self._add_to_a_list_property([x], "_sequences", Sequence)
+
+    def extend_sequences(self, x):
+        """a method to append every item of x to the sequences property
+
+        :param list x: Sequence instances
+        """
+        self._add_to_a_list_property(x, "_sequences", Sequence)
+
+    def insert_sequence(self, index, x):
+        """a method to insert a sequence into the sequences property before position index
+
+        :param int index: the position to insert x at
+        :param Sequence x: the sequence to insert
+        """
+        self._add_to_a_list_property([x], "_sequences", Sequence, index=index)
+
     def get_structures(self):
         """a method to get the value of structures property
 
@@ -862,9 +2011,9 @@ class Manifest(Record):
         return self._iterate_some_list("_structures")
 
     def set_structures(self, x):
-        """a method to set the value of the structures property. 
-        
-        Every instance in the list is of type Range. If any item is not of type Range 
+        """a method to set the value of the structures property.
+
+        Every instance in the list is of type Range. If any item is not of type Range
         will raise a ValueError exception
         """
         self._set_a_list_property(x, "_structures", Range)
@@ -874,12 +2023,63 @@ class Manifest(Record):
         """
         self._delete_a_property("_structures")
 
+    def add_structure(self, x):
+        """a method to append a structure to the structures property
+
+        Only x is validated, so this takes the same time however many structures there already are.
+
+        :param Range x: the structure to add
+        """
+        self._add_to_a_list_property([x], "_structures", Range)
+
+    def extend_structures(self, x):
+        """a method to append every item of x to the structures property
+
+        :param list x: Range instances
+        """
+        self._add_to_a_list_property(x, "_structures", Range)
+
+    def insert_structure(self, index, x):
+        """a method to insert a structure into the structures property before position index
+
+        :param int index: the position to insert x at
+        :param Range x: the structure to insert
+        """
+        self._add_to_a_list_property([x], "_structures", Range, index=index)
+
+    def get_canvas(self, an_id):
+        """a method to find the canvas with a particular id in any of the sequences of the manifest
+
+        :param str an_id: the id of the canvas
+        :rtype :class:`Canvas`
+        :returns the canvas, or None if there isn't one with that id
+        """
+        sequences = self._iterate_some_list("_sequences") if hasattr(self, "_sequences") else []
+        for sequence in sequences:
+            found = sequence.get_canvas(an_id)
+            if found is not None:
+                return found
+
+    def has_canvas(self, an_id):
+        """a method to check whether any of the sequences of the manifest has a canvas with a
+        particular id
+
+        :param str an_id: the id of the canvas
+        :rtype bool
+        """
+        return self.get_canvas(an_id) is not None
+
     @classmethod
-    def load(cls, json_data):
+    def load(cls, json_data, preserve=False):
         """a class method to instantiate an instance of Manifest class from a json string
 
+        :param bool preserve: keep the JSON of everything the class doesn't model and of unchanged
+         records as it is - see :func:`load_preserving`
+
         :rtype :class:`Manifest`
         """
+        if preserve:
+            return load_preserving(cls, json_data)
         try:
             data = json.loads(json_data)
         except json.decoder.JSONDecodeError:
@@ -890,8 +2090,8 @@ class Manifest(Record):
             for a_field in data.get("metadata"):
                 new_field = MetadataField(a_field.get("label"), a_field.get("value"))
                 mdata_list.append(new_field)
-            new_manifest.metadata = mdata_list 
- 
+            new_manifest.metadata = mdata_list
+
         if data.get("description"):
             new_manifest.description = data.get("description")
         if data.get("label"):
@@ -926,7 +2126,7 @@ class Sequence(Record):
     def __init__(self, uri):
         """initializes an instance of class Sequence
 
-        :param str uri: a string representing a resolvable url 
+        :param str uri: a string representing a resolvable url
 
         :rtype :class:`Sequence`
         """
@@ -955,24 +2155,73 @@ class Sequence(Record):
         """
         self._delete_a_property("_canvases")
 
-    def del_canvas(self, a_canvas):
-        """a method to delete a canvas from a sequence
+    def add_canvas(self, x):
+        """a method to append a canvas to the canvases property
+
+        Only x is validated, so this takes the same time however many canvases there already are.
+
+        :param Canvas x: the canvas to add
+        """
+        self._add_to_a_list_property([x], "_canvases", Canvas)
 
-        takes a canvas object, checks if that object exists in the sequence
+    def extend_canvases(self, x):
+        """a method to append every item of x to the canvases property
+
+        :param list x: Canvas instances
+        """
+        self._add_to_a_list_property(x, "_canvases", Canvas)
+
+    def insert_canvas(self, index, x):
+        """a method to insert a canvas into the canvases property before position index
+
+        :param int index: the position to insert x at
+        :param Canvas x: the canvas to insert
+        """
+        self._add_to_a_list_property([x], "_canvases", Canvas, index=index)
+
+    def get_canvas(self, an_id):
+        """a method to find the canvas with a particular id in the canvases property
+
+        Lookups go through an index of canvases by id rather than searching them, so take at worst
+        time in proportion to the square root of how many canvases there are - see
+        :class:`_IdIndex`.
+
+        :param str an_id: the id of the canvas
+        :rtype :class:`Canvas`
+        :returns the canvas, or None if there isn't one with that id
+        """
+        return self._find_in_a_list_property(an_id, "_canvases")
+
+    def has_canvas(self, an_id):
+        """a method to check whether there is a canvas with a particular id in the canvases property
+
+        :param str an_id: the id of the canvas
+        :rtype bool
+        """
+        return self._position_in_a_list_property(an_id, "_canvases") is not None
+
+    def del_canvas(self, x):
+        """a method to delete a canvas from the canvases property
+
+        takes a canvas object or its id, checks if it exists in the canvases property
         and if it does deletes it from the list.
+
+        :param Canvas x: the canvas to delete, or its id
+        :returns the canvas deleted, or None if there wasn't one
         """
-        if getattr(self, "_canvas", None):
-            the_list = getattr(self, "_canvases")
-            pos_to_remove = the_list.index(a_canvas)
-            del the_list[pos_to_remove]
-            self._set_a_list_property(the_list, "_canvases", Canvas)
+        return self._remove_from_a_list_property(x, "_canvases")
 
     @classmethod
-    def load(cls, json_data):
+    def load(cls, json_data, preserve=False):
         """a class method to instantiate an instance of Sequence class from a json string
 
+        :param bool preserve: keep the JSON of everything the class doesn't model and of unchanged
+         records as it is - see :func:`load_preserving`
+
         :rtype :class:`Sequence`
         """
+        if preserve:
+            return load_preserving(cls, json_data)
         try:
             data = json.loads(json_data)
         except json.decoder.JSONDecodeError:
@@ -1007,7 +2256,7 @@ class Canvas(Record):
     def __init__(self, uri):
         """initializes an instance of class Canvas
 
-        :param str uri: a string representing a resolvable url 
+        :param str uri: a string representing a resolvable url
 
         :rtype :class:`Canvas`
         """
@@ -1035,6 +2284,30 @@ class Canvas(Record):
         """
         self._delete_a_property("_images")
 
+    def add_image(self, x):
+        """a method to append a image to the images property
+
+        Only x is validated, so this takes the same time however many images there already are.
+
+        :param Annotation x: the image to add
+        """
+        self._add_to_a_list_property([x], "_images", Annotation)
+
+    def extend_images(self, x):
+        """a method to append every item of x to the images property
+
+        :param list x: Annotation instances
+        """
+        self._add_to_a_list_property(x, "_images", Annotation)
+
+    def insert_image(self, index, x):
+        """a method to insert a image into the images property before position index
+
+        :param int index: the position to insert x at
+        :param Annotation x: the image to insert
+        """
+        self._add_to_a_list_property([x], "_images", Annotation, index=index)
+
     def get_otherContent(self):
         """a method to return the value of the otherContent property
 
@@ -1056,6 +2329,30 @@ class Canvas(Record):
         """
         self._delete_a_property("_otherContent")
 
+    def add_otherContent(self, x):
+        """a method to append a otherContent to the otherContent property
+
+        Only x is validated, so this takes the same time however many otherContent there are.
+
+        :param AnnotationList x: the otherContent to add
+        """
+        self._add_to_a_list_property([x], "_otherContent", AnnotationList)
+
+    def extend_otherContent(self, x):
+        """a method to append every item of x to the otherContent property
+
+        :param list x: AnnotationList instances
+        """
+        self._add_to_a_list_property(x, "_otherContent", AnnotationList)
+
+    def insert_otherContent(self, index, x):
+        """a method to insert a otherContent into the otherContent property before position index
+
+        :param int index: the position to insert x at
+        :param AnnotationList x: the otherContent to insert
+        """
+        self._add_to_a_list_property([x], "_otherContent", AnnotationList, index=index)
+
     def get_height(self):
         """a method to get the value of the height property
 
@@ -1097,17 +2394,23 @@ class Canvas(Record):
     def validate(self):
         """a method to validate the Canvas object as IIIF compliant
         """
-        if hasattr(self, 'height') and hasattr(self, 'width') and hasattr(self, 'label') and hasattr(self, 'images'):
+        if hasattr(self, 'height') and hasattr(self, 'width') and hasattr(self, 'label') and \
+                hasattr(self, 'images'):
             return True
         else:
             return False
 
     @classmethod
-    def load(cls, json_data):
+    def load(cls, json_data, preserve=False):
         """a class method to instantiate an instance of Canvas class from a json string
 
+        :param bool preserve: keep the JSON of everything the class doesn't model and of unchanged
+         records as it is - see :func:`load_preserving`
+
         :rtype :class:`Canvas`
         """
+        if preserve:
+            return load_preserving(cls, json_data)
         try:
             data = json.loads(json_data)
         except json.decoder.JSONDecodeError:
@@ -1125,7 +2428,7 @@ class Canvas(Record):
                 img_list.append(an_annotation)
             new_canvas.images = img_list
         if data.get("otherContent"):
-            otherContent = [] 
+            otherContent = []
             for oContent in data.get("otherContent"):
                 new_oContent = OtherContent.load(json.dumps(oContent))
                 otherContent.append(new_oContent)
@@ -1137,6 +2440,7 @@ class Canvas(Record):
     width = property(get_width, set_width, del_width)
     otherContent = property(get_otherContent, set_otherContent, del_otherContent)
 
+
 class AnnotationList(Record):
     """a class for building IIIF AnnotationList records
 
@@ -1173,28 +2477,51 @@ class AnnotationList(Record):
         """
         self._delete_a_property("_resources")
 
+    def add_resource(self, x):
+        """a method to append a resource to the resources property
+
+        Only x is validated, so this takes the same time however many resources there already are.
+
+        :param Annotation x: the resource to add
+        """
+        self._add_to_a_list_property([x], "_resources", Annotation)
+
+    def extend_resources(self, x):
+        """a method to append every item of x to the resources property
+
+        :param list x: Annotation instances
+        """
+        self._add_to_a_list_property(x, "_resources", Annotation)
+
+    def insert_resource(self, index, x):
+        """a method to insert a resource into the resources property before position index
+
+        :param int index: the position to insert x at
+        :param Annotation x: the resource to insert
+        """
+        self._add_to_a_list_property([x], "_resources", Annotation, index=index)
+
     def get_on(self):
         return self._get_simple_property("_on")
 
     def set_on(self, x):
-       self._set_simple_property(x, '_on')
+        self._set_simple_property(x, '_on')
 
     def del_on(self):
         self._delete_a_property("_on")
 
-
-    def to_dict(self):
+    def _to_dict(self):
         """converts an instance to a dictionary
 
         :rtype dict
-        :returns A dictionary data structure with key names conforming to IIIF specification 
+        :returns A dictionary data structure with key names conforming to IIIF specification
          containing all defined properties
         """
         out = {}
         out["@id"] = self.id
         out["@type"] = self.type
         out["resources"] = []
-        if hasattr(self, "resources", None):
+        if getattr(self, "_resources", None):
             for resource in self.resources:
                 n_item = resource.to_dict()
                 out["resources"].append(n_item)
@@ -1204,7 +2531,9 @@ class AnnotationList(Record):
         return str(self.to_dict())
 
     @classmethod
-    def load(cls, json_data):
+    def load(cls, json_data, preserve=False):
+        if preserve:
+            return load_preserving(cls, json_data)
         try:
             data = json.loads(json_data)
         except json.decoder.JSONDecodeError:
@@ -1229,6 +2558,7 @@ class AnnotationList(Record):
     resources = property(get_resources, set_resources, del_resources)
     on = property(get_on, set_on, del_on)
 
+
 class Annotation(Record):
     """a class for building IIIF Annotation records
 
@@ -1260,7 +2590,7 @@ class Annotation(Record):
         self._set_simple_property(value, "_format")
 
     def del_format(self):
-        self._delete_a_property("_format") 
+        self._delete_a_property("_format")
 
     def get_resource(self):
         """returns the value of the resource property
@@ -1304,11 +2634,11 @@ class Annotation(Record):
         """
         self._delete_a_property("_motivation")
 
-    def to_dict(self):
+    def _to_dict(self):
         """converts an instance to a dictionary
 
         :rtype dict
-        :returns A dictionary data structure with key names conforming to IIIF specification 
+        :returns A dictionary data structure with key names conforming to IIIF specification
          containing all defined properties
         """
         out = {}
@@ -1321,7 +2651,9 @@ class Annotation(Record):
         return out
 
     @classmethod
-    def load(cls, json_data, on=None):
+    def load(cls, json_data, on=None, preserve=False):
+        if preserve:
+            return load_preserving(cls, json_data)
         try:
             data = json.loads(json_data)
         except json.decoder.JSONDecodeError:
@@ -1354,6 +2686,7 @@ class Annotation(Record):
     resource = property(get_resource, set_resource, del_resource)
     motivation = property(get_motivation, set_motivation, del_motivation)
 
+
 class Range(Record):
     """a class for building IIIF Annotation records
 
@@ -1369,7 +2702,7 @@ class Range(Record):
         """
         self.id = uri
         self.type = "sc:Range"
-        
+
     def get_canvases(self):
         """returns the value of the canvases property
 
@@ -1393,6 +2726,62 @@ class Range(Record):
         """
         self._delete_a_property("_canvases")
 
+    def add_canvas(self, x):
+        """a method to append a canvas to the canvases property
+
+        Only x is validated, so this takes the same time however many canvases there already are.
+
+        :param Canvas x: the canvas to add
+        """
+        self._add_to_a_list_property([x], "_canvases", Canvas)
+
+    def extend_canvases(self, x):
+        """a method to append every item of x to the canvases property
+
+        :param list x: Canvas instances
+        """
+        self._add_to_a_list_property(x, "_canvases", Canvas)
+
+    def insert_canvas(self, index, x):
+        """a method to insert a canvas into the canvases property before position index
+
+        :param int index: the position to insert x at
+        :param Canvas x: the canvas to insert
+        """
+        self._add_to_a_list_property([x], "_canvases", Canvas, index=index)
+
+    def get_canvas(self, an_id):
+        """a method to find the canvas with a particular id in the canvases property
+
+        Lookups go through an index of canvases by id rather than searching them, so take at worst
+        time in proportion to the square root of how many canvases there are - see
+        :class:`_IdIndex`.
+
+        :param str an_id: the id of the canvas
+        :rtype :class:`Canvas`
+        :returns the canvas, or None if there isn't one with that id
+        """
+        return self._find_in_a_list_property(an_id, "_canvases")
+
+    def has_canvas(self, an_id):
+        """a method to check whether there is a canvas with a particular id in the canvases property
+
+        :param str an_id: the id of the canvas
+        :rtype bool
+        """
+        return self._position_in_a_list_property(an_id, "_canvases") is not None
+
+    def del_canvas(self, x):
+        """a method to delete a canvas from the canvases property
+
+        takes a canvas object or its id, checks if it exists in the canvases property
+        and if it does deletes it from the list.
+
+        :param Canvas x: the canvas to delete, or its id
+        :returns the canvas deleted, or None if there wasn't one
+        """
+        return self._remove_from_a_list_property(x, "_canvases")
+
     def get_members(self):
         """returns the value of the members property
 
@@ -1409,15 +2798,70 @@ class Range(Record):
 
         :param x list: a list of Canvas instances
         """
- 
+
         return self._set_a_list_property(x, "_members", [Canvas, Range])
 
     def del_members(self):
         """sets previously defined members property to None
         """
- 
+
         self._delete_a_property("_members")
 
+    def add_member(self, x):
+        """a method to append a member to the members property
+
+        Only x is validated, so this takes the same time however many members there already are.
+
+        :param Canvas or Range x: the member to add
+        """
+        self._add_to_a_list_property([x], "_members", [Canvas, Range])
+
+    def extend_members(self, x):
+        """a method to append every item of x to the members property
+
+        :param list x: Canvas or Range instances
+        """
+        self._add_to_a_list_property(x, "_members", [Canvas, Range])
+
+    def insert_member(self, index, x):
+        """a method to insert a member into the members property before position index
+
+        :param int index: the position to insert x at
+        :param Canvas or Range x: the member to insert
+        """
+        self._add_to_a_list_property([x], "_members", [Canvas, Range], index=index)
+
+    def get_member(self, an_id):
+        """a method to find the member with a particular id in the members property
+
+        Lookups go through an index of members by id rather than searching them, so take at worst
+        time in proportion to the square root of how many members there are - see :class:`_IdIndex`.
+
+        :param str an_id: the id of the member
+        :rtype :class:`Record`
+        :returns the member, or None if there isn't one with that id
+        """
+        return self._find_in_a_list_property(an_id, "_members")
+
+    def has_member(self, an_id):
+        """a method to check whether there is a member with a particular id in the members property
+
+        :param str an_id: the id of the member
+        :rtype bool
+        """
+        return self._position_in_a_list_property(an_id, "_members") is not None
+
+    def del_member(self, x):
+        """a method to delete a member from the members property
+
+        takes a member object or its id, checks if it exists in the members property
+        and if it does deletes it from the list.
+
+        :param Canvas or Range x: the member to delete, or its id
+        :returns the member deleted, or None if there wasn't one
+        """
+        return self._remove_from_a_list_property(x, "_members")
+
     def get_ranges(self):
         """returns the value of the ranges property
 
@@ -1434,7 +2878,7 @@ class Range(Record):
 
         :param x list: a list of Range instances
         """
- 
+
         return self._set_a_list_property(x, "_ranges", Range)
 
     def del_ranges(self):
@@ -1442,8 +2886,65 @@ class Range(Record):
         """
         self._delete_a_property("_ranges")
 
+    def add_range(self, x):
+        """a method to append a range to the ranges property
+
+        Only x is validated, so this takes the same time however many ranges there already are.
+
+        :param Range x: the range to add
+        """
+        self._add_to_a_list_property([x], "_ranges", Range)
+
+    def extend_ranges(self, x):
+        """a method to append every item of x to the ranges property
+
+        :param list x: Range instances
+        """
+        self._add_to_a_list_property(x, "_ranges", Range)
+
+    def insert_range(self, index, x):
+        """a method to insert a range into the ranges property before position index
+
+        :param int index: the position to insert x at
+        :param Range x: the range to insert
+        """
+        self._add_to_a_list_property([x], "_ranges", Range, index=index)
+
+    def get_range(self, an_id):
+        """a method to find the range with a particular id in the ranges property
+
+        Lookups go through an index of ranges by id rather than searching them, so take at worst
+        time in proportion to the square root of how many ranges there are - see :class:`_IdIndex`.
+
+        :param str an_id: the id of the range
+        :rtype :class:`Range`
+        :returns the range, or None if there isn't one with that id
+        """
+        return self._find_in_a_list_property(an_id, "_ranges")
+
+    def has_range(self, an_id):
+        """a method to check whether there is a range with a particular id in the ranges property
+
+        :param str an_id: the id of the range
+        :rtype bool
+        """
+        return self._position_in_a_list_property(an_id, "_ranges") is not None
+
+    def del_range(self, x):
+        """a method to delete a range from the ranges property
+
+        takes a range object or its id, checks if it exists in the ranges property
+        and if it does deletes it from the list.
+
+        :param Range x: the range to delete, or its id
+        :returns the range deleted, or None if there wasn't one
+        """
+        return self._remove_from_a_list_property(x, "_ranges")
+
     @classmethod
-    def load(cls, json_data):
+    def load(cls, json_data, preserve=False):
+        if preserve:
+            return load_preserving(cls, json_data)
         try:
             data = json.dumps(json_data)
         except json.decoder.JSONDecodeError:
@@ -1480,11 +2981,12 @@ class Range(Record):
                 new_range = Canvas.load(json.dumps(a_range))
                 new_ranges.append(new_range)
             new_range.member = new_ranges
- 
+
     canvases = property(get_canvases, set_canvases, del_canvases)
     members = property(get_members, set_members, del_members)
     ranges = property(get_ranges, set_ranges, del_ranges)
 
+
 class OtherContent(object):
     """a class for building IIIF otherContent
     """
@@ -1500,7 +3002,7 @@ class OtherContent(object):
         self.items = x
 
     def set_items(self, x):
-        """sets the value of the items property 
+        """sets the value of the items property
 
         Each list item must be a resolvable URL
 
@@ -1508,12 +3010,12 @@ class OtherContent(object):
 
         """
         for n_url in x:
-            u = requests.get(x, "HEAD")
-            if u.status_code() == 200:
+            u = get_default_transport().get(n_url, timeout=URL_CHECK_TIMEOUT)
+            if u.status_code == 200:
                 pass
             else:
                 raise ValueError("{} is not a valid url for otherContent".format(n_url))
-        self._items = x    
+        self._items = x
 
     def get_items(self):
         """returns the value of the items property
@@ -1521,7 +3023,7 @@ class OtherContent(object):
         :rtype list
         """
         out = []
-        for n_item in self.items:
+        for n_item in self._items:
             out.append(n_item)
         return out
 
@@ -1543,6 +3045,7 @@ class OtherContent(object):
 
     items = property(get_items, set_items, del_items)
 
+
 class MetadataField:
     """a class for building IIIF MetadataField
     """
@@ -1551,7 +3054,8 @@ class MetadataField:
     def __init__(self, label, value):
         """initializes an instance of MetadataField
 
-        :param str label: a human-readable string describing what a particular metadata field represents
+        :param str label: a human-readable string describing what a particular metadata field
+         represents
         :param str value: a value for a particular metadata field
 
         :rtype :class:`MetadataField`
@@ -1559,23 +3063,32 @@ class MetadataField:
         self.label = label
         self.value = value
 
+    def __setattr__(self, name, value):
+        """sets an attribute, marking the record the field belongs to (if any) as changed
+        """
+        object.__setattr__(self, name, value)
+        owner = self.__dict__.get("_owner")
+        owner = owner() if owner is not None and name != "_owner" else None
+        if owner is not None:
+            owner._mark_dirty()
+
     def get_label(self):
         return getattr(self, "_label", None)
 
     def set_label(self, x):
-        setattr(self, "_label", x)     
+        setattr(self, "_label", x)
 
     def del_label(self):
-        setattr(self, "_label", None) 
+        setattr(self, "_label", None)
 
     def get_value(self):
         return getattr(self, "_value", None)
 
     def set_value(self, x):
-        setattr(self, "_value", x)     
+        setattr(self, "_value", x)
 
     def del_value(self):
-        setattr(self, "_label", None) 
+        setattr(self, "_label", None)
 
     def to_dict(self):
         return {"label": self.label, "value": self.value}
@@ -1588,12 +3101,11 @@ class MetadataField:
             raise ValueError("MetadataField.load got invalid JSON data")
         return cls(data.get("label"), data.get("value"))
 
-
-
     label = property(get_label, set_label, del_label)
     value = property(get_value, set_value, del_value)
 
-# JSON-LD @types to Class; used for converting the string value in 
+
+# JSON-LD @types to Class; used for converting the string value in
 # @type loading JSON strings into the right object instances
 ttc = {
     "sc:Collection": Collection,
@@ -1605,3 +3117,155 @@ ttc = {
     "sc:Range": Range,
     "dctypes:Image": ImageResource
 }
+
+# The properties each class models when loaded with load_preserving, mapped to the attributes
+# they're kept in. Anything else in the JSON is kept as it is and put back when the instance is
+# converted.
+_DESCRIPTIVE = {"@context": "_context", "label": "_label", "description": "_description",
+                "viewingHint": "_viewingHint", "viewingDirection": "_viewingDirection",
+                "metadata": "_metadata"}
+preserved_properties = {
+    Collection: _DESCRIPTIVE,
+    Manifest: _DESCRIPTIVE,
+    Sequence: _DESCRIPTIVE,
+    Canvas: dict(_DESCRIPTIVE, height="_height", width="_width"),
+    Range: _DESCRIPTIVE,
+    AnnotationList: {},
+    Annotation: {"motivation": "_motivation", "on": "on"},
+    ImageResource: {"format": "_format", "height": "_height", "width": "_width"}
+}
+
+# The properties whose values are records (or lists of them) in each class, mapped to the attributes
+# they're kept in and the classes they may hold
+preserved_records = {
+    Collection: {"members": ("_members", (Collection, Manifest)),
+                 "collections": ("_collections", (Collection,)),
+                 "manifests": ("_manifests", (Manifest,))},
+    Manifest: {"sequences": ("_sequences", (Sequence,)),
+               "structures": ("_structures", (Range,))},
+    Sequence: {"canvases": ("_canvases", (Canvas,))},
+    Canvas: {"images": ("_images", (Annotation,)),
+             "otherContent": ("_otherContent", (AnnotationList,))},
+    Range: {"canvases": ("_canvases", (Canvas,)),
+            "members": ("_members", (Canvas, Range)),
+            "ranges": ("_ranges", (Range,))},
+    AnnotationList: {"resources": ("_resources", (Annotation,))},
+    Annotation: {"resource": ("_resource", (ImageResource,))}
+}
+
+
+def _record_class(value, classes):
+    """a function to find the class a dictionary should be loaded as, if it's one of classes
+
+    :rtype type
+    """
+    if isinstance(value, dict):
+        cls = ttc.get(value.get("@type"))
+        if cls in classes:
+            return cls
+
+
+def _load_property(rec, key, value):
+    """a function to set a property of a record from its value in JSON, the way load_preserving does
+
+    A value the class doesn't model is kept in the record's extra properties. The record isn't
+    marked as changed.
+
+    :param Record rec: the record
+    :param str key: the IIIF key of the property
+    :param value: the value, as decoded from JSON
+    :rtype list
+    :returns the records made from the value
+    """
+    state = rec.__dict__
+    simple = preserved_properties.get(type(rec), {})
+    records = preserved_records.get(type(rec), {})
+    if key in ("@id", "@type"):
+        state["_" + key[1:]] = value
+    elif key == "metadata" and key in simple and isinstance(value, list) and \
+            all(isinstance(x, dict) and set(x) == {"label", "value"} for x in value):
+        state["_metadata"] = [MetadataField(x["label"], x["value"]) for x in value]
+        rec._adopt_metadata()
+    elif key in simple and key != "metadata" and isinstance(value, (str, int)):
+        state[simple[key]] = value
+    elif key in records and isinstance(value, list) and \
+            all(_record_class(x, records[key][1]) for x in value):
+        items = [_preserve(_record_class(x, records[key][1]), x) for x in value]
+        state[records[key][0]] = items
+        state.get("_id_index", {}).pop(records[key][0], None)
+        return items
+    elif key in records and _record_class(value, records[key][1]):
+        item = _preserve(_record_class(value, records[key][1]), value)
+        state[records[key][0]] = item
+        return [item]
+    else:
+        state.setdefault("_extra", {})[key] = value
+    return []
+
+
+def _unload_property(rec, key):
+    """a function to remove a property of a record given by its IIIF key, wherever it's kept
+
+    The record isn't marked as changed.
+
+    :param Record rec: the record
+    :param str key: the IIIF key of the property
+    """
+    state = rec.__dict__
+    simple = preserved_properties.get(type(rec), {})
+    records = preserved_records.get(type(rec), {})
+    if key in ("@id", "@type"):
+        state.pop("_" + key[1:], None)
+    if key in simple:
+        state.pop(simple[key], None)
+    if key in records:
+        state.pop(records[key][0], None)
+        state.get("_id_index", {}).pop(records[key][0], None)
+    state.get("_extra", {}).pop(key, None)
+
+
+def _preserve(cls, data):
+    """a function to build an instance of cls around a dictionary, without validating anything
+
+    :param type cls: the class to build
+    :param dict data: the record, which becomes the instance's cached dictionary
+    :rtype :class:`Record`
+    """
+    rec = cls.__new__(cls)
+    children = []
+    for key, value in data.items():
+        children.extend(_load_property(rec, key, value))
+    state = rec.__dict__
+    state["_dict_cache"] = data
+    state["_pristine"] = True
+    for child in children:
+        child.__dict__["_parents"] = [ref(rec)]
+    return rec
+
+
+def load_preserving(cls, json_data):
+    """a function to instantiate a record from JSON without losing anything the record classes don't
+    model
+
+    Properties the classes don't model (e.g. thumbnail, rendering, seeAlso and the details of image
+    services), and values they can't hold (e.g. language maps or references given as plain URIs),
+    are kept as they are and put back into the record's dictionary when it's converted. The
+    dictionary of every record is also kept as its cached dictionary, so converting a record emits
+    the loaded data itself until something in it is changed, and then only the records on the path
+    to the change are converted again. Nothing is validated and no requests are made, so loading a
+    large record to change a few properties and write it back is cheap and loses nothing.
+
+    :param type cls: the class of the record, e.g. :class:`Manifest`
+    :param json_data: a string of JSON data, or the already decoded dictionary - which is then owned
+     by the record, so don't change it afterwards
+    :rtype :class:`Record`
+    """
+    with gc_paused():
+        if isinstance(json_data, dict):
+            data = json_data
+        else:
+            try:
+                data = json.loads(json_data)
+            except json.decoder.JSONDecodeError:
+                raise ValueError("{}.load() was passed invalid JSON data".format(cls.__name__))
+        return _preserve(cls, data)
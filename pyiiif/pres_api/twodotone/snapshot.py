@@ -0,0 +1,201 @@
+"""Saving and restoring twodotone record trees as binary snapshots
+
+Loading records from JSON either validates every property and requests
+every image's info.json (:meth:`Manifest.load`) or decodes everything the
+classes don't model along with them (:func:`load_preserving`). A snapshot
+holds the records' own attributes instead, so restoring one only has to
+make the objects and put their attributes back: nothing is parsed,
+validated or requested.
+
+A snapshot is a short header - a magic string and a format version -
+followed by a pickle which holds nothing but dicts, lists, tuples, strings
+and numbers. It is read with an unpickler which refuses to import anything,
+so a snapshot can't run code when it's loaded. Each record is stored as a
+``(class, attributes, child attributes)`` tuple, where class indexes a list
+of the class names the snapshot uses, so snapshots don't depend on where the
+classes live. A record reachable from more than one place, such as a canvas
+a manifest shares with its clone (see :meth:`Record.clone`), is stored once
+and is shared again when the snapshot is restored, along with the count of
+its sharers, so it is still copied the first time it's got to be changed.
+Caches and other bookkeeping aren't stored. Sequences whose
+canvases are in a :class:`CanvasSpool` can't be snapshotted, since their
+canvases are in the spool's file rather than in memory.
+"""
+
+import io
+import pickle
+
+from pyiiif.utils import gc_paused
+from .records import INTERNAL_ATTRIBUTES, Annotation, AnnotationList, \
+    Canvas, CanvasSpool, Collection, ImageResource, Manifest, MetadataField, OtherContent, \
+    Range, Record, Sequence, ServerProfile, Service
+
+MAGIC = b"PYIIIF-SNAPSHOT"
+VERSION = 1
+
+# The classes snapshots can hold, by name
+SNAPSHOT_CLASSES = {cls.__name__: cls for cls in (
+    Collection, Manifest, Sequence, Canvas, AnnotationList, Annotation,
+    Range, ImageResource, Service, ServerProfile, MetadataField, OtherContent
+)}
+_PACKABLE = frozenset(SNAPSHOT_CLASSES.values())
+
+# Record bookkeeping which is part of the record's content, or says which
+# records it shares with clones
+_KEPT = ("_extra", "_shared", "_owners")
+
+
+class _Unpickler(pickle.Unpickler):
+    """
+    An unpickler which only makes builtin containers and scalars
+    """
+    def find_class(self, module, name):
+        raise pickle.UnpicklingError(
+            "Snapshots can't refer to {}.{}".format(module, name)
+        )
+
+
+def _pack(obj, codes, shared):
+    """
+    Turn an object into a tuple of its class and its attributes
+
+    :param dict codes: The index of each class name used so far
+    :param dict shared: Objects which have already been packed, by id -
+        they're packed once, so they're shared again when they're unpacked
+    :rtype: tuple
+    """
+    if id(obj) in shared:
+        return shared[id(obj)]
+    name = type(obj).__name__
+    code = codes.setdefault(name, len(codes))
+    state = {}
+    children = []
+    for key, value in obj.__dict__.items():
+        if key in INTERNAL_ATTRIBUTES and key not in _KEPT:
+            continue
+        if type(value) in _PACKABLE:
+            value = _pack(value, codes, shared)
+            children.append(key)
+        elif isinstance(value, CanvasSpool):
+            raise ValueError(
+                "A {} whose canvases are spooled can't be put in a snapshot, "
+                "write it out with write_json instead".format(name)
+            )
+        elif isinstance(value, list) and any(type(x) in _PACKABLE for x in value):
+            value = [_pack(x, codes, shared) if type(x) in _PACKABLE else x
+                     for x in value]
+            children.append(key)
+        state[key] = value
+    packed = (code, state, tuple(children))
+    shared[id(obj)] = packed
+    return packed
+
+
+def _pack_value(value, codes, shared):
+    """
+    Pack the records in whatever was passed to :func:`dumps`
+    """
+    if type(value) in _PACKABLE:
+        return _pack(value, codes, shared)
+    if isinstance(value, dict):
+        return {key: _pack_value(x, codes, shared) for key, x in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_pack_value(x, codes, shared) for x in value]
+    if isinstance(value, Record):
+        raise ValueError("{} can't be put in a snapshot".format(type(value).__name__))
+    return value
+
+
+def _unpack(packed, classes, shared):
+    """
+    Make an object from its packed tuple, without validating anything
+    """
+    obj = shared.get(id(packed))
+    if obj is not None:
+        return obj
+    code, state, children = packed
+    cls = classes[code]
+    obj = cls.__new__(cls)
+    for key in children:
+        value = state[key]
+        if type(value) is tuple:
+            state[key] = _unpack(value, classes, shared)
+        else:
+            state[key] = [_unpack(x, classes, shared) if type(x) is tuple else x
+                          for x in value]
+    obj.__dict__ = state
+    if issubclass(cls, Record):
+        obj._adopt_metadata()
+    shared[id(packed)] = obj
+    return obj
+
+
+def _unpack_value(value, classes, shared):
+    """
+    Unpack the records in whatever was passed to :func:`dumps`
+    """
+    if type(value) is tuple:
+        return _unpack(value, classes, shared)
+    if isinstance(value, dict):
+        return {key: _unpack_value(x, classes, shared) for key, x in value.items()}
+    if isinstance(value, list):
+        return [_unpack_value(x, classes, shared) for x in value]
+    return value
+
+
+def dump(value, f):
+    """
+    Write a snapshot of records to a file
+
+    :param value: A record, or a dict or list of them, e.g. manifests by
+        their ids
+    :param f: A file open for writing bytes
+    """
+    with gc_paused():
+        codes = {}
+        payload = _pack_value(value, codes, {})
+        names = sorted(codes, key=codes.get)
+        f.write(MAGIC)
+        f.write(bytes([VERSION]))
+        pickle.dump((names, payload), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def dumps(value):
+    """
+    Take a snapshot of records as bytes - see :func:`dump`
+
+    :rtype: bytes
+    """
+    f = io.BytesIO()
+    dump(value, f)
+    return f.getvalue()
+
+
+def load(f):
+    """
+    Restore records from a snapshot in a file
+
+    :param f: A file open for reading bytes
+    :returns: What was passed to :func:`dump`, with lists in place of tuples
+    """
+    header = f.read(len(MAGIC) + 1)
+    if header[:len(MAGIC)] != MAGIC:
+        raise ValueError("This isn't a pyiiif snapshot")
+    if header[len(MAGIC):] != bytes([VERSION]):
+        raise ValueError("Snapshot format version {} isn't supported".format(
+            header[len(MAGIC)] if len(header) > len(MAGIC) else None
+        ))
+    with gc_paused():
+        names, payload = _Unpickler(f).load()
+        try:
+            classes = [SNAPSHOT_CLASSES[name] for name in names]
+        except KeyError as e:
+            raise ValueError("Snapshots can't hold {} instances".format(e.args[0]))
+        return _unpack_value(payload, classes, {})
+
+
+def loads(data):
+    """
+    Restore records from a snapshot taken with :func:`dumps`
+    """
+    return load(io.BytesIO(data))
@@ -1,35 +1,48 @@
-import requests
-from functools import partial
-from threading import local
+import asyncio
+from collections import OrderedDict
+from threading import Lock
 
 from ..image_api.twodotone import ImageApiUrl
+from ..transport import Transport, get_default_transport
+from .streaming import iter_thumbnail_sources
 
 
-def update_record(rec, request_timeout=1/10):
+# How many info.json documents get_info keeps in memory
+INFO_CACHE_SIZE = 1024
+
+_info_cache = OrderedDict()
+_info_cache_lock = Lock()
+
+
+def update_record(rec, request_timeout=10, transport=None):
     """
     Updates a record from it's URI location
 
     :param dict/str rec: The record, or a record URI to resolve
     :param int request_timeout: How long to wait for a response for the server
         before raising a :class:`requests.exceptions.Timeout`
+    :param Transport transport: The transport to make requests with, defaults
+        to :func:`pyiiif.transport.get_default_transport`
     :rtype: dict
     :returns: The record, updated from the URL in its @id
     """
+    transport = transport or get_default_transport()
     if isinstance(rec, str):
-        rec = get_record(rec, request_timeout=request_timeout)
+        rec = get_record(rec, request_timeout=request_timeout,
+                         transport=transport)
     # This is a little weird in the instance where the initial
     # input is a string, but in theory I think we make this
     # request again, derived from the record @id, in case the @id
     # in the record we just downloaded is different from what was
     # passed to the function.
-    resp = requests.get(rec['@id'])
+    resp = transport.get(rec['@id'], timeout=request_timeout)
     resp.raise_for_status()
     updated_rec = resp.json()
     rec.update(updated_rec)
     return rec
 
 
-def get_record(uri, request_timeout=1/10, update=False):
+def get_record(uri, request_timeout=10, update=False, transport=None):
     """
     Retrieves a record from a URL
 
@@ -38,17 +51,214 @@ def get_record(uri, request_timeout=1/10, update=False):
         before raising a :class:`requests.exceptions.Timeout`
     :param bool update: Whether or not to update the record from it's @id URI
         after retrieving it initially.
+    :param Transport transport: The transport to make requests with, defaults
+        to :func:`pyiiif.transport.get_default_transport`
     """
-    resp = requests.get(uri)
+    transport = transport or get_default_transport()
+    resp = transport.get(uri, timeout=request_timeout)
     resp.raise_for_status()
     rj = resp.json()
     if update:
-        rj = update_record(rj, request_timeout=request_timeout)
+        rj = update_record(rj, request_timeout=request_timeout,
+                           transport=transport)
     return rj
 
 
+def get_info(uri, request_timeout=10, transport=None):
+    """
+    Retrieves the info.json document of an image
+
+    Info documents rarely change, so the most recently used ones are kept
+    in memory and only fetched again once they've fallen out of the cache.
+
+    :param str uri: The image's info URL, or any image URL for it
+    :param int request_timeout: How long to wait for a response for the server
+        before raising a :class:`requests.exceptions.Timeout`
+    :param Transport transport: The transport to make requests with, defaults
+        to :func:`pyiiif.transport.get_default_transport`
+    :rtype: dict
+    """
+    info_url = ImageApiUrl.from_url(uri).to_info_url()
+    with _info_cache_lock:
+        if info_url in _info_cache:
+            _info_cache.move_to_end(info_url)
+            return _info_cache[info_url]
+    info = get_record(info_url, request_timeout=request_timeout,
+                      transport=transport)
+    _cache_info(info_url, info)
+    return info
+
+
+async def aget_info(uri, request_timeout=10, transport=None):
+    """
+    The asyncio counterpart of :func:`get_info`
+    """
+    info_url = ImageApiUrl.from_url(uri).to_info_url()
+    with _info_cache_lock:
+        if info_url in _info_cache:
+            _info_cache.move_to_end(info_url)
+            return _info_cache[info_url]
+    info = await aget_record(info_url, request_timeout=request_timeout,
+                             transport=transport)
+    _cache_info(info_url, info)
+    return info
+
+
+def _cache_info(info_url, info):
+    with _info_cache_lock:
+        _info_cache[info_url] = info
+        while len(_info_cache) > INFO_CACHE_SIZE:
+            _info_cache.popitem(last=False)
+
+
+def choose_size(sizes, width, height, preserve_ratio=True):
+    """
+    Picks a size from the ``sizes`` list of an info.json document
+
+    Image servers can answer requests for the sizes they list without
+    rendering a new derivative, so this picks the smallest of them which
+    is at least as big as the requested size. If none is big enough the
+    largest is picked.
+
+    :param list sizes: The sizes, dicts with "width" and "height" keys
+    :param int width: The requested width, in pixels
+    :param int height: The requested height, in pixels
+    :param bool preserve_ratio: If True, consider width and height to be
+        the box the image has to fit in, rather than exact dimensions
+    :rtype: tuple
+    :returns: A (width, height) tuple, or None if there are no sizes
+    """
+    sizes = [(s['width'], s['height']) for s in sizes
+             if s.get('width') and s.get('height')]
+    if not sizes:
+        return None
+    if preserve_ratio:
+        # Listed sizes keep the aspect ratio of the image, so whichever
+        # of the dimensions limits the fit reaching its target is enough
+        big_enough = [s for s in sizes if s[0] >= width or s[1] >= height]
+    else:
+        big_enough = [s for s in sizes if s[0] >= width and s[1] >= height]
+    if big_enough:
+        return min(big_enough, key=lambda s: s[0] * s[1])
+    return max(sizes, key=lambda s: s[0] * s[1])
+
+
+def _hardcoded_image(rec, allow_non_iiif):
+    """
+    Finds the thumbnail explicitly set on a record
+
+    :param dict rec: The record
+    :param bool allow_non_iiif: See :func:`get_hardcoded_thumbnail`
+    :returns: An :class:`ImageApiUrl` for IIIF thumbnails, a str for
+        others, or None
+    """
+    if not rec.get("thumbnail"):
+        return None
+    # If the thumbnail claims the IIIF Image API Service use it
+    if rec['thumbnail'].get("service") and \
+            rec['thumbnail']['service'].get("@context") in  \
+            ["http://iiif.io/api/image/2/context.json"]:
+        return ImageApiUrl.from_url(rec['thumbnail']['@id'])
+    # Otherwise it's just a link in the @id field
+    # Return this only if allowed explicitly
+    else:
+        if allow_non_iiif:
+            if rec['thumbnail'].get("@id"):
+                return rec['thumbnail']['@id']
+
+
+def _annotation_image(rec):
+    """
+    Finds the image resource of an annotation
+
+    :param dict rec: The oa:Annotation record
+    :returns: An :class:`ImageApiUrl`, or None
+    """
+    # Be sure we haven't stumbled into something
+    # that isn't an image
+    if rec.get("resource") is None:
+        return None
+    return ImageApiUrl.from_url(rec['resource']['@id'])
+
+
+def _sized_image(image, width, height, info=None):
+    """
+    Builds a thumbnail URL for an image found by :func:`_hardcoded_image`
+    or :func:`_annotation_image`
+
+    :param image: The image
+    :param str width: The width segment of the size parameter, already
+        prefixed with "!" if the ratio should be preserved
+    :param int height: The requested height of the thumbnail, in pixels
+    :param dict info: The image's info.json document, to pick one of its
+        pre-rendered sizes from
+    :rtype: str
+    """
+    if isinstance(image, str):
+        return image
+    size = None
+    if info and info.get("sizes"):
+        width = str(width)
+        size = choose_size(info['sizes'], int(width.lstrip("!")), height,
+                           preserve_ratio=width.startswith("!"))
+    if size:
+        image.size = "{},{}".format(*size)
+    else:
+        image.size = "{},{}".format(width, height)
+    return image.to_image_url()
+
+
+def _image_info(image, use_info_sizes, request_timeout, transport):
+    if not use_info_sizes or isinstance(image, str):
+        return None
+    try:
+        return get_info(image.to_info_url(), request_timeout=request_timeout,
+                        transport=transport)
+    except Exception:
+        return None
+
+
+async def _aimage_info(image, use_info_sizes, request_timeout, transport):
+    if not use_info_sizes or isinstance(image, str):
+        return None
+    try:
+        return await aget_info(image.to_info_url(),
+                               request_timeout=request_timeout,
+                               transport=transport)
+    except Exception:
+        return None
+
+
+def _first_child(rec):
+    """
+    Picks the child record a thumbnail search should descend into
+
+    :param dict rec: The record
+    :returns: The child record (or its URI), or None if there isn't one
+    """
+    if rec['@type'] == "sc:Collection":
+        # prefer the first member, if it exists, otherwise try for
+        # manifests and finally check for subcollections
+        for key in ("members", "manifests", "collections"):
+            if rec.get(key):
+                return rec[key][0]
+        # paged collections list their entries on their pages
+        return rec.get('first')
+    elif rec['@type'] == "sc:Manifest":
+        # sequences MUST be > 0
+        return rec['sequences'][0]
+    elif rec['@type'] == "sc:Sequence":
+        # canvases MUST be > 0
+        return rec['canvases'][0]
+    elif rec['@type'] == "sc:Canvas":
+        if rec.get('images'):
+            return rec['images'][0]
+    return None
+
+
 def get_hardcoded_thumbnail(rec, width=200, height=200, preserve_ratio=True,
-                            request_timeout=1/10, allow_non_iiif=False):
+                            request_timeout=10, allow_non_iiif=False,
+                            transport=None, use_info_sizes=False):
     """
     Retrieves **only** explicitly delineated thumbnails from records
 
@@ -65,37 +275,34 @@ def get_hardcoded_thumbnail(rec, width=200, height=200, preserve_ratio=True,
         aren't IIIF URLs - this means that if a record hard codes a static
         image link as a thumbnail you'll get that back, even if it isn't below
         the requested width/height
+    :param Transport transport: The transport to make requests with, defaults
+        to :func:`pyiiif.transport.get_default_transport`
+    :param bool use_info_sizes: If True, look up the image's info.json and
+        ask for the pre-rendered size :func:`choose_size` picks, if it
+        lists any, so the image server doesn't have to render a new one
     """
     # If no thumbnail dict bail out
     if isinstance(rec, str):
-        rec = get_record(rec, request_timeout=request_timeout, update=True)
-    if not rec.get("thumbnail"):
-        return None
+        rec = get_record(rec, request_timeout=request_timeout, update=True,
+                         transport=transport)
     if preserve_ratio:
         width = "!"+str(width)
-    # If the thumbnail claims the IIIF Image API Service use it
-    if rec['thumbnail'].get("service") and \
-            rec['thumbnail']['service'].get("@context") in  \
-            ["http://iiif.io/api/image/2/context.json"]:
-        u = ImageApiUrl.from_url(rec['thumbnail']['@id'])
-        u.size = "{},{}".format(width, height)
-        return u.to_image_url()
-    # Otherwise it's just a link in the @id field
-    # Return this only if allowed explicitly
-    else:
-        if allow_non_iiif:
-            if rec['thumbnail'].get("@id"):
-                return rec['thumbnail']['@id']
+    image = _hardcoded_image(rec, allow_non_iiif)
+    if image is None:
+        return None
+    info = _image_info(image, use_info_sizes, request_timeout, transport)
+    return _sized_image(image, width, height, info)
 
 
 def get_thumbnail(rec, width=200, height=200, preserve_ratio=True,
-                  request_timeout=1/10, allow_non_iiif=False,
-                  _traversed=local()):
+                  request_timeout=10, allow_non_iiif=False,
+                  transport=None, memo=None, max_depth=32,
+                  use_info_sizes=False):
     """
     Retrieve a thumbnail from any IIIF Presentation API Record
 
     Retrieves/prefers explicitly specified thumbnails, but will
-    recurse through the record tree looking for a asset with a thumbnail
+    walk down the record tree looking for a asset with a thumbnail
     (or to turn into a thumbnail) otherwise.
 
     :param dict/str rec: A record representing an object to retrieve
@@ -111,81 +318,317 @@ def get_thumbnail(rec, width=200, height=200, preserve_ratio=True,
         aren't IIIF URLs - this means that if a record hard codes a static
         image link as a thumbnail you'll get that back, even if it isn't below
         the requested width/height
-    :param threading.local _traversed: A local namespace (in case this function
-        is threaded) which stores the route the function has traversed, in order
-        to facilitate fast failing in the event of a cyclic record structure.
-        This function handles setting up and utilizing this variable internally.
+    :param Transport transport: The transport to make requests with, defaults
+        to :func:`pyiiif.transport.get_default_transport`
+    :param dict memo: If supplied, thumbnails already found for a record
+        @id (or URI) are taken from here, and every record on the path to a
+        newly found thumbnail is added to it. Only share a memo between
+        calls asking for the same size.
+    :param int max_depth: How many records deep to look before giving up
+    :param bool use_info_sizes: See :func:`get_hardcoded_thumbnail`
     """
     if preserve_ratio:
         width = "!"+str(width)
-    # If we pass an identifier just try and
-    # get the record from the identifier.
-    if isinstance(rec, str):
-        rec = get_record(rec, request_timeout=request_timeout)
-    # Ignore if (TODO: certain?) records can't be dereferenced
-    try:
-        rec = update_record(rec)
-    except:
-        pass
-
-    # Fail fast on cyclic records
-    if hasattr(_traversed, 'ids'):
-        if rec['@id'] in _traversed.ids:
-            print("encountered record twice: {}".format(rec['@id']))
-            return None
-    else:
-        _traversed.ids = []
-    _traversed.ids.append(rec['@id'])
+    # The ids seen on the way down, so cyclic records fail fast, and the
+    # keys to memoize the result under
+    traversed = set()
+    path = []
+    tn = None
+    while rec is not None and len(traversed) < max_depth:
+        key = rec if isinstance(rec, str) else rec.get('@id')
+        if memo is not None and memo.get(key):
+            tn = memo[key]
+            break
+        # If we pass an identifier just try and
+        # get the record from the identifier.
+        if isinstance(rec, str):
+            rec = get_record(rec, request_timeout=request_timeout,
+                             transport=transport)
+        # Ignore if (TODO: certain?) records can't be dereferenced
+        try:
+            rec = update_record(rec, request_timeout=request_timeout,
+                                transport=transport)
+        except Exception:
+            pass
+        # Fail fast on cyclic records
+        if rec['@id'] in traversed:
+            break
+        traversed.add(rec['@id'])
+        path.extend((key, rec['@id']))
+        # If one is hardcoded
+        image = _hardcoded_image(rec, allow_non_iiif)
+        # We made it!
+        if image is None and rec['@type'] == "oa:Annotation":
+            image = _annotation_image(rec)
+            if image is None:
+                break
+        if image is not None:
+            info = _image_info(image, use_info_sizes, request_timeout,
+                               transport)
+            tn = _sized_image(image, width, height, info)
+            break
+        rec = _first_child(rec)
+    if memo is not None and tn:
+        for key in path:
+            memo[key] = tn
+    return tn
 
-    # If one is hardcoded
-    hctn = get_hardcoded_thumbnail(
-        rec, width=width, height=height,
-        preserve_ratio=False, allow_non_iiif=allow_non_iiif
-    )
-    if hctn:
-        return hctn
-    # Handy partial - otherwise this turns into an unreadable mess
-    # Note we _never_ pass preserve ratio here - if the caller wanted
-    # it it's already been handled by the function the operation isn't
-    # idempotent
-    get_tn = partial(
-        get_thumbnail,
-        width=width, height=height,
+
+def get_thumbnail_streaming(uri, width=200, height=200, preserve_ratio=True,
+                            request_timeout=10, allow_non_iiif=False,
+                            transport=None, use_info_sizes=False,
+                            chunk_size=64*1024):
+    """
+    Retrieve a thumbnail for the record at a URL, reading as little of it as
+    possible
+
+    Rather than downloading and decoding the whole record, the response is
+    scanned as it arrives (see
+    :func:`pyiiif.pres_api.streaming.iter_thumbnail_sources`) and the
+    connection is dropped as soon as a usable thumbnail or first image
+    turns up. The first one in document order wins, so a manifest which
+    lists its thumbnail after its sequences gets its first image as a
+    thumbnail. If the record only references its first child, the search
+    continues from that child with :func:`get_thumbnail`.
+
+    :param str uri: The URL of the record
+    :param int chunk_size: How many bytes to read from the response at a time
+
+    See :func:`get_thumbnail` for a description of the other parameters.
+    """
+    transport = transport or get_default_transport()
+    if preserve_ratio:
+        width = "!"+str(width)
+    image = child = None
+    resp = transport.get(uri, timeout=request_timeout, stream=True)
+    try:
+        resp.raise_for_status()
+        sources = iter_thumbnail_sources(resp.iter_content(chunk_size))
+        for kind, value in sources:
+            if kind == "thumbnail":
+                image = _hardcoded_image({"thumbnail": value}, allow_non_iiif)
+            elif kind == "image":
+                image = _annotation_image(value)
+            else:
+                child = value
+            if image is not None or child is not None:
+                break
+    finally:
+        resp.close()
+    if image is not None:
+        info = _image_info(image, use_info_sizes, request_timeout, transport)
+        return _sized_image(image, width, height, info)
+    # Nothing turned up in the record itself, so fall back to walking the
+    # tree from whatever it points to - or from the record itself
+    return get_thumbnail(
+        child if child is not None else uri, width=width, height=height,
         preserve_ratio=False, request_timeout=request_timeout,
-        allow_non_iiif=allow_non_iiif,
-        _traversed=_traversed
+        allow_non_iiif=allow_non_iiif, transport=transport,
+        use_info_sizes=use_info_sizes
     )
-    # Recurse, depending on record type
-    if rec['@type'] == "sc:Collection":
-        # prefer the first member, if it exists
-        if rec.get("members"):
-            return get_tn(rec['members'][0])
-        # otherwise try for manifests
-        elif rec.get("manifests"):
-            return get_tn(rec['manifests'][0])
-        # finally check for subcollections
-        elif rec.get("collections"):
-            return get_tn(rec['collections'][0])
-        else:
-            return None
-    elif rec['@type'] == "sc:Manifest":
-        # sequences MUST be > 0
-        return get_tn(rec['sequences'][0])
-    elif rec['@type'] == "sc:Sequence":
-        # canvases MUST be > 0
-        return get_tn(rec['canvases'][0])
-    elif rec['@type'] == "sc:Canvas":
-        if rec.get('images'):
-            return get_tn(rec['images'][0])
-        else:
-            return None
-    # We made it!
-    elif rec['@type'] == "oa:Annotation":
-        # Be sure we haven't stumbled into something
-        # that isn't an image
-        if rec.get("resource") is None:
-            return None
-        x = rec['resource']['@id']
-        u = ImageApiUrl.from_url(x)
-        u.size = "{},{}".format(width, height)
-        return u.to_image_url()
+
+
+async def aupdate_record(rec, request_timeout=10, transport=None):
+    """
+    The asyncio counterpart of :func:`update_record`
+
+    :param dict/str rec: The record, or a record URI to resolve
+    :param int request_timeout: How long to wait for a response for the server
+        before raising a :class:`requests.exceptions.Timeout`
+    :param Transport transport: The transport to make requests with, defaults
+        to :func:`pyiiif.transport.get_default_transport`
+    :rtype: dict
+    :returns: The record, updated from the URL in its @id
+    """
+    transport = transport or get_default_transport()
+    if isinstance(rec, str):
+        rec = await aget_record(rec, request_timeout=request_timeout,
+                                transport=transport)
+    resp = await transport.aget(rec['@id'], timeout=request_timeout)
+    resp.raise_for_status()
+    rec.update(resp.json())
+    return rec
+
+
+async def aget_record(uri, request_timeout=10, update=False, transport=None):
+    """
+    The asyncio counterpart of :func:`get_record`
+
+    :param str uri: The URL to retrieve the record from
+    :param int request_timeout: How long to wait for a response for the server
+        before raising a :class:`requests.exceptions.Timeout`
+    :param bool update: Whether or not to update the record from it's @id URI
+        after retrieving it initially.
+    :param Transport transport: The transport to make requests with, defaults
+        to :func:`pyiiif.transport.get_default_transport`
+    """
+    transport = transport or get_default_transport()
+    resp = await transport.aget(uri, timeout=request_timeout)
+    resp.raise_for_status()
+    rj = resp.json()
+    if update:
+        rj = await aupdate_record(rj, request_timeout=request_timeout,
+                                  transport=transport)
+    return rj
+
+
+async def aget_hardcoded_thumbnail(rec, width=200, height=200,
+                                   preserve_ratio=True, request_timeout=10,
+                                   allow_non_iiif=False, transport=None,
+                                   use_info_sizes=False):
+    """
+    The asyncio counterpart of :func:`get_hardcoded_thumbnail`
+
+    See :func:`get_hardcoded_thumbnail` for a description of the parameters.
+    """
+    if isinstance(rec, str):
+        rec = await aget_record(rec, request_timeout=request_timeout,
+                                update=True, transport=transport)
+    if preserve_ratio:
+        width = "!"+str(width)
+    image = _hardcoded_image(rec, allow_non_iiif)
+    if image is None:
+        return None
+    info = await _aimage_info(image, use_info_sizes, request_timeout,
+                              transport)
+    return _sized_image(image, width, height, info)
+
+
+async def aget_thumbnail(rec, width=200, height=200, preserve_ratio=True,
+                         request_timeout=10, allow_non_iiif=False,
+                         transport=None, memo=None, max_depth=32,
+                         use_info_sizes=False):
+    """
+    The asyncio counterpart of :func:`get_thumbnail`
+
+    See :func:`get_thumbnail` for a description of the parameters.
+    """
+    if preserve_ratio:
+        width = "!"+str(width)
+    traversed = set()
+    path = []
+    tn = None
+    while rec is not None and len(traversed) < max_depth:
+        key = rec if isinstance(rec, str) else rec.get('@id')
+        if memo is not None and memo.get(key):
+            tn = memo[key]
+            break
+        if isinstance(rec, str):
+            rec = await aget_record(rec, request_timeout=request_timeout,
+                                    transport=transport)
+        # Ignore if (TODO: certain?) records can't be dereferenced
+        try:
+            rec = await aupdate_record(rec, request_timeout=request_timeout,
+                                       transport=transport)
+        except Exception:
+            pass
+        # Fail fast on cyclic records
+        if rec['@id'] in traversed:
+            break
+        traversed.add(rec['@id'])
+        path.extend((key, rec['@id']))
+        image = _hardcoded_image(rec, allow_non_iiif)
+        if image is None and rec['@type'] == "oa:Annotation":
+            image = _annotation_image(rec)
+            if image is None:
+                break
+        if image is not None:
+            info = await _aimage_info(image, use_info_sizes, request_timeout,
+                                      transport)
+            tn = _sized_image(image, width, height, info)
+            break
+        rec = _first_child(rec)
+    if memo is not None and tn:
+        for key in path:
+            memo[key] = tn
+    return tn
+
+
+class _BatchTransport(Transport):
+    """
+    Wraps a transport for the duration of a batch of lookups
+
+    Every URL is requested at most once; requests for a URL which is
+    already in flight wait for that response instead of being repeated.
+    At most ``concurrency`` requests are in flight at any time.
+    """
+    def __init__(self, transport, concurrency):
+        self.transport = transport
+        self.concurrency = concurrency
+        self._semaphore = None
+        self._responses = {}
+
+    def get(self, uri, timeout=None, stream=False):
+        if uri not in self._responses:
+            self._responses[uri] = self.transport.get(uri, timeout=timeout)
+        return self._responses[uri]
+
+    async def _fetch(self, uri, timeout):
+        async with self._semaphore:
+            return await self.transport.aget(uri, timeout=timeout)
+
+    async def aget(self, uri, timeout=None):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        if uri not in self._responses:
+            self._responses[uri] = asyncio.ensure_future(
+                self._fetch(uri, timeout)
+            )
+        return await self._responses[uri]
+
+
+async def aget_thumbnails(records, width=200, height=200, preserve_ratio=True,
+                          request_timeout=10, allow_non_iiif=False,
+                          concurrency=16, return_exceptions=False,
+                          transport=None, use_info_sizes=False):
+    """
+    Retrieve thumbnails for many records at once
+
+    All the lookups run concurrently and share their work: each URL is
+    fetched at most once for the whole batch, so sub-collections and
+    manifests shared between records are only downloaded one time, and a
+    thumbnail found for any record on the way down is reused by every other
+    lookup that reaches that record.
+
+    :param list records: The records (or record URLs) to find thumbnails for
+    :param int concurrency: The maximum number of requests in flight
+    :param bool return_exceptions: If True, a lookup which raises puts its
+        exception in the results instead of aborting the whole batch
+    :rtype: list
+    :returns: The thumbnails, in the same order as ``records``, with None
+        for records no thumbnail could be found for
+
+    See :func:`get_thumbnail` for a description of the other parameters.
+    """
+    batch = _BatchTransport(transport or get_default_transport(), concurrency)
+    memo = {}
+    return await asyncio.gather(*[
+        aget_thumbnail(rec, width=width, height=height,
+                       preserve_ratio=preserve_ratio,
+                       request_timeout=request_timeout,
+                       allow_non_iiif=allow_non_iiif,
+                       transport=batch, memo=memo,
+                       use_info_sizes=use_info_sizes)
+        for rec in records
+    ], return_exceptions=return_exceptions)
+
+
+def get_thumbnails(records, width=200, height=200, preserve_ratio=True,
+                   request_timeout=10, allow_non_iiif=False,
+                   concurrency=16, return_exceptions=False, transport=None,
+                   use_info_sizes=False):
+    """
+    The blocking counterpart of :func:`aget_thumbnails`
+
+    Runs the batch in an event loop of its own, so it can't be called from
+    code which is already running in an event loop - await
+    :func:`aget_thumbnails` there instead.
+
+    See :func:`aget_thumbnails` for a description of the parameters.
+    """
+    return asyncio.run(aget_thumbnails(
+        records, width=width, height=height, preserve_ratio=preserve_ratio,
+        request_timeout=request_timeout, allow_non_iiif=allow_non_iiif,
+        concurrency=concurrency, return_exceptions=return_exceptions,
+        transport=transport, use_info_sizes=use_info_sizes
+    ))
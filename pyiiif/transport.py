@@ -0,0 +1,736 @@
+"""
+Pluggable HTTP transports used by pyiiif whenever it needs to reach the network
+
+Every function that fetches a record or an image info document accepts a
+``transport`` argument. When it is omitted the module-wide default
+(see :func:`get_default_transport`) is used. Transports can be layered:
+:class:`ResilientTransport`, for instance, adds retries, hedging and
+circuit breaking to whichever transport it wraps.
+
+Requests are made at a priority - :data:`INTERACTIVE` unless the caller
+has said otherwise with :func:`fetch_priority` - and the default transport
+lets interactive requests jump ahead of queued :data:`BATCH` ones (see
+:class:`PriorityScheduler`).
+
+A transport returns response objects that behave like
+:class:`requests.Response` - they expose ``status_code``, ``content``,
+``json()``, ``raise_for_status()``, ``iter_content()`` and ``close()``.
+"""
+
+import asyncio
+import contextvars
+import json
+import random
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import contextmanager
+from functools import partial
+from threading import Condition, Lock
+from urllib.parse import urlparse
+
+import requests
+
+from .exceptions import CircuitOpenError
+
+
+# Responses with these status codes are worth trying again
+RETRY_STATUS_CODES = (429, 502, 503, 504)
+
+# Responses with these status codes mean a server wants fewer requests
+CONGESTION_STATUS_CODES = (429, 503)
+
+# Priority classes, highest first
+INTERACTIVE = "interactive"
+BATCH = "batch"
+
+_priority = contextvars.ContextVar("pyiiif_fetch_priority",
+                                   default=INTERACTIVE)
+
+
+def current_priority():
+    """
+    :rtype: str
+    :returns: The priority requests made from here are made at
+    """
+    return _priority.get()
+
+
+@contextmanager
+def fetch_priority(priority):
+    """
+    Make the requests made inside a ``with`` block at the given priority
+
+    The priority follows the block into coroutines and into threads started
+    with :meth:`Transport.aget`, but not into threads the caller starts
+    itself - those have to enter a block of their own.
+
+    :param str priority: The priority class, e.g. :data:`BATCH`
+    """
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class Transport(ABC):
+    """
+    The interface every pyiiif transport implements
+
+    Subclasses must implement :meth:`get`, or they can't be instantiated.
+    :meth:`aget` defaults to running :meth:`get` in the event loop's
+    executor, so any blocking transport can be awaited without blocking the
+    loop. Transports which can do non-blocking I/O natively should override
+    :meth:`aget` as well.
+    """
+    @abstractmethod
+    def get(self, uri, timeout=None, stream=False):
+        """
+        Perform a GET request
+
+        :param str uri: The URL to request
+        :param float timeout: How long to wait for the server, in seconds
+        :param bool stream: Whether or not the body may be read lazily
+            via ``iter_content()`` rather than eagerly
+        :returns: A response object
+        """
+
+    async def aget(self, uri, timeout=None):
+        """
+        Perform a GET request without blocking the running event loop
+
+        :param str uri: The URL to request
+        :param float timeout: How long to wait for the server, in seconds
+        :returns: A response object
+        """
+        loop = asyncio.get_running_loop()
+        # Carry the caller's context, and so its priority, into the thread
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(
+            None, partial(context.run, self.get, uri, timeout=timeout)
+        )
+
+
+class RequestsTransport(Transport):
+    """
+    A transport backed by a :class:`requests.Session`
+
+    Sharing one session lets consecutive requests to the same host reuse
+    their connections.
+    """
+    def __init__(self, session=None):
+        """
+        :param requests.Session session: The session to issue requests
+            through. A new one is created if none is supplied.
+        """
+        self.session = session or requests.Session()
+
+    def get(self, uri, timeout=None, stream=False):
+        return self.session.get(uri, timeout=timeout, stream=stream)
+
+
+def _host(uri):
+    return urlparse(uri).netloc
+
+
+def _close(future):
+    if future.exception() is None:
+        future.result().close()
+
+
+class CircuitBreaker:
+    """
+    Keeps track of which hosts are failing, so requests to them can fail fast
+
+    After ``failure_threshold`` consecutive failures the circuit for a host
+    opens, and for the next ``reset_timeout`` seconds :meth:`allow` raises
+    :class:`pyiiif.exceptions.CircuitOpenError` rather than letting a request
+    through. After that a single trial request is allowed: if it succeeds
+    the circuit closes again, if it fails the circuit stays open for another
+    ``reset_timeout`` seconds.
+    """
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        """
+        :param int failure_threshold: How many consecutive failures open
+            the circuit for a host
+        :param float reset_timeout: How long a circuit stays open before a
+            trial request is let through, in seconds
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = {}
+        self._opened = {}
+        self._trials = set()
+        self._lock = Lock()
+
+    def is_open(self, host):
+        """
+        :param str host: The host, as in the netloc of a URL
+        :rtype: bool
+        """
+        with self._lock:
+            return host in self._opened
+
+    def allow(self, host):
+        """
+        Raise :class:`pyiiif.exceptions.CircuitOpenError` if no request
+        should be made to a host right now
+
+        :param str host: The host, as in the netloc of a URL
+        """
+        with self._lock:
+            opened = self._opened.get(host)
+            if opened is None:
+                return
+            if host not in self._trials and \
+                    time.monotonic() - opened >= self.reset_timeout:
+                self._trials.add(host)
+                return
+        raise CircuitOpenError("{} is failing, not requesting it".format(host))
+
+    def record_success(self, host):
+        with self._lock:
+            self._failures.pop(host, None)
+            self._opened.pop(host, None)
+            self._trials.discard(host)
+
+    def record_failure(self, host):
+        with self._lock:
+            self._trials.discard(host)
+            self._failures[host] = self._failures.get(host, 0) + 1
+            if host in self._opened or \
+                    self._failures[host] >= self.failure_threshold:
+                self._opened[host] = time.monotonic()
+
+
+class LatencyTracker:
+    """
+    Keeps the most recent response times observed for a host
+    """
+    def __init__(self, window=200):
+        """
+        :param int window: How many response times to keep
+        """
+        self._samples = deque(maxlen=window)
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._samples)
+
+    def add(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, p):
+        """
+        :param float p: The percentile, between 0 and 1
+        :rtype: float
+        :returns: The response time, in seconds, or None without samples
+        """
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples)-1, int(p * len(samples)))]
+
+
+class AdaptiveLimiter:
+    """
+    Limits how many requests may be in flight to each host at once, and
+    adapts each limit to how the host is coping
+
+    Limits follow an additive increase, multiplicative decrease (AIMD)
+    scheme: each request answered without signs of congestion raises the
+    limit for its host by ``1 / limit`` (so roughly by one for every full
+    window of requests), and each sign of congestion multiplies it by
+    ``backoff_ratio``. Signs of congestion are errors, 429 and 503
+    responses, and response times over ``latency_tolerance`` times the
+    host's usual (10th percentile) response time, or ``min_latency`` if
+    that's longer, so a host whose usual responses take next to no time
+    (e.g. answered from a cache) isn't seen as congested by every one
+    that doesn't.
+    """
+    def __init__(self, initial_limit=4, min_limit=1, max_limit=64,
+                 backoff_ratio=0.5, latency_tolerance=3.0, min_samples=10,
+                 min_latency=0.05):
+        """
+        :param int initial_limit: The limit for hosts not seen before
+        :param int min_limit: The lowest a limit can drop to
+        :param int max_limit: The highest a limit can rise to
+        :param float backoff_ratio: What a limit is multiplied by on
+            congestion
+        :param float latency_tolerance: How many times slower than usual a
+            response has to be to count as congestion, or None to ignore
+            response times
+        :param int min_samples: How many response times have to have been
+            seen for a host before they're taken into account
+        :param float min_latency: The shortest usual response time to
+            measure responses against, in seconds
+        """
+        self.initial_limit = initial_limit
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_ratio = backoff_ratio
+        self.latency_tolerance = latency_tolerance
+        self.min_samples = min_samples
+        self.min_latency = min_latency
+        self._limits = {}
+        self._in_flight = {}
+        self._latencies = {}
+        self._condition = Condition()
+
+    def limit(self, host):
+        """
+        :param str host: The host, as in the netloc of a URL
+        :rtype: int
+        :returns: How many requests may currently be in flight to the host
+        """
+        with self._condition:
+            return int(self._limits.get(host, self.initial_limit))
+
+    def in_flight(self, host):
+        """
+        :param str host: The host, as in the netloc of a URL
+        :rtype: int
+        """
+        with self._condition:
+            return self._in_flight.get(host, 0)
+
+    def acquire(self, host):
+        """
+        Wait until another request may be made to a host, and claim its slot
+
+        :param str host: The host, as in the netloc of a URL
+        """
+        with self._condition:
+            limit = self._limits.setdefault(host, self.initial_limit)
+            while self._in_flight.get(host, 0) >= int(limit):
+                self._condition.wait()
+                limit = self._limits[host]
+            self._in_flight[host] = self._in_flight.get(host, 0) + 1
+            self._latencies.setdefault(host, LatencyTracker())
+
+    def release(self, host, latency=None, congested=False):
+        """
+        Give back a slot claimed with :meth:`acquire`, adjusting the host's
+        limit according to how the request went
+
+        :param str host: The host, as in the netloc of a URL
+        :param float latency: How long the request took, in seconds
+        :param bool congested: Whether or not the request failed in a way
+            which suggests the host is overloaded
+        """
+        with self._condition:
+            tracker = self._latencies[host]
+            if latency is not None and self.latency_tolerance and \
+                    len(tracker) >= self.min_samples and \
+                    latency > self.latency_tolerance * \
+                    max(tracker.percentile(0.1), self.min_latency):
+                congested = True
+            if latency is not None:
+                tracker.add(latency)
+            limit = self._limits[host]
+            if congested:
+                limit = max(self.min_limit, limit * self.backoff_ratio)
+            else:
+                limit = min(self.max_limit, limit + 1 / limit)
+            self._limits[host] = limit
+            self._in_flight[host] -= 1
+            self._condition.notify_all()
+
+
+class LimitedTransport(Transport):
+    """
+    Wraps another transport so requests go through an
+    :class:`AdaptiveLimiter`
+    """
+    def __init__(self, transport=None, limiter=None):
+        """
+        :param Transport transport: The transport to wrap, defaults to a new
+            :class:`RequestsTransport`
+        :param AdaptiveLimiter limiter: The limiter, defaults to a new one.
+            Share one limiter between transports to share the limits.
+        """
+        self.transport = transport or RequestsTransport()
+        self.limiter = limiter or AdaptiveLimiter()
+
+    def get(self, uri, timeout=None, stream=False):
+        host = _host(uri)
+        self.limiter.acquire(host)
+        start = time.monotonic()
+        try:
+            resp = self.transport.get(uri, timeout=timeout, stream=stream)
+        except requests.exceptions.RequestException:
+            self.limiter.release(host, congested=True)
+            raise
+        except Exception:
+            self.limiter.release(host)
+            raise
+        self.limiter.release(
+            host, latency=time.monotonic() - start,
+            congested=resp.status_code in CONGESTION_STATUS_CODES
+        )
+        return resp
+
+
+class PriorityScheduler:
+    """
+    Shares a number of request slots between priority classes
+
+    At most ``max_concurrency`` requests are in flight at once, and at most
+    ``budgets[priority]`` of them at each priority. When a slot frees up it
+    goes to the longest waiting request of the highest priority class which
+    is within its budget, so queued batch requests never hold up
+    interactive ones. Giving batch requests a smaller budget than
+    ``max_concurrency`` keeps slots free for interactive requests even while
+    a bulk job is running.
+    """
+    def __init__(self, max_concurrency=16, budgets=None,
+                 priorities=(INTERACTIVE, BATCH)):
+        """
+        :param int max_concurrency: How many requests may be in flight at
+            once, across all priorities
+        :param dict budgets: How many requests may be in flight at once at
+            each priority. Priorities left out may use every slot. Defaults
+            to keeping a quarter of the slots for :data:`INTERACTIVE`.
+        :param tuple priorities: The priority classes, highest first
+        """
+        if budgets is None:
+            budgets = {BATCH: max(1, max_concurrency * 3 // 4)}
+        self.max_concurrency = max_concurrency
+        self.priorities = tuple(priorities)
+        self.budgets = {p: budgets.get(p, max_concurrency)
+                        for p in self.priorities}
+        self._in_flight = {p: 0 for p in self.priorities}
+        self._waiting = {p: deque() for p in self.priorities}
+        self._condition = Condition()
+
+    def in_flight(self, priority=None):
+        """
+        :param str priority: The priority class, or None for all of them
+        :rtype: int
+        """
+        with self._condition:
+            if priority is None:
+                return sum(self._in_flight.values())
+            return self._in_flight[priority]
+
+    def _may_start(self, priority, ticket):
+        if sum(self._in_flight.values()) >= self.max_concurrency:
+            return False
+        for p in self.priorities:
+            if p == priority:
+                return self._waiting[p][0] is ticket and \
+                    self._in_flight[p] < self.budgets[p]
+            if self._waiting[p] and self._in_flight[p] < self.budgets[p]:
+                return False
+
+    def acquire(self, priority=None):
+        """
+        Wait until a request may be made, and claim its slot
+
+        :param str priority: The priority class, defaults to
+            :func:`current_priority`
+        :rtype: str
+        :returns: The priority the slot was claimed at, to hand back to
+            :meth:`release`
+        """
+        if priority is None:
+            priority = current_priority()
+        if priority not in self._waiting:
+            raise ValueError("unknown priority {}".format(priority))
+        ticket = object()
+        with self._condition:
+            self._waiting[priority].append(ticket)
+            try:
+                while not self._may_start(priority, ticket):
+                    self._condition.wait()
+            finally:
+                self._waiting[priority].remove(ticket)
+            self._in_flight[priority] += 1
+        return priority
+
+    def release(self, priority):
+        """
+        Give back a slot claimed with :meth:`acquire`
+
+        :param str priority: The priority the slot was claimed at
+        """
+        with self._condition:
+            self._in_flight[priority] -= 1
+            self._condition.notify_all()
+
+
+class ScheduledTransport(Transport):
+    """
+    Wraps another transport so requests go through a
+    :class:`PriorityScheduler`
+    """
+    def __init__(self, transport=None, scheduler=None):
+        """
+        :param Transport transport: The transport to wrap, defaults to a new
+            :class:`RequestsTransport`
+        :param PriorityScheduler scheduler: The scheduler, defaults to a new
+            one. Share one scheduler between transports to share its slots.
+        """
+        self.transport = transport or RequestsTransport()
+        self.scheduler = scheduler or PriorityScheduler()
+
+    def get(self, uri, timeout=None, stream=False):
+        priority = self.scheduler.acquire()
+        try:
+            return self.transport.get(uri, timeout=timeout, stream=stream)
+        finally:
+            self.scheduler.release(priority)
+
+
+class ResilientTransport(Transport):
+    """
+    Wraps another transport to protect callers from slow or failing hosts
+
+    * Requests failing with a connection error, a timeout or one of
+      :data:`RETRY_STATUS_CODES` are retried up to ``retries`` times, after
+      an exponentially growing, randomly jittered pause.
+    * Once enough response times have been seen for a host, a request that
+      has taken longer than the ``hedge_percentile`` of them is duplicated,
+      and whichever copy answers first is used.
+    * A :class:`CircuitBreaker` makes requests to hosts which keep failing
+      fail fast instead of tying up the caller. Any other error is counted
+      as a failure and raised without retrying.
+    """
+    def __init__(self, transport=None, retries=2, backoff=0.1,
+                 max_backoff=5, hedge_percentile=0.95, hedge_after=None,
+                 hedge_min_samples=20, breaker=None, max_workers=32):
+        """
+        :param Transport transport: The transport to wrap, defaults to a new
+            :class:`RequestsTransport`
+        :param int retries: How many times to retry a failed request
+        :param float backoff: The base pause between retries, in seconds
+        :param float max_backoff: The longest pause between retries
+        :param float hedge_percentile: Which percentile of a host's response
+            times a request has to exceed to be hedged, or None to never
+            hedge requests
+        :param float hedge_after: Hedge requests which take longer than this
+            many seconds, regardless of the response times seen so far
+        :param int hedge_min_samples: How many response times have to have
+            been seen for a host before its requests are hedged
+        :param CircuitBreaker breaker: The circuit breaker to consult,
+            defaults to a new one
+        :param int max_workers: How many threads may be making hedged
+            requests at once
+        """
+        self.transport = transport or RequestsTransport()
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.hedge_percentile = hedge_percentile
+        self.hedge_after = hedge_after
+        self.hedge_min_samples = hedge_min_samples
+        self.breaker = breaker or CircuitBreaker()
+        self._latencies = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def latency(self, host):
+        """
+        :param str host: The host, as in the netloc of a URL
+        :rtype: :class:`LatencyTracker`
+        """
+        if host not in self._latencies:
+            self._latencies.setdefault(host, LatencyTracker())
+        return self._latencies[host]
+
+    def _hedge_delay(self, host):
+        if self.hedge_after is not None:
+            return self.hedge_after
+        if self.hedge_percentile is None:
+            return None
+        tracker = self.latency(host)
+        if len(tracker) < self.hedge_min_samples:
+            return None
+        return tracker.percentile(self.hedge_percentile)
+
+    def _pause(self, attempt):
+        # "Full jitter" - spreads retries from many callers out over time
+        # rather than having them arrive in synchronized waves
+        time.sleep(random.uniform(
+            0, min(self.max_backoff, self.backoff * 2 ** attempt)
+        ))
+
+    def _hedged_get(self, host, uri, timeout, stream):
+        delay = self._hedge_delay(host)
+        get = partial(self.transport.get, uri, timeout=timeout, stream=stream)
+        start = time.monotonic()
+        if delay is None:
+            resp = get()
+        else:
+            context = contextvars.copy_context()
+            pending = {self._executor.submit(context.copy().run, get)}
+            done, pending = wait(pending, timeout=delay)
+            if not done:
+                pending.add(self._executor.submit(context.copy().run, get))
+            resp = error = None
+            while resp is None and (done or pending):
+                if not done:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is not None:
+                        error = future.exception()
+                    elif resp is None:
+                        resp = future.result()
+                    else:
+                        future.result().close()
+                done = set()
+            # Don't leave the slower copy's connection open
+            for future in pending:
+                future.add_done_callback(_close)
+            if resp is None:
+                raise error
+        self.latency(host).add(time.monotonic() - start)
+        return resp
+
+    def get(self, uri, timeout=None, stream=False):
+        host = _host(uri)
+        attempt = 0
+        while True:
+            self.breaker.allow(host)
+            try:
+                resp = self._hedged_get(host, uri, timeout, stream)
+            except requests.exceptions.RequestException:
+                self.breaker.record_failure(host)
+                if attempt >= self.retries:
+                    raise
+            except BaseException:
+                # Not worth retrying, but it still has to end a trial request,
+                # or the host's circuit could never close again
+                self.breaker.record_failure(host)
+                raise
+            else:
+                if resp.status_code not in RETRY_STATUS_CODES:
+                    self.breaker.record_success(host)
+                    return resp
+                self.breaker.record_failure(host)
+                if attempt >= self.retries:
+                    return resp
+                resp.close()
+            self._pause(attempt)
+            attempt += 1
+
+
+class StaticResponse:
+    """
+    A minimal stand-in for :class:`requests.Response`, as returned by
+    :class:`StaticTransport`
+    """
+    def __init__(self, url, status_code=200, content=b""):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8")
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if 400 <= self.status_code:
+            raise requests.exceptions.HTTPError(
+                "{} Error for url: {}".format(self.status_code, self.url),
+                response=self
+            )
+
+    def iter_content(self, chunk_size=1):
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i:i+chunk_size]
+
+    def close(self):
+        pass
+
+
+class StaticTransport(Transport):
+    """
+    An in-process transport which serves canned documents
+
+    Useful for tests and for working offline. URLs which have not been
+    registered answer with a 404.
+    """
+    def __init__(self, documents=None, delay=0):
+        """
+        :param dict documents: A mapping of URLs to documents. A document is
+            either a JSON-serializable object, a str or bytes body, or a
+            ``(status_code, document)`` tuple.
+        :param float delay: How long every request should take, in seconds
+        """
+        self.documents = {}
+        self.delay = delay
+        self.calls = []
+        for uri, doc in (documents or {}).items():
+            self.add(uri, doc)
+
+    def add(self, uri, doc, status_code=200):
+        """
+        Register a document
+
+        :param str uri: The URL to serve the document at
+        :param doc: The document - see :meth:`__init__`
+        :param int status_code: The status code to answer with
+        """
+        if isinstance(doc, tuple):
+            status_code, doc = doc
+        if isinstance(doc, str):
+            doc = doc.encode("utf-8")
+        elif not isinstance(doc, bytes):
+            doc = json.dumps(doc).encode("utf-8")
+        self.documents[uri] = (status_code, doc)
+
+    def _respond(self, uri):
+        self.calls.append(uri)
+        status_code, content = self.documents.get(uri, (404, b""))
+        return StaticResponse(uri, status_code, content)
+
+    def get(self, uri, timeout=None, stream=False):
+        if self.delay:
+            time.sleep(self.delay)
+        return self._respond(uri)
+
+    async def aget(self, uri, timeout=None):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return self._respond(uri)
+
+
+_default_transport = None
+
+
+def get_default_transport():
+    """
+    Return the transport used when a caller doesn't supply one
+
+    Unless it has been replaced, this is a :class:`ScheduledTransport`
+    wrapping a :class:`ResilientTransport` wrapping a
+    :class:`LimitedTransport` wrapping a :class:`RequestsTransport`, so
+    every request pyiiif makes is scheduled by priority and subject to per
+    host concurrency limits.
+
+    :rtype: :class:`Transport`
+    """
+    global _default_transport
+    if _default_transport is None:
+        _default_transport = ScheduledTransport(ResilientTransport(
+            LimitedTransport(RequestsTransport())
+        ))
+    return _default_transport
+
+
+def set_default_transport(transport):
+    """
+    Replace the transport used when a caller doesn't supply one
+
+    :param Transport transport: The new default, or None to go back to a
+        fresh one
+    """
+    global _default_transport
+    _default_transport = transport
@@ -1,3 +1,5 @@
+import gc
+from contextlib import contextmanager
 from urllib.request import quote, unquote
 from pyiiif.constants import valid_contexts
 
@@ -36,3 +38,19 @@ def convert_context_url_into_lookup(a_url):
             return key
     return None
 
+
+@contextmanager
+def gc_paused():
+    """
+    Keeps the cyclic garbage collector from running while it's in effect
+
+    Building hundreds of thousands of objects, none of which can be garbage
+    yet, otherwise sets off collections which repeatedly scan all of them.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
@@ -0,0 +1,59 @@
+"""Test module for building manifests in bulk
+"""
+
+import io
+import json
+import unittest
+
+from pyiiif.pres_api.twodotone.bulk import build_manifest, build_manifest_dict, \
+    build_manifest_json, rows_from_columns, rows_from_csv
+from pyiiif.pres_api.twodotone.records import Canvas, Manifest
+from pyiiif.transport import StaticTransport, set_default_transport
+
+
+URI = "http://example.org/manifest"
+IMAGES = "https://example.org/iiif"
+CSV = """identifier,width,height,label
+apf/1/apf1-00001.tif,1000,1500,p. 1
+apf/1/apf1-00002.tif,1024,1536,p. 2
+"""
+
+
+class Tests(unittest.TestCase):
+    def setUp(self):
+        self.transport = StaticTransport()
+        set_default_transport(self.transport)
+
+    def tearDown(self):
+        set_default_transport(None)
+
+    def testBuildsDict(self):
+        manifest = build_manifest_dict(URI, rows_from_csv(io.StringIO(CSV)), IMAGES,
+                                       label="APF 1")
+        self.assertEqual(manifest["label"], "APF 1")
+        canvas = manifest["sequences"][0]["canvases"][1]
+        self.assertEqual(canvas["@id"], URI + "/canvas/2")
+        self.assertEqual((canvas["width"], canvas["height"], canvas["label"]),
+                         (1024, 1536, "p. 2"))
+        resource = canvas["images"][0]["resource"]
+        self.assertEqual(resource["service"]["@id"],
+                         IMAGES + "/apf%2F1%2Fapf1-00002.tif")
+        self.assertEqual(resource["@id"],
+                         IMAGES + "/apf%2F1%2Fapf1-00002.tif/full/full/0/default.jpg")
+        self.assertEqual(canvas["images"][0]["on"], canvas["@id"])
+
+    def testRecordsMatchDict(self):
+        rows = list(rows_from_columns(["a", "b", "c"], [10, 20, 30], [40, 50, 60]))
+        manifest = build_manifest(URI, rows, IMAGES, label="Three")
+        self.assertIsInstance(manifest, Manifest)
+        self.assertIsInstance(manifest.sequences[0].canvases[2], Canvas)
+        self.assertEqual(manifest.sequences[0].canvases[2].width, 30)
+        self.assertEqual(json.loads(str(manifest)),
+                         json.loads(build_manifest_json(URI, rows, IMAGES, label="Three")))
+        self.assertNotIn("label", manifest.to_dict()["sequences"][0]["canvases"][0])
+        # Nothing was validated over the network
+        self.assertEqual(self.transport.calls, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
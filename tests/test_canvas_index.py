@@ -0,0 +1,67 @@
+"""Test module for reading ranges of canvases from manifest files
+"""
+
+import json
+import os
+import tempfile
+import unittest
+
+from pyiiif.pres_api.twodotone.bulk import build_manifest_dict
+from pyiiif.pres_api.twodotone.canvas_index import CanvasFile, write_canvas_index
+
+
+URI = "http://example.org/manifest"
+
+
+class Tests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "manifest.json")
+        rows = [("page-{}".format(n), 800, 600, 'p. {} "]}}'.format(n)) for n in range(50)]
+        self.manifest = build_manifest_dict(URI, rows, "http://example.org/iiif")
+        self.manifest["label"] = "A manifest"
+        with open(self.path, "w") as f:
+            json.dump(self.manifest, f, indent=1)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def testReadsRangesOfCanvases(self):
+        # Small chunks make canvases span chunk boundaries
+        self.assertEqual(write_canvas_index(self.path, chunk_size=64), 50)
+        expected = self.manifest["sequences"][0]["canvases"]
+        with CanvasFile(self.path) as canvases:
+            self.assertEqual(len(canvases), 50)
+            self.assertEqual([json.loads(raw) for raw in canvases.raw(10, 13)],
+                             expected[10:13])
+            loaded = canvases.canvases(48, 60)
+            self.assertEqual([c.to_dict() for c in loaded], expected[48:])
+            self.assertEqual(canvases.canvases(5, 5), [])
+
+    def testRejectsStaleIndex(self):
+        write_canvas_index(self.path)
+        with open(self.path, "a") as f:
+            f.write("\n")
+        with self.assertRaises(ValueError):
+            CanvasFile(self.path)
+
+    def testRejectsIndexOfEditOfSameSize(self):
+        write_canvas_index(self.path)
+        mtime_ns = os.stat(self.path).st_mtime_ns
+        with open(self.path, "r+b") as f:
+            data = f.read()
+            f.seek(0)
+            f.write(data.replace(b'"p. 1 ', b'"p. 9 '))
+        # However coarse the file system's timestamps, the edit is later
+        os.utime(self.path, ns=(mtime_ns + 10 ** 9, mtime_ns + 10 ** 9))
+        self.assertEqual(os.path.getsize(self.path), len(data))
+        with self.assertRaises(ValueError):
+            CanvasFile(self.path)
+
+    def testRejectsOtherFiles(self):
+        with self.assertRaises(ValueError):
+            CanvasFile(self.path, index_path=self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
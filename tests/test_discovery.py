@@ -0,0 +1,138 @@
+"""Test module for consuming IIIF Change Discovery streams
+"""
+
+import json
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from pyiiif.pres_api.discovery import ChangeDiscoveryConsumer
+from pyiiif.pres_api.harvest import DirectoryStore
+from pyiiif.transport import RequestsTransport
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """Serves the documents registered on the server by path
+    """
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.hits.append(self.path)
+        doc = server.documents.get(self.path)
+        if doc is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = json.dumps(doc).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class Tests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+        self.server.daemon_threads = True
+        self.server.lock = threading.Lock()
+        self.server.hits = []
+        self.server.documents = {}
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base = "http://127.0.0.1:{}".format(self.server.server_address[1])
+        self.pages = []
+        self.store = DirectoryStore(os.path.join(self.tmp.name, "store"))
+        self.state = os.path.join(self.tmp.name, "state.json")
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def manifest(self, n, label="v1"):
+        path = "/manifest/{}".format(n)
+        self.server.documents[path] = {"@id": self.base + path,
+                                       "@type": "sc:Manifest", "label": label}
+        return self.base + path
+
+    def publish(self, *pages):
+        """Replace the stream with pages of (type, manifest, minute) activities
+        """
+        self.pages = []
+        for i, activities in enumerate(pages):
+            path = "/activity/page-{}".format(i)
+            page = {"id": self.base + path, "type": "OrderedCollectionPage",
+                    "orderedItems": [{"type": kind,
+                                      "object": {"id": uri, "type": "Manifest"},
+                                      "endTime": "2026-01-01T00:{:02d}:00Z".format(minute)}
+                                     for kind, uri, minute in activities]}
+            if i:
+                page["prev"] = {"id": self.base + "/activity/page-{}".format(i-1),
+                                "type": "OrderedCollectionPage"}
+            self.server.documents[path] = page
+        self.server.documents["/activity/all-changes"] = {
+            "id": self.base + "/activity/all-changes", "type": "OrderedCollection",
+            "first": {"id": self.base + "/activity/page-0"},
+            "last": {"id": self.base + "/activity/page-{}".format(len(pages)-1)}
+        }
+
+    def consumer(self):
+        return ChangeDiscoveryConsumer(self.base + "/activity/all-changes", self.store,
+                                       state=self.state, transport=RequestsTransport())
+
+    def testAppliesActivities(self):
+        m0, m1, m2 = self.manifest(0), self.manifest(1), self.manifest(2)
+        self.store.put(m2, {"@id": m2})
+        self.publish([("Create", m0, 1), ("Create", m1, 2)],
+                     [("Update", m0, 3), ("Delete", m2, 4)])
+        counts = self.consumer().run()
+        self.assertEqual(counts, {"Create": 1, "Update": 1, "Delete": 1})
+        self.assertEqual(self.store.get(m0)["label"], "v1")
+        self.assertIn(m1, self.store)
+        self.assertNotIn(m2, self.store)
+        # m0 was only fetched once, for its most recent activity
+        self.assertEqual(self.server.hits.count("/manifest/0"), 1)
+
+    def testOnlyFetchesNewActivities(self):
+        m0, m1 = self.manifest(0), self.manifest(1)
+        self.publish([("Create", m0, 1)], [("Create", m1, 2)])
+        self.consumer().run()
+        self.manifest(1, label="v2")
+        self.publish([("Create", m0, 1)], [("Create", m1, 2)],
+                     [("Update", m1, 5)])
+        self.server.hits = []
+        counts = self.consumer().run()
+        self.assertEqual(counts, {"Update": 1})
+        self.assertEqual(self.store.get(m1)["label"], "v2")
+        self.assertNotIn("/activity/page-0", self.server.hits)
+        self.assertNotIn("/manifest/0", self.server.hits)
+        with open(self.state) as f:
+            self.assertEqual(json.load(f)["last_processed"], "2026-01-01T00:05:00+00:00")
+        self.assertEqual(self.consumer().run(), {})
+
+    def testResumesWithinActivitiesAtTheSameTime(self):
+        m0, m1 = self.manifest(0), self.manifest(1)
+        del self.server.documents["/manifest/1"]
+        self.publish([("Create", m0, 1), ("Create", m1, 1)])
+        with self.assertRaises(requests.exceptions.HTTPError):
+            self.consumer().run()
+        self.assertIn(m0, self.store)
+        self.assertNotIn(m1, self.store)
+        self.manifest(1)
+        self.server.hits = []
+        self.assertEqual(self.consumer().run(), {"Create": 1})
+        self.assertIn(m1, self.store)
+        self.assertNotIn("/manifest/0", self.server.hits)
+        self.assertEqual(self.consumer().run(), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+"""Test module for harvesting collection trees
+"""
+
+import json
+import os
+import tempfile
+import unittest
+
+import requests
+
+from pyiiif.pres_api.harvest import DirectoryStore, Harvester, StoreTransport
+from pyiiif.pres_api.packed_store import PackedStore
+from pyiiif.pres_api.twodotone.records import Manifest
+from pyiiif.pres_api.utils import get_record
+from pyiiif.transport import StaticTransport
+
+
+ROOT = "http://example.org/collection"
+
+
+def build_tree(transport, n_collections=3, n_manifests=5):
+    subs = []
+    for c in range(n_collections):
+        uri = "{}/{}".format(ROOT, c)
+        manifests = ["{}/manifest/{}".format(uri, m) for m in range(n_manifests)]
+        for m in manifests:
+            transport.add(m, {"@id": m, "@type": "sc:Manifest", "sequences": []})
+        transport.add(uri, {"@id": uri, "@type": "sc:Collection",
+                            "manifests": [{"@id": m, "@type": "sc:Manifest"}
+                                          for m in manifests]})
+        subs.append(uri)
+    # The first manifest is also referenced from the root
+    transport.add(ROOT, {"@id": ROOT, "@type": "sc:Collection", "collections": subs,
+                         "manifests": ["{}/0/manifest/0".format(ROOT)]})
+
+
+class Tests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.transport = StaticTransport()
+        build_tree(self.transport)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def testHarvestsWholeTree(self):
+        store = DirectoryStore(os.path.join(self.tmp.name, "store"))
+        stored = Harvester(ROOT, store, concurrency=4, transport=self.transport).run()
+        self.assertEqual(stored, 19)
+        self.assertEqual(store.get(ROOT + "/2/manifest/4")["@type"], "sc:Manifest")
+        self.assertEqual(len(self.transport.calls), len(set(self.transport.calls)))
+
+    def testResumesFromCheckpoint(self):
+        store = DirectoryStore(os.path.join(self.tmp.name, "store"))
+        checkpoint = os.path.join(self.tmp.name, "checkpoint.json")
+        first = Harvester(ROOT, store, checkpoint=checkpoint, checkpoint_every=1,
+                          concurrency=2, transport=self.transport)
+        self.assertEqual(first.run(max_records=6), 6)
+        with open(checkpoint) as f:
+            entries = [json.loads(line) for line in f]
+        # Only what changed is appended at each checkpoint
+        self.assertEqual(sum(len(e.get("done", ())) for e in entries), 6)
+        second = Harvester(ROOT, store, checkpoint=checkpoint, concurrency=2,
+                           transport=self.transport)
+        self.assertEqual(second.harvested, 6)
+        self.assertTrue(second.frontier)
+        self.assertEqual(second.run(), 13)
+        self.assertEqual(second.harvested, 19)
+        self.assertEqual(len(self.transport.calls), len(set(self.transport.calls)))
+
+    def testCompactsCheckpoint(self):
+        store = DirectoryStore(os.path.join(self.tmp.name, "store"))
+        checkpoint = os.path.join(self.tmp.name, "checkpoint.json")
+        harvester = Harvester(ROOT, store, checkpoint=checkpoint, checkpoint_every=1,
+                              transport=self.transport)
+        harvester.compact_min = 0
+        self.transport.add(ROOT + "/2", (500, ""))
+        harvester.run(max_records=8)
+        with open(checkpoint) as f:
+            entries = [json.loads(line) for line in f]
+        logged = sum(len(value) for e in entries for value in e.values()
+                     if not isinstance(value, int))
+        self.assertLessEqual(logged, 2 * (len(harvester.frontier) + 1) + 3)
+        resumed = Harvester(ROOT, store, checkpoint=checkpoint, transport=self.transport)
+        self.assertEqual(list(resumed.frontier), list(harvester.frontier))
+        self.assertEqual(resumed.harvested, 8)
+        self.assertIn(ROOT + "/2", resumed.failed)
+
+    def testRecordsFailures(self):
+        self.transport.add(ROOT + "/1", (500, ""))
+        store = DirectoryStore(os.path.join(self.tmp.name, "store"))
+        harvester = Harvester(ROOT, store, transport=self.transport)
+        self.assertEqual(harvester.run(), 13)
+        self.assertIn(ROOT + "/1", harvester.failed)
+
+    def testPackedStore(self):
+        path = os.path.join(self.tmp.name, "store.pack")
+        store = PackedStore(path)
+        stored = Harvester(ROOT, store, concurrency=4, transport=self.transport).run()
+        self.assertEqual(stored, 19)
+        uri = ROOT + "/2/manifest/4"
+        with store.get_bytes(uri) as view:
+            self.assertEqual(json.loads(bytes(view))["@id"], uri)
+        record = store.get_record(uri)
+        self.assertIsInstance(record, Manifest)
+        self.assertEqual(record.id, uri)
+
+        store.put(uri, {"@id": uri, "@type": "sc:Manifest", "label": "Relabeled"})
+        store.delete(ROOT + "/2")
+        self.assertIsNone(store.get(ROOT + "/2"))
+        # A write cut short is dropped when the store is reopened
+        with open(path, "ab") as f:
+            f.write(b"\x00\x00")
+        reopened = PackedStore(path)
+        self.assertEqual(len(reopened), 18)
+        self.assertEqual(reopened.get(uri)["label"], "Relabeled")
+        self.assertNotIn(ROOT + "/2", reopened)
+
+        size = os.path.getsize(path)
+        reopened.compact()
+        self.assertLess(os.path.getsize(path), size)
+        self.assertEqual(sorted(PackedStore(path)), sorted(store))
+        self.assertEqual(reopened.get(uri)["label"], "Relabeled")
+
+    def testStoreTransport(self):
+        store = PackedStore(os.path.join(self.tmp.name, "store.pack"))
+        store.put(ROOT, {"@id": ROOT, "@type": "sc:Collection", "label": "Stored"})
+        transport = StoreTransport(store, transport=self.transport)
+        self.assertEqual(get_record(ROOT, transport=transport)["label"], "Stored")
+        self.assertEqual(get_record(ROOT + "/1", transport=transport)["@id"], ROOT + "/1")
+        self.assertEqual(self.transport.calls, [ROOT + "/1"])
+        with self.assertRaises(requests.exceptions.HTTPError):
+            get_record(ROOT + "/1", transport=StoreTransport(store))
+
+
+if __name__ == "__main__":
+    unittest.main()
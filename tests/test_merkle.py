@@ -0,0 +1,74 @@
+"""Test module for comparing collection trees by their content hashes
+"""
+
+import copy
+import unittest
+
+from pyiiif.pres_api.twodotone.bulk import build_manifest, build_manifest_dict
+from pyiiif.pres_api.twodotone.merkle import diff, summarize
+
+
+ROOT = "http://example.org/collection"
+IMAGES = "http://example.org/iiif"
+
+
+def manifest_uri(n):
+    return "http://example.org/manifest/{}".format(n)
+
+
+def rows(n):
+    return [("{}-{}".format(n, p), 800, 600, "p. {}".format(p)) for p in range(4)]
+
+
+def build_tree(n_manifests=3):
+    store = {manifest_uri(n): build_manifest_dict(manifest_uri(n), rows(n), IMAGES)
+             for n in range(n_manifests)}
+    store[ROOT] = {"@id": ROOT, "@type": "sc:Collection",
+                   "manifests": [{"@id": manifest_uri(n), "@type": "sc:Manifest"}
+                                 for n in range(n_manifests)]}
+    return store
+
+
+class Tests(unittest.TestCase):
+    def testIdenticalTreesDontDiffer(self):
+        store = build_tree()
+        replica = copy.deepcopy(store)
+        self.assertEqual(diff(summarize(store[ROOT], resolve=store.get),
+                              summarize(replica[ROOT], resolve=replica.get)), [])
+
+    def testFindsDifferingSubtrees(self):
+        store = build_tree()
+        replica = copy.deepcopy(store)
+        canvas = replica[manifest_uri(1)]["sequences"][0]["canvases"][2]
+        canvas["label"] = "p. 2 (corrected)"
+        replica[manifest_uri(3)] = build_manifest_dict(manifest_uri(3), rows(3), IMAGES)
+        replica[ROOT]["manifests"][2] = {"@id": manifest_uri(3), "@type": "sc:Manifest"}
+        changes = diff(summarize(store[ROOT], resolve=store.get),
+                       summarize(replica[ROOT], resolve=replica.get))
+        self.assertEqual(changes, [
+            ("changed", ROOT, "sc:Collection"),
+            ("changed", manifest_uri(1), "sc:Manifest"),
+            ("changed", canvas["@id"], "sc:Canvas"),
+            ("added", manifest_uri(3), "sc:Manifest"),
+            ("removed", manifest_uri(2), "sc:Manifest"),
+        ])
+
+    def testUnlistedChangesSurfaceThroughCollection(self):
+        store = build_tree()
+        replica = copy.deepcopy(store)
+        replica[manifest_uri(0)]["label"] = "Relabeled"
+        old = summarize(store[ROOT], resolve=store.get, depth=0)
+        new = summarize(replica[ROOT], resolve=replica.get, depth=0)
+        self.assertIsNone(new["children"])
+        # The collection's own listing is the same, but its subtree isn't
+        self.assertEqual(old["own"], new["own"])
+        self.assertEqual(diff(old, new), [("changed", ROOT, "sc:Collection")])
+
+    def testRecordsAndDictsSummarizeAlike(self):
+        uri = manifest_uri(0)
+        self.assertEqual(summarize(build_manifest(uri, rows(0), IMAGES)),
+                         summarize(build_manifest_dict(uri, rows(0), IMAGES)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+"""Test module for the single-file record store
+"""
+
+import os
+import tempfile
+import unittest
+
+from pyiiif.pres_api.packed_store import PackedStore
+
+
+def record(uri, label):
+    return {"@id": uri, "@type": "sc:Manifest", "label": label}
+
+
+class Tests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "store.pack")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def testCompactsNewStore(self):
+        store = PackedStore(self.path)
+        store.put("a", record("a", "A"))
+        store.put("a", record("a", "A, again"))
+        store.compact()
+        self.assertEqual(store.get("a"), record("a", "A, again"))
+        self.assertEqual(PackedStore(self.path).get("a"), record("a", "A, again"))
+
+    def testCompactsRecordsPutSinceLastRead(self):
+        store = PackedStore(self.path)
+        store.put("a", record("a", "A"))
+        self.assertEqual(store.get("a"), record("a", "A"))
+        store.put("b", record("b", "B"))
+        store.put("a", record("a", "A, again"))
+        store.compact()
+        expected = {"a": record("a", "A, again"), "b": record("b", "B")}
+        self.assertEqual({uri: store.get(uri) for uri in store}, expected)
+        reopened = PackedStore(self.path)
+        self.assertEqual({uri: reopened.get(uri) for uri in reopened}, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+"""Test module for paged collections
+"""
+
+import json
+import os
+import tempfile
+import time
+import unittest
+
+from pyiiif.pres_api.paging import iter_collection_members, iter_collection_pages, \
+    write_paged_collection
+from pyiiif.pres_api.utils import get_thumbnail
+from pyiiif.pres_api.twodotone.records import Collection, Manifest
+from pyiiif.transport import StaticTransport, set_default_transport
+
+
+ROOT = "http://example.org/collection"
+
+
+class Tests(unittest.TestCase):
+    def setUp(self):
+        set_default_transport(StaticTransport())
+        self.collection = Collection(ROOT)
+        self.collection.label = "Everything"
+        manifests = []
+        for n in range(25):
+            manifest = Manifest("http://example.org/manifest/{}".format(n))
+            manifest.label = "Manifest {}".format(n)
+            manifests.append(manifest)
+        self.collection.manifests = manifests
+
+    def tearDown(self):
+        set_default_transport(None)
+
+    def testPagesCollection(self):
+        docs = list(iter_collection_pages(self.collection, page_size=10))
+        self.assertEqual(len(docs), 4)
+        uri, top = docs[0]
+        self.assertEqual(uri, ROOT)
+        self.assertEqual(top["label"], "Everything")
+        self.assertEqual(top["total"], 25)
+        self.assertEqual(top["first"], ROOT + "?page=1")
+        self.assertEqual(top["last"], ROOT + "?page=3")
+        self.assertNotIn("manifests", top)
+        _, second = docs[2]
+        self.assertEqual(second["startIndex"], 10)
+        self.assertEqual(second["prev"], ROOT + "?page=1")
+        self.assertEqual(second["next"], ROOT + "?page=3")
+        self.assertEqual(second["within"], ROOT)
+        self.assertEqual(second["manifests"][0],
+                         {"@id": "http://example.org/manifest/10",
+                          "@type": "sc:Manifest", "label": "Manifest 10"})
+        _, last = docs[3]
+        self.assertNotIn("next", last)
+        self.assertEqual(len(last["manifests"]), 5)
+
+    def testPagesPreservedCollection(self):
+        source = {"@context": "http://iiif.io/api/presentation/2/context.json",
+                  "@id": ROOT, "@type": "sc:Collection",
+                  "label": {"en": ["Everything"]},
+                  "attribution": "The Library",
+                  "thumbnail": {"@id": "http://example.org/thumb.jpg"},
+                  "manifests": [{"@id": "http://example.org/manifest/{}".format(n),
+                                 "@type": "sc:Manifest",
+                                 "label": {"en": ["Manifest {}".format(n)]},
+                                 "thumbnail": "http://example.org/thumb/{}.jpg".format(n)}
+                                for n in range(5)]}
+        collection = Collection.load(json.dumps(source), preserve=True)
+        docs = [doc for _, doc in iter_collection_pages(collection, page_size=2)]
+        top = docs[0]
+        for key in ("label", "attribution", "thumbnail"):
+            self.assertEqual(top[key], source[key])
+        listed = [m for page in docs[1:] for m in page["manifests"]]
+        self.assertEqual(listed, source["manifests"])
+
+    def testWritesGeneratedMembers(self):
+        members = ({"@id": "http://example.org/manifest/{}".format(n),
+                    "@type": "sc:Manifest"} for n in range(7))
+        with tempfile.TemporaryDirectory() as tmp:
+            pages = write_paged_collection(self.collection, tmp, page_size=3,
+                                           members=members, total=7)
+            self.assertEqual(pages, 3)
+            self.assertEqual(sorted(os.listdir(tmp)),
+                             ["1.json", "2.json", "3.json", "index.json"])
+            with open(os.path.join(tmp, "3.json")) as f:
+                self.assertEqual(json.load(f)["manifests"],
+                                 [{"@id": "http://example.org/manifest/6",
+                                   "@type": "sc:Manifest"}])
+
+    def publish(self, transport):
+        for uri, doc in iter_collection_pages(self.collection, page_size=10):
+            transport.add(uri, doc)
+
+    def testReadsAcrossPages(self):
+        transport = StaticTransport()
+        self.publish(transport)
+        members = iter_collection_members(ROOT, transport=transport)
+        self.assertEqual(next(members)["@id"], "http://example.org/manifest/0")
+        # The second page is fetched while the first is being read
+        time.sleep(0.05)
+        self.assertEqual(transport.calls, [ROOT, ROOT + "?page=1", ROOT + "?page=2"])
+        ids = [m["@id"] for m in members]
+        self.assertEqual(len(ids), 24)
+        self.assertEqual(ids[-1], "http://example.org/manifest/24")
+
+    def testResolvesMembers(self):
+        transport = StaticTransport()
+        self.publish(transport)
+        transport.add("http://example.org/manifest/0", {"@id": "http://example.org/manifest/0",
+                                                        "@type": "sc:Manifest", "label": "full"})
+        members = iter_collection_members(ROOT, transport=transport, prefetch=False,
+                                          resolve=True)
+        self.assertEqual(next(members)["label"], "full")
+        self.assertEqual(transport.calls, [ROOT, ROOT + "?page=1", "http://example.org/manifest/0"])
+
+    def testThumbnailFromPagedCollection(self):
+        transport = StaticTransport()
+        self.publish(transport)
+        transport.add("http://example.org/manifest/0", {
+            "@id": "http://example.org/manifest/0", "@type": "sc:Manifest",
+            "thumbnail": {"@id": "http://example.org/thumb.jpg"}
+        })
+        tn = get_thumbnail(ROOT, transport=transport, allow_non_iiif=True)
+        self.assertEqual(tn, "http://example.org/thumb.jpg")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+"""Test module for diffing and patching manifests
+"""
+
+import copy
+import json
+import random
+import unittest
+
+from pyiiif.pres_api.twodotone.bulk import build_manifest_dict
+from pyiiif.pres_api.twodotone.patch import apply, diff
+from pyiiif.pres_api.twodotone.records import Canvas, Manifest, load_preserving
+
+
+URI = "http://example.org/manifest"
+
+
+def source(n_canvases=6):
+    rows = [("page-{}".format(n), 800, 600, "p. {}".format(n)) for n in range(n_canvases)]
+    out = build_manifest_dict(URI, rows, "http://example.org/iiif", label="A manifest")
+    out["seeAlso"] = "http://example.org/manifest.xml"
+    return out
+
+
+def canvas_ids(manifest):
+    return [c.id for c in manifest.sequences[0].canvases]
+
+
+class Tests(unittest.TestCase):
+    def testUnchangedManifestGivesEmptyPatch(self):
+        old = Manifest.load(json.dumps(source()), preserve=True)
+        new = Manifest.load(json.dumps(source()), preserve=True)
+        self.assertEqual(diff(old, new), {"@id": URI})
+
+    def testDiffsAndAppliesChanges(self):
+        edited = source()
+        canvases = edited["sequences"][0]["canvases"]
+        del edited["seeAlso"]
+        edited["label"] = "A corrected manifest"
+        canvases[2]["label"] = "p. 2 (corrected)"
+        new_canvas = copy.deepcopy(canvases[0])
+        new_canvas["@id"] = URI + "/canvas/inserted"
+        moved = canvases.pop(4)
+        del canvases[1]
+        canvases.insert(0, new_canvas)
+        canvases.append(moved)
+        old = Manifest.load(json.dumps(source()), preserve=True)
+        new = Manifest.load(json.dumps(edited), preserve=True)
+
+        patch = json.loads(json.dumps(diff(old, new)))
+        self.assertEqual(patch["set"], {"label": "A corrected manifest"})
+        self.assertEqual(patch["unset"], ["seeAlso"])
+        changes = patch["sequences"][URI + "/sequence/normal"]
+        self.assertEqual(changes["removed"], [URI + "/canvas/2"])
+        self.assertEqual([[i, c["@id"]] for i, c in changes["added"]],
+                         [[0, URI + "/canvas/inserted"]])
+        # Either canvas 5 or canvas 6 moved, and nothing else did
+        self.assertEqual(len(changes["moved"]), 1)
+        self.assertEqual(changes["changed"],
+                         {URI + "/canvas/3": {"set": {"label": "p. 2 (corrected)"}}})
+
+        self.assertIs(apply(patch, old), old)
+        self.assertEqual(canvas_ids(old), canvas_ids(new))
+        self.assertEqual(old.canonical_json(), new.canonical_json())
+        self.assertEqual(old.content_hash(), new.content_hash())
+
+    def testAppliesShuffles(self):
+        rng = random.Random(7)
+        for _ in range(20):
+            edited = source(30)
+            canvases = edited["sequences"][0]["canvases"]
+            rng.shuffle(canvases)
+            del canvases[:rng.randrange(5)]
+            old = Manifest.load(json.dumps(source(30)), preserve=True)
+            new = Manifest.load(json.dumps(edited), preserve=True)
+            apply(diff(old, new), old)
+            self.assertEqual(canvas_ids(old), canvas_ids(new))
+            self.assertEqual(old.content_hash(), new.content_hash())
+
+    def testDiffsChangesBetweenUnchangedCanvases(self):
+        old = Manifest.load(json.dumps(source(30)), preserve=True)
+        new = old.clone()
+        sequence = new.sequences[0]
+        inserted = dict(sequence.canvases[0].to_dict(), **{"@id": URI + "/canvas/inserted"})
+        sequence.insert_canvas(12, load_preserving(Canvas, inserted))
+        sequence.del_canvas(URI + "/canvas/20")
+        sequence.canvases[15].label = "p. 14 (corrected)"
+
+        patch = json.loads(json.dumps(diff(old, new)))
+        changes = patch["sequences"][URI + "/sequence/normal"]
+        self.assertEqual([[i, c["@id"]] for i, c in changes["added"]],
+                         [[12, URI + "/canvas/inserted"]])
+        self.assertEqual(changes["removed"], [URI + "/canvas/20"])
+        self.assertNotIn("moved", changes)
+        self.assertEqual(changes["changed"],
+                         {URI + "/canvas/15": {"set": {"label": "p. 14 (corrected)"}}})
+        apply(patch, old)
+        self.assertEqual(canvas_ids(old), canvas_ids(new))
+        self.assertEqual(old.content_hash(), new.content_hash())
+
+    def testRejectsPatchForAnotherManifest(self):
+        old = Manifest.load(json.dumps(source()), preserve=True)
+        with self.assertRaises(ValueError):
+            apply({"@id": "http://example.org/other"}, old)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,197 @@
+"""Test module for the record fetching and thumbnail helpers
+"""
+
+import asyncio
+import time
+import unittest
+
+from pyiiif.pres_api.utils import get_record, get_thumbnail, get_thumbnails, \
+    get_hardcoded_thumbnail, get_info, choose_size, \
+    aget_record, aget_hardcoded_thumbnail, aget_thumbnail
+from pyiiif.transport import StaticTransport
+
+
+IMAGE = "http://example.org/iiif/img{}/full/full/0/default.jpg"
+
+
+def make_manifest(n, thumbnail=False):
+    uri = "http://example.org/manifest/{}".format(n)
+    manifest = {
+        "@id": uri,
+        "@type": "sc:Manifest",
+        "sequences": [{
+            "@id": uri + "/sequence",
+            "@type": "sc:Sequence",
+            "canvases": [{
+                "@id": uri + "/canvas",
+                "@type": "sc:Canvas",
+                "images": [{
+                    "@id": uri + "/annotation",
+                    "@type": "oa:Annotation",
+                    "resource": {"@id": IMAGE.format(n)}
+                }]
+            }]
+        }]
+    }
+    if thumbnail:
+        manifest["thumbnail"] = {
+            "@id": "http://example.org/iiif/thumb{}/full/full/0/default.jpg".format(n),
+            "service": {"@context": "http://iiif.io/api/image/2/context.json"}
+        }
+    return manifest
+
+
+class Tests(unittest.TestCase):
+    def setUp(self):
+        self.transport = StaticTransport()
+        for n in range(20):
+            m = make_manifest(n, thumbnail=(n == 1))
+            self.transport.add(m["@id"], m)
+
+    def testGetRecordThroughTransport(self):
+        rec = get_record("http://example.org/manifest/0", transport=self.transport)
+        self.assertEqual(rec["@type"], "sc:Manifest")
+        self.assertEqual(self.transport.calls, ["http://example.org/manifest/0"])
+
+    def testDefaultTimeoutAllowsSlowServers(self):
+        timeouts = []
+
+        class Recording(StaticTransport):
+            def get(self, uri, timeout=None, stream=False):
+                timeouts.append(timeout)
+                return super().get(uri, timeout=timeout, stream=stream)
+
+            async def aget(self, uri, timeout=None):
+                timeouts.append(timeout)
+                return await super().aget(uri, timeout=timeout)
+
+        transport = Recording(self.transport.documents)
+        uri = "http://example.org/manifest/0"
+        get_record(uri, update=True, transport=transport)
+        asyncio.run(aget_record(uri, update=True, transport=transport))
+        self.assertEqual(len(timeouts), 4)
+        # Ordinary servers take longer than a tenth of a second to answer
+        self.assertTrue(all(t >= 5 for t in timeouts))
+
+    def testGetThumbnailThroughTransport(self):
+        tn = get_thumbnail("http://example.org/manifest/0", transport=self.transport)
+        self.assertEqual(tn, "http://example.org/iiif/img0/full/!200,200/0/default.jpg")
+
+    def testGetThumbnailRepeatedly(self):
+        for _ in range(3):
+            tn = get_thumbnail("http://example.org/manifest/0", transport=self.transport)
+            self.assertEqual(tn, "http://example.org/iiif/img0/full/!200,200/0/default.jpg")
+
+    def testGetThumbnailStopsOnCycles(self):
+        self.transport.add("http://example.org/a", {
+            "@id": "http://example.org/a", "@type": "sc:Collection",
+            "collections": ["http://example.org/b"]})
+        self.transport.add("http://example.org/b", {
+            "@id": "http://example.org/b", "@type": "sc:Collection",
+            "collections": ["http://example.org/a"]})
+        self.assertIsNone(get_thumbnail("http://example.org/a", transport=self.transport))
+
+    def testGetThumbnailDepthLimit(self):
+        self.assertIsNone(get_thumbnail("http://example.org/manifest/0", max_depth=3,
+                                        transport=self.transport))
+
+    def testGetThumbnailMemo(self):
+        memo = {}
+        tn = get_thumbnail("http://example.org/manifest/0", memo=memo,
+                           transport=self.transport)
+        self.assertEqual(memo["http://example.org/manifest/0/canvas"], tn)
+        calls = len(self.transport.calls)
+        self.assertEqual(get_thumbnail("http://example.org/manifest/0", memo=memo,
+                                       transport=self.transport), tn)
+        self.assertEqual(len(self.transport.calls), calls)
+
+    def testChooseSize(self):
+        sizes = [{"width": 150, "height": 100}, {"width": 300, "height": 200},
+                 {"width": 600, "height": 400}]
+        self.assertEqual(choose_size(sizes, 200, 200), (300, 200))
+        self.assertEqual(choose_size(sizes, 200, 250, preserve_ratio=False), (600, 400))
+        self.assertEqual(choose_size(sizes, 1000, 1000), (600, 400))
+        self.assertIsNone(choose_size([], 200, 200))
+
+    def testThumbnailUsesInfoSizes(self):
+        info_url = "http://example.org/iiif/img0/info.json"
+        self.transport.add(info_url, {
+            "@id": "http://example.org/iiif/img0",
+            "sizes": [{"width": 150, "height": 100}, {"width": 300, "height": 200}]
+        })
+        for _ in range(2):
+            tn = get_thumbnail("http://example.org/manifest/0", use_info_sizes=True,
+                               transport=self.transport)
+            self.assertEqual(tn, "http://example.org/iiif/img0/full/300,200/0/default.jpg")
+        self.assertEqual(self.transport.calls.count(info_url), 1)
+        self.assertIs(get_info(IMAGE.format(0), transport=self.transport),
+                      get_info(info_url, transport=self.transport))
+
+    def testHardcodedThumbnailFallsBackWithoutInfo(self):
+        tn = get_hardcoded_thumbnail("http://example.org/manifest/1", use_info_sizes=True,
+                                     transport=self.transport)
+        self.assertEqual(tn, "http://example.org/iiif/thumb1/full/!200,200/0/default.jpg")
+
+    def testAsyncGetRecord(self):
+        rec = asyncio.run(aget_record("http://example.org/manifest/3",
+                                      transport=self.transport))
+        self.assertEqual(rec["@id"], "http://example.org/manifest/3")
+
+    def testAsyncGetHardcodedThumbnail(self):
+        tn = asyncio.run(aget_hardcoded_thumbnail("http://example.org/manifest/1",
+                                                  width=50, height=60,
+                                                  transport=self.transport))
+        self.assertEqual(tn, "http://example.org/iiif/thumb1/full/!50,60/0/default.jpg")
+
+    def testAsyncGetThumbnailWalksDown(self):
+        tn = asyncio.run(aget_thumbnail("http://example.org/manifest/2",
+                                        preserve_ratio=False,
+                                        transport=self.transport))
+        self.assertEqual(tn, "http://example.org/iiif/img2/full/200,200/0/default.jpg")
+
+    def testAsyncGetThumbnailIsConcurrent(self):
+        self.transport.delay = 0.05
+
+        async def resolve_all():
+            return await asyncio.gather(*[
+                aget_thumbnail("http://example.org/manifest/{}".format(n),
+                               transport=self.transport)
+                for n in range(20)
+            ])
+
+        start = time.monotonic()
+        tns = asyncio.run(resolve_all())
+        elapsed = time.monotonic() - start
+        self.assertEqual(len(tns), 20)
+        self.assertTrue(all(tns))
+        # Every lookup makes several sequential requests; run one after the
+        # other that would take upwards of 20 * 5 * 0.05 seconds
+        self.assertLess(elapsed, 2)
+
+    def testGetThumbnailsFetchesSharedRecordsOnce(self):
+        collection = {
+            "@id": "http://example.org/collection",
+            "@type": "sc:Collection",
+            "manifests": ["http://example.org/manifest/5"]
+        }
+        self.transport.add(collection["@id"], collection)
+        records = ["http://example.org/manifest/{}".format(n % 4) for n in range(12)]
+        records.append("http://example.org/collection")
+        tns = get_thumbnails(records, transport=self.transport)
+        self.assertEqual(tns[0], "http://example.org/iiif/img0/full/!200,200/0/default.jpg")
+        self.assertEqual(tns[1], "http://example.org/iiif/thumb1/full/!200,200/0/default.jpg")
+        self.assertEqual(tns[4], tns[0])
+        self.assertEqual(tns[-1], "http://example.org/iiif/img5/full/!200,200/0/default.jpg")
+        for uri in set(self.transport.calls):
+            self.assertEqual(self.transport.calls.count(uri), 1)
+
+    def testGetThumbnailsCanCollectExceptions(self):
+        tns = get_thumbnails(["http://example.org/manifest/0",
+                              "http://example.org/missing"],
+                             transport=self.transport, return_exceptions=True)
+        self.assertTrue(tns[0])
+        self.assertIsInstance(tns[1], Exception)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,334 @@
+"""Test module for working with large twodotone records
+"""
+
+import io
+import json
+import unittest
+
+from pyiiif.pres_api.twodotone.bulk import build_manifest, build_manifest_json
+from pyiiif.pres_api.twodotone.records import Canvas, CanvasSpool, Collection, \
+    Manifest, MetadataField, OtherContent, RecordListView, Sequence
+from pyiiif.transport import StaticTransport, set_default_transport
+
+
+def canvas(n):
+    return Canvas("http://example.org/canvas/{}".format(n))
+
+
+def loaded_manifest(n_canvases=3):
+    canvases = []
+    for n in range(n_canvases):
+        uri = "http://example.org/canvas/{}".format(n)
+        canvases.append({
+            "@id": uri, "@type": "sc:Canvas", "label": {"en": ["p. {}".format(n)]},
+            "height": 100, "width": 80,
+            "thumbnail": {"@id": uri + "/thumb.jpg"},
+            "images": [{"@id": uri + "/annotation", "@type": "oa:Annotation",
+                        "motivation": "sc:painting", "on": uri,
+                        "resource": {"@id": uri + "/full/full/0/default.jpg",
+                                     "@type": "dctypes:Image", "format": "image/jpeg",
+                                     "service": {"@id": uri, "profile": "level1",
+                                                 "tiles": [{"width": 512}]}}}]
+        })
+    return {"@context": "http://iiif.io/api/presentation/2/context.json",
+            "@id": "http://example.org/manifest", "@type": "sc:Manifest",
+            "label": "A manifest", "seeAlso": "http://example.org/manifest.xml",
+            "rendering": [{"@id": "http://example.org/manifest.pdf"}],
+            "sequences": [{"@id": "http://example.org/sequence", "@type": "sc:Sequence",
+                           "canvases": canvases}],
+            "structures": [{"@id": "http://example.org/range", "@type": "sc:Range",
+                            "canvases": ["http://example.org/canvas/0"]}]}
+
+
+class Tests(unittest.TestCase):
+    def setUp(self):
+        set_default_transport(StaticTransport())
+
+    def tearDown(self):
+        set_default_transport(None)
+
+    def testAddValidatesOnlyNewItems(self):
+        s = Sequence("http://example.org/sequence")
+        s.add_canvas(canvas(1))
+        s.extend_canvases([canvas(2), canvas(3)])
+        s.insert_canvas(0, canvas(0))
+        self.assertEqual([c.id for c in s.canvases],
+                         ["http://example.org/canvas/{}".format(n) for n in range(4)])
+        with self.assertRaises(ValueError):
+            s.add_canvas(Manifest("http://example.org/manifest"))
+        with self.assertRaises(ValueError):
+            s.extend_canvases([canvas(4), "not a canvas"])
+        self.assertEqual(len(s.canvases), 4)
+
+    def testAddStartsMissingList(self):
+        c = Collection("http://example.org/collection")
+        c.add_member(Manifest("http://example.org/manifest"))
+        c.add_member(Collection("http://example.org/sub"))
+        self.assertEqual(str(c.members),
+                         "[Manifest for http://example.org/manifest, "
+                         "<Collection record for http://example.org/sub >]")
+
+    def testGettersReturnReadOnlyViews(self):
+        s = Sequence("http://example.org/sequence")
+        canvases = [canvas(1), canvas(2)]
+        s.canvases = canvases
+        view = s.canvases
+        self.assertIsInstance(view, RecordListView)
+        self.assertEqual(view, canvases)
+        self.assertIn(canvases[1], view)
+        self.assertEqual(view[-1], canvases[1])
+        self.assertFalse(hasattr(view, "append"))
+        # The sequence has its own copy of the list it was given
+        canvases.append("not a canvas")
+        self.assertEqual(len(s.canvases), 2)
+        # Views can be assigned like lists
+        other = Sequence("http://example.org/other")
+        other.canvases = s.canvases
+        other.add_canvas(canvas(3))
+        self.assertEqual(len(s.canvases), 2)
+        self.assertEqual(s.to_dict()["canvases"][1]["@id"], "http://example.org/canvas/2")
+
+    def testLooksUpById(self):
+        s = Sequence("http://example.org/sequence")
+        s.extend_canvases([canvas(n) for n in range(100)])
+        self.assertEqual(s.get_canvas("http://example.org/canvas/42").id,
+                         "http://example.org/canvas/42")
+        self.assertTrue(s.has_canvas("http://example.org/canvas/99"))
+        self.assertFalse(s.has_canvas("http://example.org/canvas/100"))
+        m = Manifest("http://example.org/manifest")
+        m.add_sequence(s)
+        self.assertTrue(m.has_canvas("http://example.org/canvas/7"))
+
+    def testIndexFollowsChanges(self):
+        s = Sequence("http://example.org/sequence")
+        s.extend_canvases([canvas(n) for n in range(10)])
+        self.assertTrue(s.has_canvas("http://example.org/canvas/5"))
+        removed = s.del_canvas("http://example.org/canvas/5")
+        self.assertEqual(removed.id, "http://example.org/canvas/5")
+        self.assertFalse(s.has_canvas("http://example.org/canvas/5"))
+        self.assertEqual(s.get_canvas("http://example.org/canvas/6").id,
+                         "http://example.org/canvas/6")
+        s.del_canvas(s.canvases[0])
+        s.insert_canvas(-1, canvas(42))
+        s.add_canvas(canvas(10))
+        self.assertEqual(s.canvases[s._position_in_a_list_property(
+            "http://example.org/canvas/42", "_canvases")].id, "http://example.org/canvas/42")
+        for c in s.canvases:
+            self.assertIs(s.get_canvas(c.id), c)
+        # Reordering by setting the whole list
+        s.canvases = list(reversed(s.canvases))
+        self.assertIs(s.get_canvas("http://example.org/canvas/1"), s.canvases[-1])
+        self.assertIsNone(s.del_canvas("http://example.org/canvas/5"))
+
+    def testLooksUpFirstOfDuplicateIds(self):
+        s = Sequence("http://example.org/sequence")
+        s.extend_canvases([canvas(n) for n in range(5)])
+        later = canvas(3)
+        s.add_canvas(later)
+        self.assertIsNot(s.get_canvas(later.id), later)
+        first = canvas(3)
+        s.insert_canvas(1, first)
+        self.assertIs(s.get_canvas(first.id), first)
+        self.assertEqual(s._position_in_a_list_property(first.id, "_canvases"),
+                         list(s.canvases).index(first))
+        s.del_canvas(first)
+        self.assertEqual(s._position_in_a_list_property(first.id, "_canvases"), 3)
+
+    def testCollectionLookups(self):
+        c = Collection("http://example.org/collection")
+        c.manifests = [Manifest("http://example.org/manifest/{}".format(n)) for n in range(3)]
+        self.assertTrue(c.has_manifest("http://example.org/manifest/1"))
+        c.del_manifest("http://example.org/manifest/1")
+        self.assertEqual([m.id for m in c.manifests],
+                         ["http://example.org/manifest/0", "http://example.org/manifest/2"])
+        self.assertIsNone(c.get_member("http://example.org/manifest/0"))
+
+    def testCachesSerializations(self):
+        m = build_manifest("http://example.org/manifest",
+                           [("img{}".format(n), 100, 200, "p. {}".format(n)) for n in range(5)],
+                           "https://example.org/iiif", label="Five")
+        first = str(m)
+        self.assertIs(m.to_dict(), m.to_dict())
+        self.assertIs(str(m), first)
+        self.assertEqual(json.loads(first)["sequences"][0]["canvases"][4]["label"], "p. 4")
+
+    def testChangesInvalidateAncestors(self):
+        m = build_manifest("http://example.org/manifest",
+                           [("img{}".format(n), 100, 200, "p. {}".format(n)) for n in range(5)],
+                           "https://example.org/iiif")
+        before = m.to_dict()
+        canvases = m.sequences[0].canvases
+        unchanged = canvases[0].to_dict()
+        canvases[3].label = "changed"
+        canvases[2].images[0].resource.format = "image/png"
+        after = m.to_dict()
+        self.assertIsNot(before, after)
+        self.assertIs(after["sequences"][0]["canvases"][0], unchanged)
+        self.assertEqual(after["sequences"][0]["canvases"][3]["label"], "changed")
+        self.assertEqual(json.loads(str(m)), after)
+        self.assertEqual(str(m), json.dumps(after))
+        m.sequences[0].del_canvas(canvases[1])
+        self.assertEqual(len(json.loads(str(m))["sequences"][0]["canvases"]), 4)
+        m.sequences[0].add_canvas(canvas(9))
+        self.assertEqual(m.to_dict()["sequences"][0]["canvases"][-1]["@id"],
+                         "http://example.org/canvas/9")
+
+    def testPreservingLoadRoundTrips(self):
+        source = loaded_manifest()
+        m = Manifest.load(json.dumps(source), preserve=True)
+        self.assertEqual(m.to_dict(), source)
+        self.assertEqual(json.loads(str(m)), source)
+        self.assertEqual(m.get_canvas("http://example.org/canvas/2").height, 100)
+
+    def testPreservingLoadKeepsUnmodeledProperties(self):
+        source = loaded_manifest()
+        m = Manifest.load(json.dumps(source), preserve=True)
+        untouched = m.to_dict()["sequences"][0]["canvases"][0]
+        m.label = "A new label"
+        m.get_canvas("http://example.org/canvas/1").width = 90
+        source["label"] = "A new label"
+        source["sequences"][0]["canvases"][1]["width"] = 90
+        self.assertEqual(m.to_dict(), source)
+        self.assertEqual(json.loads(str(m)), source)
+        # Records off the path to the change are emitted from the loaded data
+        self.assertIs(m.to_dict()["sequences"][0]["canvases"][0], untouched)
+
+    def testContentHashIgnoresHowRecordWasBuilt(self):
+        rows = [("page-{}".format(n), 800, 600, "p. {}".format(n)) for n in range(5)]
+        built = build_manifest("http://example.org/manifest", rows, "http://example.org/iiif")
+        source = json.loads(build_manifest_json("http://example.org/manifest", rows,
+                                                "http://example.org/iiif"))
+        reordered = dict(reversed(list(source.items())))
+        loaded = Manifest.load(json.dumps(reordered), preserve=True)
+        self.assertEqual(built.content_hash(), loaded.content_hash())
+        self.assertEqual(built.canonical_json(), loaded.canonical_json())
+        self.assertEqual(built.etag(), '"{}"'.format(built.content_hash()))
+
+    def testContentHashFollowsChanges(self):
+        m = Manifest.load(json.dumps(loaded_manifest()), preserve=True)
+        before = m.content_hash()
+        c = m.get_canvas("http://example.org/canvas/2")
+        canvas_before = c.content_hash()
+        c.images[0].resource.format = "image/png"
+        self.assertNotEqual(c.content_hash(), canvas_before)
+        self.assertNotEqual(m.content_hash(), before)
+        sibling = m.get_canvas("http://example.org/canvas/1")
+        self.assertIsNotNone(sibling.__dict__.get("_hash_cache"))
+        c.images[0].resource.format = "image/jpeg"
+        self.assertEqual(m.content_hash(), before)
+
+    def testCloneSharesUntilChanged(self):
+        template = build_manifest("http://example.org/manifest",
+                                  [("page-{}".format(n), 800, 600) for n in range(5)],
+                                  "http://example.org/iiif", label="Template")
+        before = template.canonical_json()
+        got_before = template.sequences[0].canvases[0]
+        clone = template.clone()
+        self.assertIsNot(clone, template)
+        self.assertEqual(clone.canonical_json(), before)
+        clone.id = "http://example.org/manifest/2"
+        clone.label = "Clone"
+        canvases = clone.sequences[0].canvases
+        canvases[3].label = "p. 4"
+        self.assertEqual(template.canonical_json(), before)
+        self.assertEqual(clone.to_dict()["sequences"][0]["canvases"][3]["label"], "p. 4")
+        self.assertEqual(clone.to_dict()["label"], "Clone")
+        # Only the canvas that was got from the clone was copied
+        ours = clone.sequences[0]._canvases
+        theirs = template.sequences[0]._canvases
+        self.assertIsNot(ours[3], theirs[3])
+        self.assertIs(ours[2], theirs[2])
+        self.assertIs(ours[3]._images[0], theirs[3]._images[0])
+        # The template can change what it no longer shares without a copy
+        self.assertIs(template.sequences[0].canvases[3], theirs[3])
+        template.sequences[0].canvases[2].label = "Cover"
+        self.assertNotIn("label", clone.to_dict()["sequences"][0]["canvases"][2])
+        # A record got before cloning is still shared, and changing it changes both
+        got_before.label = "Shared"
+        self.assertEqual(clone.to_dict()["sequences"][0]["canvases"][0]["label"], "Shared")
+        self.assertEqual(template.to_dict()["sequences"][0]["canvases"][0]["label"], "Shared")
+
+    def testMetadataChangesInvalidateCaches(self):
+        m = Manifest.load(json.dumps(loaded_manifest()), preserve=True)
+        m.metadata = [MetadataField("Author", "A. N. Author")]
+        before = (m.to_json(), m.content_hash(), m.etag())
+        self.assertIsInstance(m.metadata, RecordListView)
+        m.add_metadata(MetadataField("Date", "1900"))
+        self.assertEqual(m.to_dict()["metadata"][1], {"label": "Date", "value": "1900"})
+        self.assertNotEqual(m.content_hash(), before[1])
+        self.assertNotEqual(m.etag(), before[2])
+        hashed = m.content_hash()
+        m.metadata[0].label = "Creator"
+        self.assertEqual(json.loads(m.to_json())["metadata"][0]["label"], "Creator")
+        self.assertNotEqual(m.content_hash(), hashed)
+        # A field set on a second record is copied, so each marks only its own record
+        other = Manifest.load(json.dumps(loaded_manifest()), preserve=True)
+        other.metadata = m.metadata
+        other.metadata[0].value = "Someone else"
+        self.assertEqual(m.to_dict()["metadata"][0]["value"], "A. N. Author")
+        self.assertEqual(other.to_dict()["metadata"][0]["value"], "Someone else")
+
+    def testSpooledCanvases(self):
+        def build():
+            return build_manifest("http://example.org/manifest",
+                                  [("page-{}".format(n), 800, 600) for n in range(6)],
+                                  "http://example.org/iiif", label="Spooled")
+        expected, manifest = build(), build()
+        sequence = manifest.sequences[0]
+        spool = CanvasSpool()
+        self.addCleanup(spool.close)
+        spool.extend(sequence.canvases)
+        sequence.canvases = spool
+        self.assertIs(sequence._canvases, spool)
+        for m in (expected, manifest):
+            s = m.sequences[0]
+            s.insert_canvas(1, canvas("inserted"))
+            s.add_canvas(canvas("added"))
+            s.del_canvas("http://example.org/manifest/canvas/3")
+        self.assertEqual(len(sequence.canvases), 7)
+        self.assertEqual(sequence.get_canvas("http://example.org/canvas/added").id,
+                         "http://example.org/canvas/added")
+        self.assertFalse(sequence.has_canvas("http://example.org/manifest/canvas/3"))
+        self.assertEqual([c.id for c in sequence.canvases],
+                         [c.id for c in expected.sequences[0].canvases])
+
+        f = io.BytesIO()
+        manifest.write_json(f)
+        self.assertEqual(f.getvalue().decode("utf-8"), expected.to_json())
+        self.assertIs(sequence._canvases, spool)
+        self.assertEqual(manifest.to_dict(), expected.to_dict())
+        with self.assertRaises(ValueError):
+            manifest.sequences[0].clone()
+
+    def testSpoolsTakeCanvasDictionaries(self):
+        sequence = Sequence("http://example.org/sequence")
+        spool = CanvasSpool()
+        self.addCleanup(spool.close)
+        sequence.canvases = spool
+        data = canvas("from-a-dict").to_dict()
+        sequence.add_canvas(data)
+        sequence.insert_canvas(0, canvas("a-record"))
+        self.assertEqual([c.to_dict() for c in sequence.canvases][1], data)
+        self.assertTrue(sequence.has_canvas(data["@id"]))
+        with self.assertRaises(ValueError):
+            sequence.add_canvas({"@id": "http://example.org/not-a-canvas"})
+        with self.assertRaises(ValueError):
+            sequence.add_canvas("http://example.org/canvas/3")
+
+    def testOtherContentChecksEachUrl(self):
+        urls = ["http://example.org/list/1", "http://example.org/list/2"]
+        transport = StaticTransport({url: {} for url in urls})
+        set_default_transport(transport)
+        content = OtherContent(urls)
+        self.assertEqual(transport.calls, urls)
+        self.assertEqual(content.items, urls)
+        self.assertEqual(content.to_dict(), {"otherContent": urls})
+
+    def testOtherContentRejectsUnresolvableUrl(self):
+        set_default_transport(StaticTransport({"http://example.org/list/1": {}}))
+        with self.assertRaisesRegex(ValueError, "http://example.org/list/2"):
+            OtherContent(["http://example.org/list/1", "http://example.org/list/2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+"""Test module for snapshots of record trees
+"""
+
+import io
+import json
+import pickle
+import unittest
+
+from pyiiif.pres_api.twodotone import snapshot
+from pyiiif.pres_api.twodotone.bulk import build_manifest
+from pyiiif.pres_api.twodotone.records import CanvasSpool, Manifest
+from pyiiif.transport import StaticTransport, set_default_transport
+
+
+def manifest(n, n_canvases=5):
+    uri = "http://example.org/manifest/{}".format(n)
+    rows = [("{}-{}".format(n, p), 800, 600, "p. {}".format(p)) for p in range(n_canvases)]
+    return build_manifest(uri, rows, "http://example.org/iiif", label="A manifest")
+
+
+class Tests(unittest.TestCase):
+    def setUp(self):
+        set_default_transport(StaticTransport())
+
+    def tearDown(self):
+        set_default_transport(None)
+
+    def testRoundTrips(self):
+        m = manifest(0)
+        restored = snapshot.loads(snapshot.dumps(m))
+        self.assertIsInstance(restored, Manifest)
+        self.assertEqual(restored.to_dict(), m.to_dict())
+        self.assertEqual(restored.content_hash(), m.content_hash())
+        # The restored records work like any others
+        canvas = restored.sequences[0].canvases[1]
+        self.assertIs(restored.get_canvas(canvas.id), canvas)
+        canvas.label = "p. 1 (corrected)"
+        self.assertEqual(restored.to_dict()["sequences"][0]["canvases"][1]["label"],
+                         "p. 1 (corrected)")
+
+    def testKeepsUnmodeledProperties(self):
+        data = {"@id": "http://example.org/manifest", "@type": "sc:Manifest",
+                "label": "A manifest", "seeAlso": "http://example.org/manifest.xml",
+                "sequences": [{"@id": "http://example.org/sequence",
+                               "@type": "sc:Sequence", "canvases": [
+                                   {"@id": "http://example.org/canvas/0",
+                                    "@type": "sc:Canvas", "label": "p. 0",
+                                    "height": 100, "width": 80,
+                                    "thumbnail": {"@id": "http://example.org/thumb.jpg"}}
+                               ]}]}
+        m = Manifest.load(json.dumps(data), preserve=True)
+        f = io.BytesIO()
+        snapshot.dump(m, f)
+        f.seek(0)
+        self.assertEqual(snapshot.load(f).to_dict(), data)
+
+    def testRoundTripsManyManifests(self):
+        manifests = {m.id: m for m in (manifest(n) for n in range(3))}
+        restored = snapshot.loads(snapshot.dumps(manifests))
+        self.assertEqual(list(restored), list(manifests))
+        for uri, m in manifests.items():
+            self.assertEqual(restored[uri].to_json(), m.to_json())
+        # Each manifest's images still share one profile
+        profiles = {id(c.images[0].resource.service.profile)
+                    for r in restored.values() for c in r.sequences[0].canvases}
+        self.assertEqual(len(profiles), 3)
+
+    def testKeepsRecordsSharedWithClones(self):
+        m = manifest(0, n_canvases=50)
+        copy = m.clone()
+        alone = len(snapshot.dumps(m))
+        data = snapshot.dumps([m, copy])
+        self.assertLess(len(data), alone * 1.5)
+        restored, restored_copy = snapshot.loads(data)
+        self.assertIs(restored_copy._sequences[0], restored._sequences[0])
+        # Changing the clone copies what it changes, as it did before the snapshot
+        restored_copy.sequences[0].canvases[1].label = "p. 1 (corrected)"
+        self.assertEqual(restored_copy.to_dict()["sequences"][0]["canvases"][1]["label"],
+                         "p. 1 (corrected)")
+        self.assertEqual(restored.to_dict(), m.to_dict())
+
+    def testRejectsSpooledCanvases(self):
+        m = manifest(0)
+        spool = CanvasSpool()
+        self.addCleanup(spool.close)
+        spool.extend(m.sequences[0].canvases)
+        m.sequences[0].canvases = spool
+        with self.assertRaisesRegex(ValueError, "spooled"):
+            snapshot.dumps(m)
+
+    def testRejectsOtherData(self):
+        with self.assertRaises(ValueError):
+            snapshot.loads(pickle.dumps(manifest(0).to_dict()))
+        with self.assertRaises(ValueError):
+            snapshot.loads(snapshot.MAGIC + b"\xff")
+        evil = snapshot.MAGIC + bytes([snapshot.VERSION]) + \
+            pickle.dumps(([], io.BytesIO()))
+        with self.assertRaises(pickle.UnpicklingError):
+            snapshot.loads(evil)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+"""Test module for incremental scanning of Presentation documents
+"""
+
+import json
+import unittest
+
+from pyiiif.pres_api.streaming import JSONScanner, iter_thumbnail_sources
+from pyiiif.pres_api.utils import get_thumbnail_streaming
+from pyiiif.transport import StaticTransport
+
+
+def chunked(data, size):
+    for i in range(0, len(data), size):
+        yield data[i:i+size]
+
+
+def big_manifest(n_canvases, thumbnail=None):
+    manifest = {"@id": "http://example.org/manifest", "@type": "sc:Manifest"}
+    if thumbnail:
+        manifest["thumbnail"] = thumbnail
+    manifest["sequences"] = [{
+        "@id": "http://example.org/sequence",
+        "@type": "sc:Sequence",
+        "canvases": [{
+            "@id": "http://example.org/canvas/{}".format(n),
+            "@type": "sc:Canvas",
+            "label": "Page \"{}\" \\ é".format(n),
+            "images": [{
+                "@id": "http://example.org/annotation/{}".format(n),
+                "@type": "oa:Annotation",
+                "resource": {
+                    "@id": "http://example.org/iiif/p{}/full/full/0/default.jpg".format(n)
+                }
+            }]
+        } for n in range(n_canvases)]
+    }]
+    return json.dumps(manifest).encode("utf-8")
+
+
+class Tests(unittest.TestCase):
+    def testScannerMatchesJsonModule(self):
+        doc = {"a": [1, 2.5, True, None, {"b": "x\\\"y"}], "c": {}, "d": [], "e": "é\\"}
+        data = json.dumps(doc).encode("utf-8")
+        for size in (1, 2, 3, 7, len(data)):
+            scanner = JSONScanner(chunked(data, size))
+            out = {}
+            for key in scanner.iter_object():
+                out[key] = scanner.read_value()
+            self.assertEqual(out, doc)
+
+    def testScannerSkipsUnreadValues(self):
+        data = b'{"skip": {"x": ["}", "]", "\\\\"]}, "keep": [1, {"y": 2}], "last": "z"}'
+        scanner = JSONScanner(chunked(data, 2))
+        seen = {}
+        for key in scanner.iter_object():
+            if key != "skip":
+                seen[key] = scanner.read_value()
+        self.assertEqual(seen, {"keep": [1, {"y": 2}], "last": "z"})
+
+    def testScannerOffsets(self):
+        data = b'[ {"a": 1},  "b" ]'
+        scanner = JSONScanner(chunked(data, 3))
+        offsets = []
+        for i in scanner.iter_array():
+            offsets.append(scanner.tell())
+        self.assertEqual(offsets, [2, 13])
+
+    def testStopsReading(self):
+        data = big_manifest(2000)
+        chunks = list(chunked(data, 1024))
+        consumed = []
+
+        def counting():
+            for c in chunks:
+                consumed.append(c)
+                yield c
+
+        kind, value = next(iter_thumbnail_sources(counting()))
+        self.assertEqual(kind, "image")
+        self.assertEqual(value["resource"]["@id"],
+                         "http://example.org/iiif/p0/full/full/0/default.jpg")
+        self.assertLess(len(consumed), 3)
+        self.assertGreater(len(chunks), 100)
+
+    def testPrefersLeadingThumbnail(self):
+        data = big_manifest(3, thumbnail={"@id": "http://example.org/t.jpg"})
+        kind, value = next(iter_thumbnail_sources(chunked(data, 5)))
+        self.assertEqual((kind, value), ("thumbnail", {"@id": "http://example.org/t.jpg"}))
+
+    def testGetThumbnailStreaming(self):
+        transport = StaticTransport()
+        transport.add("http://example.org/manifest", big_manifest(50))
+        tn = get_thumbnail_streaming("http://example.org/manifest", chunk_size=256,
+                                     transport=transport)
+        self.assertEqual(tn, "http://example.org/iiif/p0/full/!200,200/0/default.jpg")
+        self.assertEqual(transport.calls, ["http://example.org/manifest"])
+
+    def testGetThumbnailStreamingFollowsReferences(self):
+        transport = StaticTransport()
+        transport.add("http://example.org/collection", {
+            "@id": "http://example.org/collection", "@type": "sc:Collection",
+            "manifests": ["http://example.org/manifest"]})
+        transport.add("http://example.org/manifest", big_manifest(2))
+        tn = get_thumbnail_streaming("http://example.org/collection", preserve_ratio=False,
+                                     transport=transport)
+        self.assertEqual(tn, "http://example.org/iiif/p0/full/200,200/0/default.jpg")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,268 @@
+"""Test module for the transports in pyiiif.transport
+"""
+
+import asyncio
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from concurrent.futures import ThreadPoolExecutor
+
+from pyiiif.exceptions import CircuitOpenError
+from pyiiif.pres_api.twodotone.records import URL_CHECK_TIMEOUT, Manifest
+from pyiiif.pres_api.utils import get_record
+from pyiiif.transport import AdaptiveLimiter, CircuitBreaker, LimitedTransport, \
+    PriorityScheduler, RequestsTransport, ResilientTransport, ScheduledTransport, \
+    StaticTransport, Transport, BATCH, INTERACTIVE, current_priority, fetch_priority, \
+    set_default_transport
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Answers according to the behaviour registered for each path on the server
+    """
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.hits[self.path] = server.hits.get(self.path, 0) + 1
+            n = server.hits[self.path]
+        delays, statuses = server.behaviour.get(self.path, ([], []))
+        if n <= len(delays):
+            time.sleep(delays[n-1])
+        status = statuses[n-1] if n <= len(statuses) else 200
+        body = json.dumps({"@id": self.path, "hit": n}).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class Tests(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+        self.server.daemon_threads = True
+        self.server.lock = threading.Lock()
+        self.server.hits = {}
+        self.server.behaviour = {}
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base = "http://127.0.0.1:{}".format(self.server.server_address[1])
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def testTransportsMustImplementGet(self):
+        class Incomplete(Transport):
+            pass
+
+        with self.assertRaises(TypeError):
+            Incomplete()
+
+    def testRetriesWithBackoff(self):
+        self.server.behaviour["/flaky"] = ([], [503, 503])
+        transport = ResilientTransport(RequestsTransport(), retries=2, backoff=0.01)
+        rec = get_record(self.base + "/flaky", request_timeout=2, transport=transport)
+        self.assertEqual(rec["hit"], 3)
+
+    def testGivesUpAfterRetries(self):
+        self.server.behaviour["/down"] = ([], [503, 503, 503])
+        transport = ResilientTransport(RequestsTransport(), retries=1, backoff=0.01)
+        resp = transport.get(self.base + "/down", timeout=2)
+        self.assertEqual(resp.status_code, 503)
+        self.assertEqual(self.server.hits["/down"], 2)
+
+    def testHedgesSlowRequests(self):
+        self.server.behaviour["/slow"] = ([1.5], [])
+        transport = ResilientTransport(RequestsTransport(), hedge_after=0.05)
+        start = time.monotonic()
+        rec = get_record(self.base + "/slow", request_timeout=5, transport=transport)
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(rec["hit"], 2)
+
+    def testHedgesAfterObservedPercentile(self):
+        transport = ResilientTransport(RequestsTransport(), hedge_min_samples=5)
+        for _ in range(5):
+            transport.get(self.base + "/fast", timeout=2)
+        self.assertIsNotNone(transport._hedge_delay("127.0.0.1:{}".format(self.server.server_address[1])))
+        self.server.behaviour["/slow"] = ([1.5], [])
+        start = time.monotonic()
+        transport.get(self.base + "/slow", timeout=5)
+        self.assertLess(time.monotonic() - start, 1)
+
+    def testCircuitBreakerFailsFast(self):
+        self.server.behaviour["/broken"] = ([], [503] * 10)
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        transport = ResilientTransport(RequestsTransport(), retries=1, backoff=0.01,
+                                       breaker=breaker)
+        transport.get(self.base + "/broken", timeout=2)
+        with self.assertRaises(CircuitOpenError):
+            transport.get(self.base + "/other", timeout=2)
+        self.assertEqual(self.server.hits.get("/other"), None)
+
+    def testCircuitBreakerTrialRequest(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+        breaker.record_failure("example.org")
+        self.assertRaises(CircuitOpenError, breaker.allow, "example.org")
+        time.sleep(0.06)
+        breaker.allow("example.org")
+        self.assertRaises(CircuitOpenError, breaker.allow, "example.org")
+        breaker.record_success("example.org")
+        self.assertFalse(breaker.is_open("example.org"))
+
+    def testFailedTrialRequestLetsCircuitClose(self):
+        class Broken(Transport):
+            def get(self, uri, timeout=None, stream=False):
+                raise ValueError("Unreadable response")
+
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+        breaker.record_failure("example.org")
+        time.sleep(0.06)
+        with self.assertRaises(ValueError):
+            ResilientTransport(Broken(), breaker=breaker).get("http://example.org/a")
+        self.assertRaises(CircuitOpenError, breaker.allow, "example.org")
+        time.sleep(0.06)
+        # The next trial is let through
+        breaker.allow("example.org")
+
+    def testLimiterBoundsConcurrency(self):
+        limiter = AdaptiveLimiter(initial_limit=3, max_limit=3)
+        self.server.behaviour["/a"] = ([0.05] * 12, [])
+        transport = LimitedTransport(RequestsTransport(), limiter)
+        peak = []
+
+        def fetch(_):
+            resp = transport.get(self.base + "/a", timeout=2)
+            peak.append(limiter.in_flight("127.0.0.1:{}".format(self.server.server_address[1])))
+            return resp.status_code
+
+        with ThreadPoolExecutor(max_workers=12) as pool:
+            self.assertEqual(list(pool.map(fetch, range(12))), [200] * 12)
+        self.assertLessEqual(max(peak), 3)
+
+    def testLimiterIncreasesAndBacksOff(self):
+        limiter = AdaptiveLimiter(initial_limit=4, latency_tolerance=None)
+        for _ in range(8):
+            limiter.acquire("example.org")
+            limiter.release("example.org", latency=0.01)
+        self.assertEqual(limiter.limit("example.org"), 5)
+        limiter.acquire("example.org")
+        limiter.release("example.org", congested=True)
+        self.assertEqual(limiter.limit("example.org"), 2)
+
+    def testLimiterBacksOffOnThrottling(self):
+        self.server.behaviour["/busy"] = ([], [429, 503])
+        limiter = AdaptiveLimiter(initial_limit=8)
+        transport = LimitedTransport(RequestsTransport(), limiter)
+        transport.get(self.base + "/busy", timeout=2)
+        transport.get(self.base + "/busy", timeout=2)
+        self.assertEqual(limiter.limit("127.0.0.1:{}".format(self.server.server_address[1])), 2)
+
+    def testLimiterBacksOffOnSlowResponses(self):
+        limiter = AdaptiveLimiter(initial_limit=8, min_samples=3)
+        for _ in range(3):
+            limiter.acquire("example.org")
+            limiter.release("example.org", latency=0.01)
+        before = limiter.limit("example.org")
+        limiter.acquire("example.org")
+        limiter.release("example.org", latency=1)
+        self.assertLess(limiter.limit("example.org"), before)
+
+    def testLimiterToleratesHostsWhichUsuallyAnswerInstantly(self):
+        limiter = AdaptiveLimiter(initial_limit=8, min_samples=3)
+        for _ in range(3):
+            limiter.acquire("example.org")
+            limiter.release("example.org", latency=0)
+        for _ in range(10):
+            limiter.acquire("example.org")
+            limiter.release("example.org", latency=0.02)
+        self.assertGreater(limiter.limit("example.org"), 8)
+
+    def testInteractiveJumpsQueuedBatch(self):
+        scheduler = PriorityScheduler(max_concurrency=1)
+        held = scheduler.acquire(BATCH)
+        order = []
+
+        def wait_for(priority):
+            scheduler.release(scheduler.acquire(priority))
+            order.append(priority)
+
+        threads = [threading.Thread(target=wait_for, args=(BATCH,))]
+        threads[0].start()
+        time.sleep(0.05)
+        threads.append(threading.Thread(target=wait_for, args=(INTERACTIVE,)))
+        threads[1].start()
+        time.sleep(0.05)
+        scheduler.release(held)
+        for thread in threads:
+            thread.join(2)
+        self.assertEqual(order, [INTERACTIVE, BATCH])
+
+    def testBatchBudgetLeavesInteractiveSlots(self):
+        scheduler = PriorityScheduler(max_concurrency=4, budgets={BATCH: 3})
+        for _ in range(3):
+            scheduler.acquire(BATCH)
+        blocked = threading.Thread(target=scheduler.acquire, args=(BATCH,), daemon=True)
+        blocked.start()
+        blocked.join(0.05)
+        self.assertTrue(blocked.is_alive())
+        self.assertEqual(scheduler.acquire(INTERACTIVE), INTERACTIVE)
+        self.assertEqual(scheduler.in_flight(BATCH), 3)
+        scheduler.release(BATCH)
+        blocked.join(2)
+        self.assertEqual(scheduler.in_flight(), 4)
+
+    def testPriorityFollowsIntoExecutor(self):
+        class Recording(Transport):
+            def get(self, uri, timeout=None, stream=False):
+                seen.append(current_priority())
+                return StaticTransport().get(uri)
+
+        seen = []
+        transport = ScheduledTransport(Recording())
+
+        async def fetch():
+            with fetch_priority(BATCH):
+                await transport.aget("http://example.org/a")
+            await transport.aget("http://example.org/b")
+
+        asyncio.run(fetch())
+        self.assertEqual(seen, [BATCH, INTERACTIVE])
+
+    def testRecordsUseDefaultTransport(self):
+        transport = StaticTransport()
+        set_default_transport(transport)
+        try:
+            m = Manifest("http://example.org/manifest")
+        finally:
+            set_default_transport(None)
+        self.assertEqual(m.id, "http://example.org/manifest")
+        self.assertEqual(transport.calls, ["http://example.org/manifest"])
+
+    def testUrlChecksGiveUpOnFailingHosts(self):
+        class Recording(StaticTransport):
+            def get(self, uri, timeout=None, stream=False):
+                self.timeouts.append(timeout)
+                return super().get(uri, timeout=timeout, stream=stream)
+
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+        breaker.record_failure("example.org")
+        recording = Recording()
+        recording.timeouts = []
+        set_default_transport(ResilientTransport(recording, breaker=breaker))
+        try:
+            with self.assertRaises(ValueError):
+                Manifest("http://example.org/manifest")
+            self.assertEqual(recording.calls, [])
+            Manifest("http://example.net/manifest")
+        finally:
+            set_default_transport(None)
+        self.assertEqual(recording.timeouts, [URL_CHECK_TIMEOUT])
+
+
+if __name__ == "__main__":
+    unittest.main()